@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { useNavigate } from 'react-router-dom';
 import axios from './utils/api';
 import './Courses.css';
@@ -8,59 +8,95 @@ import logo from '../assets/logo_nobg.png';
 const Courses = () => {
 const navigate = useNavigate();
 const [courses, setCourses] = useState([]);
-const [filteredCourses, setFilteredCourses] = useState([]);
-const [loading, setLoading] = useState(true);
+const [total, setTotal] = useState(0);
+const [loading, setLoading] = useState(true); // เฉพาะครั้งแรก ไม่ถอด input ออกระหว่างพิมพ์
 const [error, setError] = useState(null);
 const [searchTerm, setSearchTerm] = useState('');
+const [query, setQuery] = useState('');
 const [selectedLevel, setSelectedLevel] = useState('');
 const [selectedCategory, setSelectedCategory] = useState('');
+const [filterOptions, setFilterOptions] = useState({ levels: [], categories: [] });
+const [nextPage, setNextPage] = useState(null);
+const [loadingMore, setLoadingMore] = useState(false);
+const [progressMap, setProgressMap] = useState({});
+const requestSeq = useRef(0);
 
+// ตัวเลือก dropdown มาจากทั้งแคตตาล็อก ไม่ใช่แค่หน้าที่โหลดแล้ว
 useEffect(() => {
-fetchCourses();
+  axios.get('/api/courses-summary/filters/')
+    .then((res) => setFilterOptions({
+      levels: res.data?.levels ?? [],
+      categories: res.data?.categories ?? [],
+    }))
+    .catch((err) => console.error('fetch filters error:', err));
 }, []);
 
+// หน่วงคำค้นเล็กน้อย ไม่ยิง request ทุกตัวอักษร
 useEffect(() => {
-filterCourses();
-}, [courses, searchTerm, selectedLevel, selectedCategory]);
+  const t = setTimeout(() => setQuery(searchTerm.trim()), 300);
+  return () => clearTimeout(t);
+}, [searchTerm]);
 
-const fetchCourses = async () => {
-  try {
-    setLoading(true);
-    const res = await axios.get('/api/courses-list/');
-    let list = Array.isArray(res.data) ? res.data : [];
+// กรองที่ server: เปลี่ยนเงื่อนไขเมื่อไรโหลดหน้าแรกใหม่
+useEffect(() => {
+  fetchCourses();
+  // eslint-disable-next-line react-hooks/exhaustive-deps
+}, [query, selectedLevel, selectedCategory]);
 
-    // เรียงเก่าสุดก่อน
-    const toTs = (c) => Date.parse(c.updated_at || c.created_at || 0) || 0;
-    list = list.sort((a, b) => toTs(b) - toTs(a)); 
+// ดึง progress ของทุกคอร์สที่โหลดมาแล้วใน request เดียว
+useEffect(() => {
+  const ids = courses.map((c) => c.id).filter((id) => !(id in progressMap));
+  if (ids.length === 0) return;
+  axios.get('/api/progress/', { params: { ids: ids.join(',') } })
+    .then((res) => {
+      const next = {};
+      (res.data || []).forEach((p) => { next[p.course_id] = p.percent; });
+      setProgressMap((prev) => ({ ...prev, ...next }));
+    })
+    .catch((err) => console.error('fetch progress error:', err));
+  // eslint-disable-next-line react-hooks/exhaustive-deps
+}, [courses]);
+
+const filterParams = () => {
+  const params = { count: 1 };
+  if (query) params.q = query;
+  if (selectedLevel) params.level = selectedLevel;
+  if (selectedCategory) params.category = selectedCategory;
+  return params;
+};
 
-    setCourses(list);
+// ใช้ endpoint สรุป (เฉพาะข้อมูลการ์ด) แบบแบ่งหน้า เรียงใหม่สุดก่อน (server เรียงตาม created_at)
+const fetchCourses = async () => {
+  const seq = ++requestSeq.current;
+  try {
+    const res = await axios.get('/api/courses-summary/', { params: filterParams() });
+    if (seq !== requestSeq.current) return; // มีเงื่อนไขใหม่กว่าแล้ว ทิ้งผลนี้
+    setCourses(res.data?.results ?? []);
+    setTotal(res.data?.count ?? 0);
+    setNextPage(res.data?.next || null);
+    setError(null);
   } catch (err) {
-    setError('โหลดข้อมูลไม่สำเร็จ');
+    if (seq === requestSeq.current) setError('โหลดข้อมูลไม่สำเร็จ');
   } finally {
-    setLoading(false);
+    if (seq === requestSeq.current) setLoading(false);
   }
 };
 
-  const filterCourses = () => {
-    let filtered = courses;
-    if (searchTerm)
-      filtered = filtered.filter(c =>
-        (c.name || '').toLowerCase().includes(searchTerm.toLowerCase()));
-    if (selectedLevel)
-      filtered = filtered.filter(c => c.level === selectedLevel);
-    if (selectedCategory)
-      filtered = filtered.filter(c => c.category === selectedCategory);
-    setFilteredCourses(filtered);
-  };
-
-
-
-const getUniqueLevels = () => {
-return [...new Set(courses.map(course => course.level))];
-};
-
-const getUniqueCategories = () => {
-return [...new Set(courses.map(course => course.category))];
+// ลิงก์ next จาก server มี q/level/category ติดมาแล้ว
+const loadMore = async () => {
+  if (!nextPage) return;
+  const seq = requestSeq.current;
+  try {
+    setLoadingMore(true);
+    const res = await axios.get(nextPage);
+    if (seq !== requestSeq.current) return;
+    setCourses((prev) => [...prev, ...(res.data?.results ?? [])]);
+    setNextPage(res.data?.next || null);
+  } catch (err) {
+    setError('โหลดข้อมูลไม่สำเร็จ');
+  } finally {
+    setLoadingMore(false);
+  }
 };
 
 const handleCourseClick = (courseId) => {
@@ -115,7 +151,7 @@ return ( <div className="home-container">
         className="filter-select"
       >
         <option value="">📊 ทุกระดับ</option>
-        {getUniqueLevels().map(level => (
+        {filterOptions.levels.map(level => (
           <option key={level} value={level}>{level}</option>
         ))}
       </select>
@@ -126,14 +162,14 @@ return ( <div className="home-container">
         className="filter-select"
       >
         <option value="">🏷️ ทุกประเภท</option>
-        {getUniqueCategories().map(category => (
+        {filterOptions.categories.map(category => (
           <option key={category} value={category}>{category}</option>
         ))}
       </select>
     </div>
 
     <div className="filter-info">
-      <p>แสดง {filteredCourses.length} จาก {courses.length} บทเรียนทั้งหมด</p>
+      <p>แสดง {courses.length} จาก {total} บทเรียนทั้งหมด</p>
     </div>
   </div>
 
@@ -141,13 +177,13 @@ return ( <div className="home-container">
 
 
   {/* แสดงคอร์ส */}
-  {filteredCourses.length === 0 ? (
+  {courses.length === 0 ? (
     <div className="no-courses">
       <p>📭 ไม่พบคอร์สที่ตรงกับเงื่อนไข</p>
     </div>
   ) : (
 <div className="course-grid">
-  {filteredCourses.map((course) => (
+  {courses.map((course) => (
     <div
       key={course.id}
       className="course-card-fancy"
@@ -157,6 +193,8 @@ return ( <div className="home-container">
       <div className="card-image-wrapper">
         <img
           src={course.cover_url || "https://via.placeholder.com/400x250?text=No+Image"}
+          srcSet={course.cover_srcset?.webp}
+          sizes="(max-width: 600px) 100vw, 400px"
           alt={course.name}
           className="course-image"
           loading="lazy"
@@ -175,7 +213,7 @@ return ( <div className="home-container">
           {course.description?.slice(0, 60) || "ไม่มีคำอธิบาย"}...
         </p>
         <div className="progress-bar">
-          <div className="progress-fill" style={{ width: "60%" }}></div>
+          <div className="progress-fill" style={{ width: `${progressMap[course.id] || 0}%` }}></div>
         </div>
       </div>
     </div>
@@ -184,6 +222,14 @@ return ( <div className="home-container">
 
     
   )}
+
+  {nextPage && (
+    <div className="load-more">
+      <button onClick={loadMore} className="retry-button" disabled={loadingMore}>
+        {loadingMore ? '⏳ กำลังโหลด...' : '⬇️ โหลดเพิ่ม'}
+      </button>
+    </div>
+  )}
   
 </div>
 
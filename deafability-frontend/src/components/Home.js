@@ -1,68 +1,76 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { useNavigate } from 'react-router-dom';
 import axios from './utils/api';
 
 const Home = () => {
   const navigate = useNavigate();
   const [courses, setCourses] = useState([]);
-  const [filteredCourses, setFilteredCourses] = useState([]);
+  const [total, setTotal] = useState(0);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
   const [searchTerm, setSearchTerm] = useState('');
+  const [query, setQuery] = useState('');
   const [selectedLevel, setSelectedLevel] = useState('');
   const [selectedCategory, setSelectedCategory] = useState('');
+  const [filterOptions, setFilterOptions] = useState({ levels: [], categories: [] });
+  const [nextPage, setNextPage] = useState(null);
+  const requestSeq = useRef(0);
 
+  // ตัวเลือกระดับ/สายงานของทั้งแคตตาล็อก
   useEffect(() => {
-    fetchCourses();
+    axios.get('/api/courses-summary/filters/')
+      .then(response => setFilterOptions({
+        levels: response.data?.levels ?? [],
+        categories: response.data?.categories ?? [],
+      }))
+      .catch(err => console.error('Error fetching filters:', err));
   }, []);
 
+  // หน่วงคำค้นก่อนยิง request
+  useEffect(() => {
+    const t = setTimeout(() => setQuery(searchTerm.trim()), 300);
+    return () => clearTimeout(t);
+  }, [searchTerm]);
+
+  // ค้นหา/กรองที่ server แล้วเริ่มจากหน้าแรกใหม่
   useEffect(() => {
-    filterCourses();
-  }, [courses, searchTerm, selectedLevel, selectedCategory]);
+    fetchCourses();
+    // eslint-disable-next-line react-hooks/exhaustive-deps
+  }, [query, selectedLevel, selectedCategory]);
 
   const fetchCourses = async () => {
+    const seq = ++requestSeq.current;
+    const params = { count: 1 };
+    if (query) params.q = query;
+    if (selectedLevel) params.level = selectedLevel;
+    if (selectedCategory) params.category = selectedCategory;
     try {
-      setLoading(true);
-      const response = await axios.get('/api/courses-list/');
-      setCourses(response.data);
+      const response = await axios.get('/api/courses-summary/', { params });
+      if (seq !== requestSeq.current) return;
+      setCourses(response.data?.results ?? []);
+      setTotal(response.data?.count ?? 0);
+      setNextPage(response.data?.next || null);
       setError(null);
     } catch (err) {
       console.error('Error fetching courses:', err);
-      setError('ไม่สามารถโหลดข้อมูลได้ กรุณาลองใหม่');
+      if (seq === requestSeq.current) setError('ไม่สามารถโหลดข้อมูลได้ กรุณาลองใหม่');
     } finally {
-      setLoading(false);
+      if (seq === requestSeq.current) setLoading(false);
     }
   };
 
-  const filterCourses = () => {
-    let filtered = courses;
-
-    // ค้นหาตามชื่อ
-    if (searchTerm) {
-      filtered = filtered.filter(course =>
-        course.name.toLowerCase().includes(searchTerm.toLowerCase())
-      );
-    }
-
-    // กรองตามระดับ
-    if (selectedLevel) {
-      filtered = filtered.filter(course => course.level === selectedLevel);
-    }
-
-    // กรองตามประเภท
-    if (selectedCategory) {
-      filtered = filtered.filter(course => course.category === selectedCategory);
+  const loadMore = async () => {
+    if (!nextPage) return;
+    const seq = requestSeq.current;
+    try {
+      const response = await axios.get(nextPage);
+      if (seq !== requestSeq.current) return;
+      setCourses(prev => [...prev, ...(response.data?.results ?? [])]);
+      setNextPage(response.data?.next || null);
+    } catch (err) {
+      console.error('Error fetching courses:', err);
+      setError('ไม่สามารถโหลดข้อมูลได้ กรุณาลองใหม่');
     }
-
-    setFilteredCourses(filtered);
-  };
-
-  const getUniqueLevels = () => {
-    return [...new Set(courses.map(course => course.level))];
-  };
-
-  const getUniqueCategories = () => {
-    return [...new Set(courses.map(course => course.category))];
   };
 
   const handleCourseClick = (courseId) => {
@@ -139,7 +147,7 @@ const Home = () => {
             className="filter-select"
           >
             <option value="">📊 ทุกระดับ</option>
-            {getUniqueLevels().map(level => (
+            {filterOptions.levels.map(level => (
               <option key={level} value={level}>{level}</option>
             ))}
           </select>
@@ -150,14 +158,14 @@ const Home = () => {
             className="filter-select"
           >
             <option value="">🏷️ ทุกประเภท</option>
-            {getUniqueCategories().map(category => (
+            {filterOptions.categories.map(category => (
               <option key={category} value={category}>{category}</option>
             ))}
           </select>
         </div>
         
         <div className="filter-info">
-          <p>แสดง {filteredCourses.length} จาก {courses.length} บทเรียนทั้งหมด</p>
+          <p>แสดง {courses.length} จาก {total} บทเรียนทั้งหมด</p>
         </div>
       </div>
       
@@ -187,13 +195,13 @@ const Home = () => {
     </div>
 
 
-      {filteredCourses.length === 0 ? (
+      {courses.length === 0 ? (
         <div className="no-courses">
           <p>📭 ไม่พบบทเรียนที่ตรงกับเงื่อนไข</p>
         </div>
       ) : (
         <div className="course-grid">
-          {filteredCourses.map((course) => (
+          {courses.map((course) => (
             <div
               key={course.id}
               className="course-card"
@@ -215,6 +223,14 @@ const Home = () => {
           ))}
         </div>
       )}
+
+      {nextPage && (
+        <div style={{ textAlign: 'center', margin: '20px 0' }}>
+          <button onClick={loadMore} className="filter-select">
+            ⬇️ โหลดเพิ่ม
+          </button>
+        </div>
+      )}
     </div>
   );
 };
@@ -153,6 +153,8 @@ export default function JobsPage() {
                 <div className="job-image-wrapper">
                   <img
                     src={job.image_url || "https://via.placeholder.com/400x250?text=No+Image"}
+                    srcSet={job.image_srcset?.webp}
+                    sizes="(max-width: 600px) 100vw, 400px"
                     alt={job.title}
                     className="job-image"
                     loading="lazy"
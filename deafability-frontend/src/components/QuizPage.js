@@ -1,11 +1,11 @@
-import React, { useEffect, useMemo, useState } from 'react';
+import React, { useEffect, useState } from 'react';
 import { useParams, useNavigate } from 'react-router-dom';
 import axios from './utils/api';
 import './QuizPage.css';
 
 const PAGE_SIZE = 2;
 
-function QuestionBlock({ q, value, onChange, onCheck }) {
+function QuestionBlock({ q, value, onChange }) {
   const toggleWord = (w) => {
     if (value.includes(w)) {
       onChange(value.filter(x => x !== w));
@@ -29,9 +29,6 @@ function QuestionBlock({ q, value, onChange, onCheck }) {
         ))}
       </div>
       <div className="q-answer">ประโยคของคุณ: {value.join(' ') || '—'}</div>
-      <button className="q-check" type="button" onClick={() => onCheck(q.id, value)}>
-        ตรวจคำตอบ
-      </button>
     </div>
   );
 }
@@ -40,58 +37,86 @@ export default function QuizPage() {
   const { courseId } = useParams(); // ใช้ route /quiz/:courseId
   const navigate = useNavigate();
 
-  const [all, setAll] = useState([]);         // คำถามทั้งหมดของคอร์ส
+  const [items, setItems] = useState([]);     // คำถามของหน้านี้ (แบ่งหน้าที่ server)
+  const [count, setCount] = useState(0);      // จำนวนคำถามทั้งหมดของคอร์ส
+  const [links, setLinks] = useState({ next: null, previous: null });
   const [page, setPage] = useState(0);        // หน้าเริ่มที่ 0
-  const [answers, setAnswers] = useState({}); // เก็บคำตอบเลือกของแต่ละข้อ { [id]: string[] }
+  const [answers, setAnswers] = useState({}); // คำตอบของทุกข้อทุกหน้า { [id]: string[] }
   const [result, setResult] = useState({});   // เก็บผลตรวจ { [id]: true/false }
+  const [score, setScore] = useState(null);   // { score, answered } หลังส่งคำตอบ
+  const [submitting, setSubmitting] = useState(false);
+  const [submitErr, setSubmitErr] = useState('');
   const [loading, setLoading] = useState(true);
   const [err, setErr] = useState('');
 
+  // ไม่ขอ correct_order (เฉลย) — ตรวจคำตอบที่ server
+  const loadPage = async (url, params) => {
+    try {
+      setLoading(true);
+      const res = await axios.get(url, { params });
+      setItems(res.data?.results ?? []);
+      if (typeof res.data?.count === 'number') setCount(res.data.count);
+      setLinks({ next: res.data?.next || null, previous: res.data?.previous || null });
+      setErr('');
+      return true;
+    } catch (e) {
+      setErr('โหลดคำถามไม่สำเร็จ');
+      return false;
+    } finally {
+      setLoading(false);
+    }
+  };
+
   useEffect(() => {
-    (async () => {
-      try {
-        setLoading(true);
-        const res = await axios.get(`/api/quiz/questions/?course=${courseId}`);
-        const list = Array.isArray(res.data) ? res.data : [];
-        setAll(list);
-        setAnswers({}); setResult({});
-        setPage(0);
-        setErr('');
-      } catch (e) {
-        setErr('โหลดคำถามไม่สำเร็จ');
-      } finally {
-        setLoading(false);
-      }
-    })();
+    setAnswers({}); setResult({}); setScore(null); setSubmitErr('');
+    setPage(0);
+    loadPage('/api/quiz/questions/', {
+      course: courseId, fields: 'id,prompt,words', page_size: PAGE_SIZE, count: 1,
+    });
   }, [courseId]);
 
-  const totalPages = Math.max(1, Math.ceil((all.length || 0) / PAGE_SIZE));
-  const pageItems = useMemo(() => {
-    const start = page * PAGE_SIZE;
-    return all.slice(start, start + PAGE_SIZE);
-  }, [all, page]);
+  const totalPages = Math.max(1, Math.ceil((count || 0) / PAGE_SIZE));
+  const pageItems = items;
+
+  const goPage = async (url, delta) => {
+    if (url && await loadPage(url)) setPage(p => p + delta);
+  };
 
   const setAnswer = (qid, val) => {
     setAnswers(prev => ({ ...prev, [qid]: val }));
+    // แก้คำตอบแล้วผลเดิมไม่ตรงอีกต่อไป
+    setResult(prev => {
+      if (!(qid in prev)) return prev;
+      const { [qid]: _, ...rest } = prev;
+      return rest;
+    });
   };
 
-  const checkOne = async (qid, val) => {
+  const answeredIds = Object.keys(answers).filter(id => (answers[id] || []).length > 0);
+
+  const submitQuiz = async () => {
+    // ตรวจทุกข้อที่ตอบแล้ว (ทุกหน้า) ด้วย request เดียว
+    const payload = {};
+    answeredIds.forEach(id => { payload[id] = answers[id]; });
     try {
-      const r = await axios.post(`/api/quiz/questions/${qid}/check/`, { answer: val });
-      setResult(prev => ({ ...prev, [qid]: !!r.data?.correct }));
+      setSubmitting(true);
+      const r = await axios.post('/api/quiz/check/', { answers: payload });
+      const next = {};
+      (r.data?.results ?? []).forEach(x => { next[x.question_id] = !!x.correct; });
+      setResult(next);
+      setScore({ score: r.data?.score ?? 0, answered: r.data?.total ?? answeredIds.length });
+      setSubmitErr('');
     } catch {
-      setResult(prev => ({ ...prev, [qid]: false }));
+      setScore(null);
+      setSubmitErr('ส่งคำตอบไม่สำเร็จ ลองใหม่อีกครั้ง');
+    } finally {
+      setSubmitting(false);
     }
   };
 
-  const checkPage = async () => {
-    // ตรวจทุกข้อในหน้านี้
-    await Promise.all(pageItems.map(q => checkOne(q.id, answers[q.id] || [])));
-  };
-
   if (loading) return <div className="quiz-wrap"><p>กำลังโหลด...</p></div>;
   if (err) return <div className="quiz-wrap"><p style={{color:'crimson'}}>{err}</p></div>;
-  if (!all.length) return <div className="quiz-wrap"><p>ยังไม่มีคำถามในคอร์สนี้</p></div>;
+  if (!items.length) return <div className="quiz-wrap"><p>ยังไม่มีคำถามในคอร์สนี้</p></div>;
 
   return (
     <div className="quiz-wrap">
@@ -101,13 +126,19 @@ export default function QuizPage() {
         <div>หน้า {page + 1} / {totalPages}</div>
       </div>
 
+      {score && (
+        <div className="q-score">
+          ได้ {score.score} / {count || score.answered} คะแนน (ตอบ {score.answered} ข้อ)
+        </div>
+      )}
+      {submitErr && <p style={{color:'crimson'}}>{submitErr}</p>}
+
       {pageItems.map(q => (
         <div key={q.id}>
           <QuestionBlock
             q={q}
             value={answers[q.id] || []}
             onChange={(v) => setAnswer(q.id, v)}
-            onCheck={checkOne}
           />
           {q.id in result && (
             <div className={`q-result ${result[q.id] ? 'ok' : 'no'}`}>
@@ -120,18 +151,20 @@ export default function QuizPage() {
       <div className="quiz-actions">
         <button
           type="button"
-          disabled={page === 0}
-          onClick={() => setPage(p => Math.max(0, p - 1))}
+          disabled={!links.previous}
+          onClick={() => goPage(links.previous, -1)}
         >
           ← ก่อนหน้า
         </button>
 
-        <button type="button" onClick={checkPage}>ตรวจคำตอบในหน้านี้</button>
+        <button type="button" onClick={submitQuiz} disabled={submitting || !answeredIds.length}>
+          ส่งคำตอบ ({answeredIds.length}/{count || answeredIds.length})
+        </button>
 
         <button
           type="button"
-          disabled={page >= totalPages - 1}
-          onClick={() => setPage(p => Math.min(totalPages - 1, p + 1))}
+          disabled={!links.next}
+          onClick={() => goPage(links.next, +1)}
         >
           ถัดไป →
         </button>
@@ -1,7 +1,8 @@
 from django.contrib import admin, messages
-from django.utils.html import mark_safe
-from .models import Course, Lesson, LessonLink, Job, QuizQuestion
-from .youtube import fetch_youtube_duration_seconds_noapi
+from django.urls import reverse
+from django.utils.html import format_html, mark_safe
+from .models import Course, CourseStats, Lesson, LessonLink, Job, QuizQuestion, DurationFetchJob, DurationFetchTask, VideoMetadata
+from .services.duration_jobs import enqueue_duration_fetch
 # ------------ Lesson Inline ----------------
 class LessonInline(admin.TabularInline):
     model = Lesson
@@ -21,6 +22,17 @@ class CourseAdmin(admin.ModelAdmin):
     ordering = ['-created_at']
 
 
+# ------------ CourseStats (อ่านอย่างเดียว; ซ่อมด้วย rebuild_course_stats) ----------------
+@admin.register(CourseStats)
+class CourseStatsAdmin(admin.ModelAdmin):
+    list_display = ('course', 'lesson_count', 'total_duration_seconds', 'last_changed')
+    readonly_fields = ('course', 'lesson_count', 'total_duration_seconds', 'last_changed')
+    search_fields = ['course__name']
+
+    def has_add_permission(self, request):
+        return False
+
+
 # ------------ LessonLink Inline ----------------
 class LessonLinkInline(admin.TabularInline):
     model = LessonLink
@@ -31,31 +43,65 @@ class LessonLinkInline(admin.TabularInline):
 
 
 # ------------ Admin Action: ดึงเวลาจาก YouTube ----------------
+# แค่เข้าคิว แล้วให้ worker (manage.py run_duration_worker) ดึงเบื้องหลัง
 @admin.action(description="📺 ดึงเวลาวิดีโอ (yt_dlp ไม่ใช้ API)")
 def fetch_youtube_durations_action(modeladmin, request, queryset):
-    ok = fail = 0
-    for link in queryset:
-        try:
-            if (link.kind or "").lower() == "youtube" and link.url:
-                sec = fetch_youtube_duration_seconds_noapi(link.url)
-                if sec:
-                    link.mark_duration(sec)
-                    ok += 1
-                else:
-                    fail += 1
-        except Exception:
-            fail += 1
-    messages.info(request, f"✅ OK={ok}, ❌ FAIL={fail}")
+    job = enqueue_duration_fetch(queryset, user=request.user)
+    if job is None:
+        messages.warning(request, "ไม่มีลิงก์ YouTube ที่ดึงเวลาได้")
+        return
+    url = reverse("admin:courses_durationfetchjob_change", args=[job.pk])
+    messages.info(request, format_html('⏳ เข้าคิวแล้ว {} ลิงก์ — <a href="{}">ดูความคืบหน้า</a>', job.total, url))
 
 # ------------ LessonLink ----------------
 @admin.register(LessonLink)
 class LessonLinkAdmin(admin.ModelAdmin):
-    list_display = ("id", "lesson", "title", "kind", "role", "duration_seconds", "duration_fetched_at", "created_at")
+    list_display = ("id", "lesson", "title", "kind", "role", "video_id", "duration_seconds", "duration_fetched_at", "created_at")
     list_filter = ("kind", "role")
-    search_fields = ("title", "url", "lesson__title")
+    search_fields = ("title", "url", "video_id", "lesson__title")
     actions = [fetch_youtube_durations_action]
 
 
+# ------------ Duration fetch jobs (ความคืบหน้า) ----------------
+class DurationFetchTaskInline(admin.TabularInline):
+    model = DurationFetchTask
+    extra = 0
+    can_delete = False
+    fields = ("link", "status", "seconds", "attempts", "error", "finished_at")
+    readonly_fields = fields
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(DurationFetchJob)
+class DurationFetchJobAdmin(admin.ModelAdmin):
+    list_display = ("id", "status", "progress", "done_count", "failed_count", "total", "created_by", "created_at", "finished_at")
+    list_filter = ("status",)
+    readonly_fields = ("status", "progress", "total", "done_count", "failed_count", "created_by", "created_at", "started_at", "finished_at")
+    fields = readonly_fields
+    inlines = [DurationFetchTaskInline]
+
+    def has_add_permission(self, request):
+        return False
+
+    def progress(self, obj):
+        return format_html(
+            '<div style="width:140px;background:#eee;border-radius:4px">'
+            '<div style="width:{}%;background:#28a745;height:10px;border-radius:4px"></div></div>{}%',
+            obj.percent, obj.percent,
+        )
+    progress.short_description = "ความคืบหน้า"
+
+
+# ------------ Video metadata cache ----------------
+@admin.register(VideoMetadata)
+class VideoMetadataAdmin(admin.ModelAdmin):
+    list_display = ("video_id", "title", "duration_seconds", "fetched_at", "error")
+    search_fields = ("video_id", "title")
+    readonly_fields = ("video_id", "title", "duration_seconds", "thumbnail_url", "fetched_at", "error")
+
+
 # ------------ Lesson ----------------
 @admin.register(Lesson)
 class LessonAdmin(admin.ModelAdmin):
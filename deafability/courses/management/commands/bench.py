@@ -0,0 +1,146 @@
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import override_settings, setup_databases, teardown_databases
+
+from courses.services import bench
+
+SPA_SHELL_HTML = "<!doctype html><html><head><title>DeafAbility</title></head><body><div id=\"root\"></div>%s</body></html>"
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5,
+            cwd=settings.BASE_DIR,
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def _max_rss_kib():
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss // 1024 if sys.platform == "darwin" else rss  # macOS รายงานเป็น bytes
+
+
+class Command(BaseCommand):
+    help = (
+        "benchmark ทุก endpoint ด้วยแคตตาล็อกสังเคราะห์ใน test database (ไม่แตะข้อมูลจริง) "
+        "แล้วพิมพ์ผลเป็น JSON: throughput, p50/p95/p99, จำนวน query, peak memory"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--courses", type=int, default=100, help="จำนวนคอร์ส (ค่าเริ่มต้น 100)")
+        parser.add_argument("--lessons", type=int, default=10, help="บทเรียนต่อคอร์ส (10)")
+        parser.add_argument("--links", type=int, default=2, help="ลิงก์วิดีโอต่อบท (2)")
+        parser.add_argument("--jobs", type=int, default=500, help="จำนวนงาน (500)")
+        parser.add_argument("--quiz", type=int, default=10, help="คำถามต่อคอร์ส (10)")
+        parser.add_argument("--requests", type=int, default=50, help="request ที่วัดต่อ endpoint (50)")
+        parser.add_argument("--warmup", type=int, default=5, help="request อุ่นเครื่องต่อ endpoint ก่อนวัด (5)")
+        parser.add_argument("--seed", type=int, default=1, help="seed ของข้อมูลและ id ที่สุ่ม (1)")
+        parser.add_argument("--only", action="append", dest="only",
+                            help="เฉพาะ scenario ชื่อนี้ (ใส่ซ้ำได้)")
+        parser.add_argument("--output", "-o", help="เขียน JSON ลงไฟล์นี้ (ไม่ใส่ = stdout)")
+
+    def handle(self, *args, **options):
+        for name in ("courses", "lessons", "jobs", "quiz", "requests"):
+            if options[name] < 1:
+                raise CommandError(f"--{name} ต้องมากกว่า 0")
+
+        workdir = tempfile.mkdtemp(prefix="deafability-bench-")
+        spa_index = os.path.join(workdir, "index.html")
+        with open(spa_index, "w") as f:
+            f.write(SPA_SHELL_HTML % ("<script src=\"/static/js/main.js\"></script>" * 20))
+
+        # ข้อมูล / cache / ไฟล์ทั้งหมดอยู่ใน test database + โฟลเดอร์ชั่วคราว
+        overrides = override_settings(
+            DEBUG=False,
+            ALLOWED_HOSTS=["testserver"],
+            CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "bench"}},
+            MEDIA_ROOT=os.path.join(workdir, "media"),
+            SPA_INDEX_PATH=spa_index,
+        )
+        try:
+            with overrides:
+                old_config = setup_databases(verbosity=0, interactive=False)
+                try:
+                    report = self._run(options)
+                finally:
+                    teardown_databases(old_config, verbosity=0)
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+        output = json.dumps(report, ensure_ascii=False, indent=2)
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as f:
+                f.write(output + "\n")
+            self.stderr.write(self.style.SUCCESS(f"wrote {options['output']}"))
+        else:
+            self.stdout.write(output)
+
+    def _run(self, options):
+        start = time.perf_counter()
+        dataset = bench.build_catalogue(
+            courses=options["courses"], lessons=options["lessons"], links=options["links"],
+            jobs=options["jobs"], quiz=options["quiz"], seed=options["seed"],
+        )
+        load_seconds = time.perf_counter() - start
+
+        scenarios = bench.build_scenarios(dataset)
+        if options["only"]:
+            unknown = set(options["only"]) - {s.name for s in scenarios}
+            if unknown:
+                raise CommandError(f"ไม่รู้จัก scenario: {', '.join(sorted(unknown))}")
+            scenarios = [s for s in scenarios if s.name in options["only"]]
+
+        staff = Client()
+        staff.force_login(dataset["staff"])
+        clients = {"anon": Client(), "staff": staff}
+
+        endpoints, covered = {}, set()
+        total_requests, total_ms = 0, 0.0
+        run_start = time.perf_counter()
+        for scenario in scenarios:
+            self.stderr.write(f"  {scenario.name} ...", ending="\r")
+            stats, routes = bench.run_scenario(
+                scenario, clients, requests=options["requests"], warmup=options["warmup"], seed=options["seed"],
+            )
+            endpoints[scenario.name] = stats
+            covered |= routes
+            total_requests += stats["requests"]
+            total_ms += stats["latency_ms"]["mean"] * stats["requests"]
+        wall = time.perf_counter() - run_start
+
+        return {
+            "meta": {
+                "commit": _git_commit(),
+                "python": platform.python_version(),
+                "django": django.get_version(),
+                "database": connection.vendor,
+                "seed": options["seed"],
+                "requests_per_endpoint": options["requests"],
+                "warmup": options["warmup"],
+            },
+            "dataset": {**dataset["counts"], "load_seconds": round(load_seconds, 2)},
+            "endpoints": endpoints,
+            "totals": {
+                "requests": total_requests,
+                "wall_seconds": round(wall, 2),
+                # เวลาใน request เท่านั้น (ไม่รวม warmup / tracemalloc)
+                "throughput_rps": round(total_requests / (total_ms / 1000), 1) if total_ms else None,
+                "max_rss_kib": _max_rss_kib(),
+            },
+            "uncovered_routes": [] if options["only"] else bench.uncovered_routes(covered),
+        }
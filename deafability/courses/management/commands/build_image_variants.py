@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+
+from courses.models import Course, Lesson, Job
+from courses.services.images import generate_variants
+
+SOURCES = {
+    "course": (Course, "cover"),
+    "lesson": (Lesson, "cover"),
+    "job": (Job, "image"),
+}
+
+
+class Command(BaseCommand):
+    help = "สร้างรูปย่อ (WebP/JPEG ตาม IMAGE_VARIANT_WIDTHS) ให้รูปคอร์ส/บทเรียน/งานที่มีอยู่แล้ว"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--model", choices=sorted(SOURCES), action="append", dest="models",
+                            help="เฉพาะชนิดนี้ (ใส่ซ้ำได้; ค่าเริ่มต้นทั้งหมด)")
+        parser.add_argument("--force", action="store_true", help="สร้างใหม่แม้มีไฟล์อยู่แล้ว")
+
+    def handle(self, *args, **options):
+        images = written = failed = 0
+        for key in options["models"] or sorted(SOURCES):
+            model, field = SOURCES[key]
+            names = (model.objects.exclude(**{field: ""}).exclude(**{f"{field}__isnull": True})
+                     .order_by().values_list(field, flat=True).distinct())
+            for name in names:
+                images += 1
+                try:
+                    written += len(generate_variants(name, force=options["force"]))
+                except Exception as e:
+                    failed += 1
+                    self.stderr.write(f"{key} {name}: {e}")
+        self.stdout.write(self.style.SUCCESS(
+            f"{images} image(s), {written} variant file(s) written, {failed} failed"
+        ))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from courses.services.course_stats import rebuild_course_stats
+
+
+class Command(BaseCommand):
+    help = "คำนวณตาราง CourseStats ใหม่จาก Lesson/LessonLink (ใช้ซ่อมค่าที่เพี้ยน)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--course", type=int, action="append", dest="courses",
+                            help="เฉพาะ course id นี้ (ใส่ซ้ำได้)")
+
+    def handle(self, *args, **options):
+        count = rebuild_course_stats(options["courses"])
+        self.stdout.write(self.style.SUCCESS(f"rebuilt stats for {count} course(s)"))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from courses.services.job_search import rebuild_job_search
+
+
+class Command(BaseCommand):
+    help = "สร้างดัชนีค้นหางาน (JobSearchDocument / FTS) ใหม่ทั้งหมด (ใช้ซ่อมหลัง import ข้อมูลแบบไม่ผ่าน signals)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--job", type=int, action="append", dest="jobs",
+                            help="เฉพาะ job id นี้ (ใส่ซ้ำได้)")
+
+    def handle(self, *args, **options):
+        count = rebuild_job_search(options["jobs"])
+        self.stdout.write(self.style.SUCCESS(f"indexed {count} job(s)"))
@@ -0,0 +1,59 @@
+import json
+import re
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime, parse_date
+
+from courses.services.duration_jobs import get_concurrency
+from courses.services.lessonlink_duration import refresh_durations, stale_links
+
+
+def parse_since(value):
+    """'7d' / '12h' / '30m' (ย้อนหลังจากตอนนี้) หรือวันที่/เวลาแบบ ISO"""
+    m = re.fullmatch(r"(\d+)([dhm])", value.strip())
+    if m:
+        n, unit = int(m.group(1)), m.group(2)
+        delta = {"d": timedelta(days=n), "h": timedelta(hours=n), "m": timedelta(minutes=n)}[unit]
+        return timezone.now() - delta
+    dt = parse_datetime(value)
+    if dt is None:
+        d = parse_date(value)
+        if d is None:
+            raise CommandError(f"--since ไม่ถูกต้อง: {value!r} (ใช้ 7d, 12h, 30m หรือ YYYY-MM-DD)")
+        dt = timezone.datetime(d.year, d.month, d.day)
+    if timezone.is_naive(dt):
+        dt = timezone.make_aware(dt)
+    return dt
+
+
+class Command(BaseCommand):
+    help = (
+        "ดึง duration ของ LessonLink (youtube) ที่ยังไม่มี หรือเก่ากว่า --since แบบ bulk "
+        "(พร้อมกัน + จำกัดอัตรา + retry) แล้วรายงาน throughput เป็น JSON"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--since", help="ดึงใหม่ถ้า duration_fetched_at เก่ากว่านี้ (เช่น 7d, 12h, 2025-10-01)")
+        parser.add_argument("--course", type=int, help="เฉพาะ course id นี้")
+        parser.add_argument("--dry-run", action="store_true", help="นับลิงก์/วิดีโอที่จะดึง ไม่ดึงจริง")
+        parser.add_argument("--force", action="store_true", help="ไม่ใช้ cache VideoMetadata")
+        parser.add_argument("--concurrency", type=int, default=None)
+        parser.add_argument("--rate", type=float, default=2.0, help="จำนวน request ต่อวินาทีสูงสุด")
+        parser.add_argument("--retries", type=int, default=2)
+        parser.add_argument("--batch-size", type=int, default=200, help="ขนาดชุดของ bulk_update")
+
+    def handle(self, *args, **options):
+        since = parse_since(options["since"]) if options["since"] else None
+        links = stale_links(since=since, course_id=options["course"])
+        stats = refresh_durations(
+            links.iterator(chunk_size=500),
+            concurrency=options["concurrency"] or get_concurrency(),
+            rate=options["rate"],
+            retries=options["retries"],
+            batch_size=options["batch_size"],
+            dry_run=options["dry_run"],
+            force=options["force"],
+        )
+        self.stdout.write(json.dumps(stats, ensure_ascii=False))
@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from courses.services.duration_jobs import get_concurrency, has_pending, process_batch, requeue_stale
+
+
+class Command(BaseCommand):
+    help = "worker ดึงความยาววิดีโอ YouTube จากคิว DurationFetchTask (รันค้างไว้ หรือ --once)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="ทำจนคิวว่างแล้วจบ")
+        parser.add_argument("--concurrency", type=int, default=None,
+                            help="จำนวน extraction พร้อมกัน (ค่าเริ่มต้น DURATION_FETCH_CONCURRENCY)")
+        parser.add_argument("--batch", type=int, default=None, help="จำนวน task ที่จองต่อรอบ")
+        parser.add_argument("--sleep", type=float, default=2.0, help="วินาทีที่รอเมื่อคิวว่าง")
+        parser.add_argument("--stale-after", type=int, default=600,
+                            help="task ที่ running นานเกินนี้ (วินาที) ถือว่า worker ตาย แล้วคืนเข้าคิว")
+
+    def handle(self, *args, **options):
+        concurrency = options["concurrency"] or get_concurrency()
+        self.stdout.write(f"duration worker started (concurrency={concurrency})")
+        while True:
+            requeue_stale(options["stale_after"])
+            ok, failed = process_batch(max_workers=concurrency, limit=options["batch"])
+            if ok or failed:
+                self.stdout.write(f"✅ OK={ok}, ❌ FAIL={failed}")
+                continue
+            if options["once"] and not has_pending():
+                break
+            time.sleep(options["sleep"])
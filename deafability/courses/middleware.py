@@ -0,0 +1,74 @@
+# courses/middleware.py
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from .services import metrics, perf
+
+
+class PerfMiddleware:
+    """
+    วัด query (จำนวน/เวลา), serializer และเวลารวมของทุก request แล้วเก็บเข้า /api/_perf/
+    ใส่ header Server-Timing + X-DB-Queries ตาม settings.PERF_HEADERS:
+      "all"   ทุก request
+      "staff" เฉพาะผู้ใช้ staff (ค่าเริ่มต้น) — ดูเฉพาะ user ที่ request นี้ resolve ไปแล้ว
+              ไม่แตะ request.user เอง (ไม่งั้นต้องโหลด session ทุก request → Vary: Cookie + 2 query)
+      "off"   ไม่ใส่ (ยังเก็บสถิติอยู่)
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.headers_mode = getattr(settings, "PERF_HEADERS", "staff")
+
+    def __call__(self, request):
+        timings, token = perf.start_request()
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for conn in connections.all():
+                    stack.enter_context(conn.execute_wrapper(timings.db_wrapper))
+                response = self.get_response(request)
+        finally:
+            perf.end_request(token)
+        total = time.perf_counter() - start
+
+        perf.summary.record(self._endpoint(request), response.status_code, total, timings)
+        if self._show_headers(request):
+            response["Server-Timing"] = perf.server_timing_header(timings, total)
+            response["X-DB-Queries"] = str(timings.queries)
+        return response
+
+    @staticmethod
+    def _endpoint(request):
+        match = getattr(request, "resolver_match", None)
+        if match is None:
+            return "unresolved"
+        return f"{request.method} /{match.route}" if match.route else match.view_name
+
+    def _show_headers(self, request):
+        if self.headers_mode == "all":
+            return True
+        if self.headers_mode == "staff":
+            # _cached_user = user จาก session ที่ AuthenticationMiddleware โหลดแล้ว (ไม่ใช่ค่าที่ DRF แทนใน
+            # view ที่ปิด authentication) — view ที่ไม่ได้ใช้ user จะไม่มี จึงไม่ได้ header
+            user = request.__dict__.get("_cached_user")
+            return bool(user is not None and user.is_authenticated and user.is_staff)
+        return False
+
+
+class MetricsMiddleware:
+    """
+    นับ request / 5xx และเก็บ histogram เวลา + ขนาด response ต่อ route สำหรับ /metrics
+    วางไว้นอกสุดเพื่อให้เวลารวม middleware อื่นด้วย
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        start = time.perf_counter()
+        response = self.get_response(request)
+        metrics.observe(request, response, time.perf_counter() - start)
+        return response
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:31
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def backfill_course_stats(apps, schema_editor):
+    Course = apps.get_model('courses', 'Course')
+    CourseStats = apps.get_model('courses', 'CourseStats')
+    rows = []
+    for course in Course.objects.prefetch_related('lessons__links'):
+        lessons = list(course.lessons.all())
+        total = 0
+        for lesson in lessons:
+            links = [lk for lk in lesson.links.all() if (lk.kind or '').lower() == 'youtube']
+            main = next((lk for lk in sorted(links, key=lambda lk: lk.id)
+                         if (lk.role or '').lower().startswith('main')), None)
+            if main and main.duration_seconds:
+                total += main.duration_seconds
+            else:
+                total += sum(lk.duration_seconds for lk in links if (lk.duration_seconds or 0) > 0)
+        rows.append(CourseStats(course=course, lesson_count=len(lessons), total_duration_seconds=total))
+    CourseStats.objects.bulk_create(rows, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0015_lessonlink_duration_fetched_at_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CourseStats',
+            fields=[
+                ('course', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='courses.course', verbose_name='คอร์ส')),
+                ('lesson_count', models.IntegerField(default=0, verbose_name='จำนวนบทเรียน')),
+                ('total_duration_seconds', models.IntegerField(default=0, verbose_name='ความยาววิดีโอรวม (วินาที)')),
+                ('last_changed', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'verbose_name': 'สถิติคอร์ส',
+                'verbose_name_plural': 'สถิติคอร์ส',
+            },
+        ),
+        migrations.RunPython(backfill_course_stats, migrations.RunPython.noop),
+    ]
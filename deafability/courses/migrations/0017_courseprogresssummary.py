@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:33
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_progress_summary(apps, schema_editor):
+    LessonProgress = apps.get_model('courses', 'LessonProgress')
+    CourseProgressSummary = apps.get_model('courses', 'CourseProgressSummary')
+    rows = (LessonProgress.objects
+            .filter(completed=True)
+            .values('user_id', 'course_id')
+            .annotate(n=models.Count('id')))
+    CourseProgressSummary.objects.bulk_create(
+        [CourseProgressSummary(user_id=r['user_id'], course_id=r['course_id'], completed_count=r['n']) for r in rows],
+        ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0016_coursestats'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CourseProgressSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('completed_count', models.IntegerField(default=0)),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='progress_summaries', to='courses.course')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='course_progress_summaries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'unique_together': {('user', 'course')},
+            },
+        ),
+        migrations.RunPython(backfill_progress_summary, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:36
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0018_durationfetchjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VideoMetadata',
+            fields=[
+                ('video_id', models.CharField(max_length=32, primary_key=True, serialize=False)),
+                ('title', models.CharField(blank=True, default='', max_length=300)),
+                ('duration_seconds', models.PositiveIntegerField(blank=True, null=True)),
+                ('thumbnail_url', models.URLField(blank=True, default='', max_length=500)),
+                ('fetched_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('error', models.TextField(blank=True, default='')),
+            ],
+            options={
+                'verbose_name': 'ข้อมูลวิดีโอ',
+                'verbose_name_plural': 'ข้อมูลวิดีโอ',
+            },
+        ),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:38
+
+from urllib.parse import parse_qs, urlparse
+
+from django.db import migrations, models
+
+
+# สำเนาจาก courses/youtube.py ณ ตอนสร้าง migration นี้ — ห้าม import โค้ดปัจจุบัน
+def extract_youtube_id(u):
+    try:
+        p = urlparse(u)
+        host = (p.hostname or '').lower()
+        vid = None
+        if host == 'youtu.be':
+            vid = p.path.lstrip('/').split('/')[0]
+        elif host.endswith('youtube.com') or host.endswith('youtube-nocookie.com'):
+            if p.path == '/watch':
+                vid = parse_qs(p.query).get('v', [None])[0]
+            elif p.path.startswith('/shorts/') or p.path.startswith('/embed/'):
+                parts = p.path.split('/')
+                vid = parts[2] if len(parts) > 2 else None
+        return vid or None
+    except Exception:
+        return None
+
+
+def youtube_embed_url(video_id):
+    return f'https://www.youtube-nocookie.com/embed/{video_id}'
+
+
+def backfill_video_fields(apps, schema_editor):
+    # historical model ไม่มี save() ของเรา → คำนวณเหมือน LessonLink.sync_video_fields
+    LessonLink = apps.get_model('courses', 'LessonLink')
+    changed = []
+    for link in LessonLink.objects.filter(kind__iexact='youtube').exclude(url='').only('id', 'url'):
+        vid = extract_youtube_id(link.url)
+        if vid:
+            link.video_id = vid
+            link.embed_url = youtube_embed_url(vid)
+            changed.append(link)
+    LessonLink.objects.bulk_update(changed, ['video_id', 'embed_url'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0019_videometadata'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lessonlink',
+            name='embed_url',
+            field=models.URLField(blank=True, default='', editable=False),
+        ),
+        migrations.AddField(
+            model_name='lessonlink',
+            name='video_id',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=32),
+        ),
+        migrations.RunPython(backfill_video_fields, migrations.RunPython.noop),
+    ]
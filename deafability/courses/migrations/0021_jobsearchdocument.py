@@ -0,0 +1,98 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:40
+
+import re
+import unicodedata
+
+import django.db.models.deletion
+from django.db import OperationalError, migrations, models
+
+# สำเนาจาก courses/services/job_search.py ณ ตอนสร้าง migration นี้ — ห้าม import โค้ดปัจจุบัน
+# (แก้ helper ทีหลังจะเปลี่ยนสิ่งที่ migration เก่าทำไปด้วย)
+FTS_TABLE = 'courses_jobsearch_fts'
+_DOCUMENT_FIELDS = ('title', 'company', 'position_type', 'location', 'description')
+_ZERO_WIDTH = re.compile('[\u200b\u200c\u200d\u2060\ufeff]')
+_SPACES = re.compile(r'\s+')
+
+
+def normalize_text(text):
+    text = _ZERO_WIDTH.sub('', unicodedata.normalize('NFKC', text or ''))
+    return _SPACES.sub(' ', text.casefold()).strip()
+
+
+def build_document(row, course_names=()):
+    parts = [row.get(k) for k in _DOCUMENT_FIELDS] + list(course_names)
+    return normalize_text(' '.join(p for p in parts if p))
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    fts = False
+    if vendor == 'sqlite':
+        try:
+            schema_editor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(document, tokenize='trigram')"
+            )
+            fts = True
+        except OperationalError:
+            # SQLite < 3.34 ไม่มี trigram tokenizer → ค้นด้วย LIKE บน courses_jobsearchdocument แทน
+            pass
+    elif vendor == 'postgresql':
+        schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        schema_editor.execute(
+            "CREATE INDEX IF NOT EXISTS courses_jobsearch_trgm "
+            "ON courses_jobsearchdocument USING gin (document gin_trgm_ops)"
+        )
+        schema_editor.execute(
+            "CREATE INDEX IF NOT EXISTS courses_jobsearch_tsv "
+            "ON courses_jobsearchdocument USING gin (to_tsvector('simple', document))"
+        )
+
+    # backfill เอกสารของงานที่มีอยู่
+    Job = apps.get_model('courses', 'Job')
+    JobSearchDocument = apps.get_model('courses', 'JobSearchDocument')
+    names = {}
+    for job_id, name in Job.courses.through.objects.order_by('course__name').values_list('job_id', 'course__name'):
+        names.setdefault(job_id, []).append(name)
+    docs = [
+        JobSearchDocument(job_id=row['id'], document=build_document(row, names.get(row['id'], [])))
+        for row in Job.objects.values('id', *_DOCUMENT_FIELDS)
+    ]
+    JobSearchDocument.objects.bulk_create(docs, batch_size=500)
+    if fts and docs:
+        with schema_editor.connection.cursor() as cur:
+            cur.executemany(
+                f"INSERT INTO {FTS_TABLE}(rowid, document) VALUES (%s, %s)",
+                [(d.job_id, d.document) for d in docs],
+            )
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+    elif vendor == 'postgresql':
+        schema_editor.execute("DROP INDEX IF EXISTS courses_jobsearch_trgm")
+        schema_editor.execute("DROP INDEX IF EXISTS courses_jobsearch_tsv")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0020_lessonlink_video_id'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobSearchDocument',
+            fields=[
+                ('job', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search_document', serialize=False, to='courses.job', verbose_name='งาน')),
+                ('document', models.TextField(blank=True, default='')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'ดัชนีค้นหางาน',
+                'verbose_name_plural': 'ดัชนีค้นหางาน',
+            },
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
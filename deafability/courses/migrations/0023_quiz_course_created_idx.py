@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0022_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='quizquestion',
+            index=models.Index(fields=['course', '-created_at', '-id'], name='quiz_course_created_idx'),
+        ),
+    ]
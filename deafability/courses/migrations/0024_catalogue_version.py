@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:20
+
+import time
+
+from django.db import migrations, models
+
+
+def create_version_row(apps, schema_editor):
+    # เริ่มจากเวลาปัจจุบัน ไม่ชน key เก่าที่อาจค้างใน cache
+    CatalogueVersion = apps.get_model('courses', 'CatalogueVersion')
+    CatalogueVersion.objects.get_or_create(pk=1, defaults={'version': int(time.time() * 1000)})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0023_quiz_course_created_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CatalogueVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.BigIntegerField(default=1)),
+            ],
+            options={
+                'verbose_name': 'เวอร์ชันแคตตาล็อก',
+                'verbose_name_plural': 'เวอร์ชันแคตตาล็อก',
+            },
+        ),
+        migrations.RunPython(create_version_row, migrations.RunPython.noop),
+    ]
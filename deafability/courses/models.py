@@ -3,6 +3,8 @@ from django.db import models
 from django.conf import settings
 from django.db.models import JSONField      
 from django.utils import timezone
+
+from .youtube import extract_youtube_id, youtube_embed_url
 class Course(models.Model):
     name = models.CharField(max_length=200, verbose_name="ชื่อคอร์ส")
     level = models.CharField(max_length=100, verbose_name="ระดับ")
@@ -16,6 +18,7 @@ class Course(models.Model):
         verbose_name = "คอร์ส"
         verbose_name_plural = "คอร์ส"
         ordering = ['-created_at']
+        indexes = [models.Index(fields=['-created_at', '-id'], name='course_created_id_idx')]  # keyset pagination
     def __str__(self): return self.name
 
 class Lesson(models.Model):
@@ -37,6 +40,41 @@ class Lesson(models.Model):
     def __str__(self): return f"{self.course.name} - {self.title}"
 
 
+class CourseStats(models.Model):
+    """
+    ค่าสรุปต่อคอร์ส (denormalized) — อัปเดตแบบ incremental ผ่าน signals
+    ซ่อมได้ด้วย `python manage.py rebuild_course_stats`
+    """
+    course = models.OneToOneField(
+        Course, on_delete=models.CASCADE, primary_key=True, related_name='stats', verbose_name="คอร์ส"
+    )
+    lesson_count = models.IntegerField(default=0, verbose_name="จำนวนบทเรียน")
+    total_duration_seconds = models.IntegerField(default=0, verbose_name="ความยาววิดีโอรวม (วินาที)")
+    last_changed = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        verbose_name = "สถิติคอร์ส"
+        verbose_name_plural = "สถิติคอร์ส"
+
+    def __str__(self):
+        return f"{self.course_id}: {self.lesson_count} lessons / {self.total_duration_seconds}s"
+
+
+class CatalogueVersion(models.Model):
+    """
+    เลขเวอร์ชันแคตตาล็อก (แถวเดียว pk=1) — ส่วนหนึ่งของ key ใน services/catalogue_cache.py และ ETag
+    เก็บใน DB เพื่อให้ทุก process เห็นค่าเดียวกัน (web / worker / cron อยู่คนละเครื่องได้)
+    """
+    version = models.BigIntegerField(default=1)
+
+    class Meta:
+        verbose_name = "เวอร์ชันแคตตาล็อก"
+        verbose_name_plural = "เวอร์ชันแคตตาล็อก"
+
+    def __str__(self):
+        return f"v{self.version}"
+
+
 class LessonProgress(models.Model):
     user   = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='lesson_progress')
     course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='lesson_progress')
@@ -53,6 +91,21 @@ class LessonProgress(models.Model):
     def __str__(self):
         return f'{self.user} / {self.course} / {self.lesson} / {"done" if self.completed else "pending"}'
 
+class CourseProgressSummary(models.Model):
+    """
+    จำนวนบทเรียนที่ user เรียนจบในคอร์ส (denormalized จาก LessonProgress)
+    เพิ่มด้วย F() ตอนบทเรียนเปลี่ยนเป็น completed และลดลงเมื่อ LessonProgress ที่ completed ถูกลบ
+    """
+    user   = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='course_progress_summaries')
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='progress_summaries')
+    completed_count = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ('user', 'course')  # 1 user ต่อ 1 course
+
+    def __str__(self):
+        return f'{self.user} / {self.course} / {self.completed_count}'
+
 class LessonLink(models.Model):
     KIND_CHOICES = [
         ("youtube", "YouTube"),
@@ -74,16 +127,136 @@ class LessonLink(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     duration_seconds = models.PositiveIntegerField(null=True, blank=True)
     duration_fetched_at = models.DateTimeField(null=True, blank=True)
+    # คำนวณจาก url ตอน save() — ไม่ต้อง parse ทุกครั้งที่ serialize และใช้ join กับ VideoMetadata ได้
+    video_id = models.CharField(max_length=32, blank=True, default="", db_index=True, editable=False)
+    embed_url = models.URLField(blank=True, default="", editable=False)
+
+    def sync_video_fields(self):
+        vid = None
+        if (self.kind or "").lower() == "youtube" and self.url:
+            vid = extract_youtube_id(self.url)
+        self.video_id = vid or ""
+        self.embed_url = youtube_embed_url(vid) if vid else ""
 
-    def mark_duration(self, seconds: int | None):
+    def save(self, *args, **kwargs):
+        self.sync_video_fields()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and {"url", "kind"} & set(update_fields):
+            kwargs["update_fields"] = {*update_fields, "video_id", "embed_url"}
+        super().save(*args, **kwargs)
+
+    def mark_duration(self, seconds: int | None, remember: bool = False):
+        """
+        เก็บ duration ลงลิงก์; remember=True เฉพาะเมื่อค่ามาจากนอก VideoMetadata (เช่นกรอกเอง)
+        ค่าที่อ่านมาจาก cache ห้ามเขียนกลับ ไม่งั้น fetched_at ถูกเลื่อนทุกครั้งที่อ่าน และไม่หมดอายุเลย
+        """
+        from .services.video_metadata import remember_duration
         self.duration_seconds = seconds
         self.duration_fetched_at = timezone.now()
         self.save(update_fields=["duration_seconds", "duration_fetched_at"])
+        if remember and self.video_id:
+            remember_duration(self.video_id, seconds)
+
+    def refresh_duration(self, extractor=None, force=False) -> bool:
+        """ดึง duration ผ่าน cache VideoMetadata (วิดีโอเดียวกันไม่ดึงซ้ำภายใน TTL)"""
+        from .services.video_metadata import get_video_metadata, link_video_id
+        video_id = link_video_id(self)
+        if not video_id:
+            return False
+        meta = get_video_metadata(video_id=video_id, extractor=extractor, force=force)
+        if meta is None or not meta.ok:
+            return False
+        self.mark_duration(meta.duration_seconds)
+        return True
     def __str__(self):
         return f"{self.lesson.title} - {self.title} ({self.get_role_display()})"
 
 
 
+class VideoMetadata(models.Model):
+    """
+    cache ข้อมูลวิดีโอ YouTube ต่อ video id (ใช้ร่วมกันทุก LessonLink / Course.video_url ที่ชี้วิดีโอเดียวกัน)
+    error ไม่ว่าง = ดึงไม่สำเร็จ (negative cache) จะหมดอายุเร็วกว่า
+    """
+    video_id = models.CharField(max_length=32, primary_key=True)
+    title = models.CharField(max_length=300, blank=True, default="")
+    duration_seconds = models.PositiveIntegerField(null=True, blank=True)
+    thumbnail_url = models.URLField(max_length=500, blank=True, default="")
+    fetched_at = models.DateTimeField(default=timezone.now)
+    error = models.TextField(blank=True, default="")
+
+    class Meta:
+        verbose_name = "ข้อมูลวิดีโอ"
+        verbose_name_plural = "ข้อมูลวิดีโอ"
+
+    @property
+    def ok(self):
+        return not self.error
+
+    def __str__(self):
+        return f"{self.video_id} ({self.duration_seconds or '-'}s)"
+
+
+class DurationFetchJob(models.Model):
+    """ชุดงานดึงความยาววิดีโอที่แอดมินสั่งจากหน้า LessonLink (worker ทำงานเบื้องหลัง)"""
+    STATUS_CHOICES = [
+        ("pending", "Pending"),
+        ("running", "Running"),
+        ("done", "Done"),
+    ]
+
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default="pending")
+    total = models.PositiveIntegerField(default=0)
+    done_count = models.PositiveIntegerField(default=0)
+    failed_count = models.PositiveIntegerField(default=0)
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name="+"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "งานดึงเวลาวิดีโอ"
+        verbose_name_plural = "งานดึงเวลาวิดีโอ"
+        ordering = ["-created_at"]
+
+    @property
+    def percent(self):
+        return round((self.done_count + self.failed_count) / self.total * 100.0, 1) if self.total else 100.0
+
+    def __str__(self):
+        return f"#{self.pk} {self.done_count + self.failed_count}/{self.total} ({self.get_status_display()})"
+
+
+class DurationFetchTask(models.Model):
+    STATUS_CHOICES = [
+        ("pending", "Pending"),
+        ("running", "Running"),
+        ("done", "Done"),
+        ("failed", "Failed"),
+    ]
+
+    job = models.ForeignKey(DurationFetchJob, on_delete=models.CASCADE, related_name="tasks")
+    link = models.ForeignKey(LessonLink, on_delete=models.CASCADE, related_name="duration_tasks")
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default="pending")
+    worker = models.CharField(max_length=64, blank=True, default="")
+    attempts = models.PositiveIntegerField(default=0)
+    seconds = models.PositiveIntegerField(null=True, blank=True)
+    error = models.TextField(blank=True, default="")
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["id"]
+        indexes = [
+            models.Index(fields=["status", "id"]),
+        ]
+
+    def __str__(self):
+        return f"{self.link} ({self.get_status_display()})"
+
+
 class Job(models.Model):
     title = models.CharField(max_length=200, verbose_name="ชื่องาน")
     description = models.TextField(blank=True, verbose_name="รายละเอียดงาน")
@@ -109,11 +282,32 @@ class Job(models.Model):
         verbose_name = "งาน"
         verbose_name_plural = "งาน"
         ordering = ["-created_at"]
+        indexes = [models.Index(fields=["-created_at", "-id"], name="job_created_id_idx")]  # keyset pagination
 
     def __str__(self):
         return self.title
 
 
+class JobSearchDocument(models.Model):
+    """
+    ข้อความค้นหาของงาน (ชื่อ/บริษัท/ตำแหน่ง/สถานที่/รายละเอียด + ชื่อคอร์สที่เกี่ยวข้อง) ที่ normalize แล้ว
+    sync ผ่าน signals — ดู courses/services/job_search.py
+    ซ่อมได้ด้วย `python manage.py rebuild_job_search`
+    """
+    job = models.OneToOneField(
+        Job, on_delete=models.CASCADE, primary_key=True, related_name="search_document", verbose_name="งาน"
+    )
+    document = models.TextField(blank=True, default="")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "ดัชนีค้นหางาน"
+        verbose_name_plural = "ดัชนีค้นหางาน"
+
+    def __str__(self):
+        return f"{self.job_id}: {self.document[:50]}"
+
+
 
 class QuizQuestion(models.Model):
     course = models.ForeignKey(
@@ -127,5 +321,11 @@ class QuizQuestion(models.Model):
     correct_order = models.JSONField(default=list, verbose_name="ลำดับที่ถูกต้อง")
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["-created_at", "-id"], name="quiz_created_id_idx"),  # keyset pagination
+            models.Index(fields=["course", "-created_at", "-id"], name="quiz_course_created_idx"),  # ?course=
+        ]
+
     def __str__(self):
         return f"{self.course.name} - {self.prompt[:40]}"
\ No newline at end of file
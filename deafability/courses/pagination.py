@@ -0,0 +1,152 @@
+# courses/pagination.py
+"""
+Keyset (cursor) pagination บน (-created_at, -id)
+
+ต่างจาก PageNumberPagination ตรงที่ไม่ใช้ OFFSET และไม่ COUNT(*) ทุกหน้า:
+  หน้าถัดไป = WHERE (created_at, id) < (ค่าของแถวสุดท้าย) ORDER BY created_at DESC, id DESC LIMIT n+1
+จึงใช้ index (created_at, id) ได้ตรง ๆ หน้าลึกแค่ไหนก็ราคาเท่าหน้าแรก
+
+  ?cursor=<token>     ได้มาจาก next / previous ของหน้าก่อน
+  ?page_size=<n>      (สูงสุด max_page_size)
+  ?count=1            ใส่ count ทั้งหมดในผลลัพธ์ด้วย (ค่าเริ่มต้นไม่นับ)
+
+ผลลัพธ์ {next, previous, results} (+ count) — หน้าเว็บเดิมที่อ่าน results/next ใช้ต่อได้เลย
+ใช้ได้ทั้ง queryset ของ model และ .values()
+"""
+import base64
+import json
+from functools import reduce
+from operator import or_
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, _positive_int
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    ordering = ("-created_at", "-id")  # ต้องเป็น desc ทั้งหมด และ field สุดท้าย unique
+    page_size = api_settings.PAGE_SIZE or 12
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    cursor_query_param = "cursor"
+    count_query_param = "count"
+    invalid_cursor_message = "Invalid cursor"
+
+    # ---- cursor ----
+    def encode_cursor(self, position, reverse=False):
+        raw = json.dumps({"p": position, "r": int(reverse)}, default=str, separators=(",", ":"))
+        token = base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+        return replace_query_param(self.base_url, self.cursor_query_param, token)
+
+    def decode_cursor(self, request):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None, False
+        try:
+            raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)).decode("utf-8")
+            data = json.loads(raw)
+            position, reverse = data["p"], bool(data.get("r"))
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(position, list) or len(position) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return position, reverse
+
+    def parse_position(self, position, model):
+        """แปลงค่าใน cursor ด้วย to_python() ของ field (cursor ถูกแก้มาได้ — ค่าเพี้ยน → 404 ไม่ใช่ 500)"""
+        try:
+            values = [model._meta.get_field(f).to_python(v) for f, v in zip(self.fields, position)]
+        except (TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        if any(v is None for v in values):
+            raise NotFound(self.invalid_cursor_message)
+        return values
+
+    # ---- helpers ----
+    @property
+    def fields(self):
+        return [f.lstrip("-") for f in self.ordering]
+
+    def get_page_size(self, request):
+        try:
+            return _positive_int(request.query_params[self.page_size_query_param],
+                                 strict=True, cutoff=self.max_page_size)
+        except (KeyError, ValueError):
+            return self.page_size
+
+    def wants_count(self, request):
+        return request.query_params.get(self.count_query_param) in ("1", "true", "yes")
+
+    def _after(self, position, lookup):
+        # (a, b) < (x, y)  ≡  a < x OR (a = x AND b < y)
+        conds = []
+        for i, field in enumerate(self.fields):
+            eq = {self.fields[j]: position[j] for j in range(i)}
+            conds.append(Q(**eq, **{f"{field}__{lookup}": position[i]}))
+        return reduce(or_, conds)
+
+    def _position(self, row):
+        get = row.get if isinstance(row, dict) else (lambda f: getattr(row, f))
+        return [get(f) for f in self.fields]
+
+    # ---- BasePagination ----
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        position, reverse = self.decode_cursor(request)
+        if position is not None:
+            position = self.parse_position(position, queryset.model)
+        self.count = queryset.count() if self.wants_count(request) else None
+
+        if position is None:
+            qs = queryset.order_by(*self.ordering)
+        elif reverse:
+            qs = queryset.filter(self._after(position, "gt")).order_by(*self.fields)
+        else:
+            qs = queryset.filter(self._after(position, "lt")).order_by(*self.ordering)
+
+        rows = list(qs[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+        self.page = rows
+        return rows
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self._position(self.page[-1]))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self._position(self.page[0]), reverse=True)
+
+    def get_paginated_response(self, data):
+        body = {"next": self.get_next_link(), "previous": self.get_previous_link(), "results": data}
+        if self.count is not None:
+            body = {"count": self.count, **body}
+        return Response(body)
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "count": {"type": "integer"},
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
@@ -1,7 +1,12 @@
 from rest_framework import serializers
+from django.core.files.storage import default_storage
 from .models import Course, Lesson, LessonLink, LessonProgress , Job ,QuizQuestion
-from urllib.parse import urlparse, parse_qs
-import random
+from .services.durations import lesson_duration_from_links, course_duration_from_lessons
+from .services.lesson_sequence import assign_lesson_sequence, ensure_lesson_sequence
+from .services.images import variant_srcset
+from .youtube import extract_youtube_id, youtube_embed_url
+
+_MISSING = object()
 
 class QuizQuestionSerializer(serializers.ModelSerializer):
     course_name = serializers.CharField(source="course.name", read_only=True)
@@ -9,27 +14,45 @@ class QuizQuestionSerializer(serializers.ModelSerializer):
     class Meta:
         model = QuizQuestion
         fields = ["id", "prompt", "words", "correct_order", "course", "course_name", "created_at"]
+
+    def __init__(self, *args, fields=None, **kwargs):
+        # fields=[...] → ส่งเฉพาะฟิลด์ที่ขอ (เช่นไม่ส่ง correct_order)
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
 class QuizCheckSerializer(serializers.Serializer):
     answer = serializers.ListField(
         child=serializers.CharField(), allow_empty=False, help_text="ลิสต์คำที่ผู้ใช้เรียง"
     )
 
 
+class QuizBatchCheckSerializer(serializers.Serializer):
+    MAX_QUESTIONS = 100
+    answers = serializers.DictField(
+        child=serializers.ListField(child=serializers.CharField(), allow_empty=True),
+        allow_empty=False,
+        help_text="{question_id: ลิสต์คำที่ผู้ใช้เรียง}",
+    )
+
+    def validate_answers(self, value):
+        if len(value) > self.MAX_QUESTIONS:
+            raise serializers.ValidationError(f"ตรวจได้ครั้งละไม่เกิน {self.MAX_QUESTIONS} ข้อ")
+        try:
+            return {int(k): v for k, v in value.items()}
+        except (TypeError, ValueError):
+            raise serializers.ValidationError("question_id ต้องเป็นตัวเลข")
+
+
+def image_srcset(context, name):
+    """srcset ของรูปย่อ {webp, jpg} (URL เต็มถ้ามี request)"""
+    request = context.get("request")
+    return variant_srcset(name, request.build_absolute_uri if request else None)
+
+
 def youtube_embed(u: str):
-    try:
-        p = urlparse(u); host = (p.hostname or "").lower()
-        vid = None
-        if host == "youtu.be":
-            vid = p.path.lstrip("/")
-        elif host.endswith("youtube.com"):
-            if p.path == "/watch":
-                vid = parse_qs(p.query).get("v", [None])[0]
-            elif p.path.startswith("/shorts/") or p.path.startswith("/embed/"):
-                parts = p.path.split("/")
-                vid = parts[2] if len(parts) > 2 else None
-        return f"https://www.youtube-nocookie.com/embed/{vid}" if vid else None
-    except Exception:
-        return None
+    vid = extract_youtube_id(u)
+    return youtube_embed_url(vid) if vid else None
 
 class LessonLinkSerializer(serializers.ModelSerializer):
     href = serializers.SerializerMethodField()
@@ -37,7 +60,7 @@ class LessonLinkSerializer(serializers.ModelSerializer):
     duration_seconds = serializers.IntegerField(read_only=True)  
     class Meta:
         model = LessonLink
-        fields = ['id', 'title', 'kind','role', 'href', 'embed_url', 'duration_seconds', 'created_at']
+        fields = ['id', 'title', 'kind','role', 'href', 'video_id', 'embed_url', 'duration_seconds', 'created_at']
     def get_href(self, obj):
         request = self.context.get("request")
         if obj.kind == "file" and obj.file:
@@ -46,7 +69,8 @@ class LessonLinkSerializer(serializers.ModelSerializer):
 
     def get_embed_url(self, obj):
         if obj.kind == "youtube" and obj.url:
-            return youtube_embed(obj.url)
+            # ใช้ค่าที่คำนวณไว้ตอน save() (แถวที่ยังไม่ถูก save ใหม่ค่อย parse)
+            return obj.embed_url or youtube_embed(obj.url)
         return None
     
 class CourseProgressSerializer(serializers.Serializer):
@@ -55,38 +79,41 @@ class CourseProgressSerializer(serializers.Serializer):
     completed_lessons = serializers.IntegerField()
     percent = serializers.FloatField()
 
+class LessonListSerializer(serializers.ListSerializer):
+    def to_representation(self, data):
+        # คำนวณ prev/next/last ครั้งเดียวจาก lessons ที่ prefetch มา (ไม่ query ต่อบท)
+        iterable = data.all() if hasattr(data, 'all') else data
+        return super().to_representation(assign_lesson_sequence(iterable))
+
+
 class LessonSerializer(serializers.ModelSerializer):
     links = LessonLinkSerializer(many=True, read_only=True)
     next_lesson_id = serializers.SerializerMethodField()
+    previous_lesson_id = serializers.SerializerMethodField()
     is_last_lesson = serializers.SerializerMethodField()
     completed = serializers.SerializerMethodField()
     cover_url = serializers.SerializerMethodField()
+    cover_srcset = serializers.SerializerMethodField()
     course_video_url = serializers.SerializerMethodField()  
     course_id = serializers.IntegerField(source='course.id', read_only=True)  
     lesson_duration_seconds = serializers.SerializerMethodField()  
     class Meta:
         model = Lesson
+        list_serializer_class = LessonListSerializer
         fields = [
             'id','title','description','order','links',
-            'next_lesson_id','is_last_lesson','completed','course_video_url',  
-            'cover_url','course_id',
+            'next_lesson_id','previous_lesson_id','is_last_lesson','completed','course_video_url',  
+            'cover_url','cover_srcset','course_id',
             'lesson_duration_seconds',           
             'created_at','updated_at'
         ]
 
     def get_lesson_duration_seconds(self, obj):
-        # 1) พยายามเลือก main ก่อน
-        main = next((lk for lk in obj.links.all()
-                     if (lk.kind or '').lower() == 'youtube' and (lk.role or '').lower().startswith('main')), None)
-        if main and main.duration_seconds:
-            return main.duration_seconds
-
-        # 2) ไม่เจอ main → รวมทุก youtube link ที่มี duration
-        total = 0
-        for lk in obj.links.all():
-            if (lk.kind or '').lower() == 'youtube' and (lk.duration_seconds or 0) > 0:
-                total += lk.duration_seconds
-        return total or None
+        # ค่าจาก annotate_lesson_durations() ใน view; ไม่มีค่อยคำนวณจาก links
+        annotated = getattr(obj, 'lesson_duration_seconds', _MISSING)
+        if annotated is not _MISSING:
+            return annotated
+        return lesson_duration_from_links(obj.links.all())
 
     def get_course_video_url(self, obj):
         # ถ้าใน model Course มี field video_url (ลิงก์กลางของคอร์ส)
@@ -97,29 +124,36 @@ class LessonSerializer(serializers.ModelSerializer):
         return getattr(req, 'user', None) if req else None
 
     def get_next_lesson_id(self, obj):
-        nxt = (Lesson.objects
-               .filter(course=obj.course, order__gt=obj.order)
-               .order_by('order','id')
-               .first())
-        return nxt.id if nxt else None
+        return ensure_lesson_sequence(obj)._next_lesson_id
+
+    def get_previous_lesson_id(self, obj):
+        return ensure_lesson_sequence(obj)._prev_lesson_id
 
     def get_is_last_lesson(self, obj):
-        return not Lesson.objects.filter(course=obj.course, order__gt=obj.order).exists()
+        return ensure_lesson_sequence(obj)._is_last_lesson
 
     def get_completed(self, obj):
         user = self._user()
         if not user or not user.is_authenticated:
             return False
+        # view โหลด id บทเรียนที่เรียนจบแล้วมาให้ครั้งเดียวต่อ request
+        completed_ids = self.context.get('completed_lesson_ids')
+        if completed_ids is not None:
+            return obj.id in completed_ids
         return LessonProgress.objects.filter(user=user, lesson=obj, completed=True).exists()
     def get_cover_url(self, obj):
         request = self.context.get("request")
         if getattr(obj, "cover", None) and obj.cover:
             return request.build_absolute_uri(obj.cover.url) if request else obj.cover.url
         return None
+
+    def get_cover_srcset(self, obj):
+        return image_srcset(self.context, obj.cover.name if obj.cover else None)
     
 class CourseSerializer(serializers.ModelSerializer):
     lessons = LessonSerializer(many=True, read_only=True)
     cover_url = serializers.SerializerMethodField()
+    cover_srcset = serializers.SerializerMethodField()
     total_duration_seconds = serializers.SerializerMethodField()   # <— เพิ่ม
 
     class Meta:
@@ -127,26 +161,46 @@ class CourseSerializer(serializers.ModelSerializer):
          fields = "__all__"
 
     def get_total_duration_seconds(self, obj):
-        total = 0
-        # ถ้า prefetch มาแล้วจะวิ่งเร็วขึ้น (แนะนำให้ prefetch ใน view)
-        for lesson in obj.lessons.all():
-            # ใช้ logic แบบเดียวกับใน LessonSerializer เพื่อกันผลลัพธ์ไม่สอดคล้อง
-            main = next((lk for lk in lesson.links.all()
-                         if (lk.kind or '').lower() == 'youtube' and (lk.role or '').lower().startswith('main')), None)
-            if main and main.duration_seconds:
-                total += main.duration_seconds
-                continue
-            # รวมลิงก์อื่น ๆ
-            for lk in lesson.links.all():
-                if (lk.kind or '').lower() == 'youtube' and (lk.duration_seconds or 0) > 0:
-                    total += lk.duration_seconds
-        return total or None
+        # ค่าจาก annotate_course_stats() ใน view; ไม่มีค่อยวนจาก lessons ที่ prefetch ไว้
+        annotated = getattr(obj, 'total_duration_seconds', _MISSING)
+        if annotated is not _MISSING:
+            return annotated
+        return course_duration_from_lessons(obj.lessons.all())
     def get_cover_url(self, obj):
         request = self.context.get("request")
         if getattr(obj, "cover", None) and obj.cover:
             return request.build_absolute_uri(obj.cover.url) if request else obj.cover.url
         return None
 
+    def get_cover_srcset(self, obj):
+        return image_srcset(self.context, obj.cover.name if obj.cover else None)
+
+
+class CourseSummarySerializer(serializers.Serializer):
+    """การ์ดคอร์สสำหรับหน้า Courses/Home — อ่านจาก dict ของ values() ไม่แตะ lessons/links"""
+    id = serializers.IntegerField()
+    name = serializers.CharField()
+    level = serializers.CharField()
+    category = serializers.CharField()
+    description = serializers.CharField()
+    cover_url = serializers.SerializerMethodField()
+    cover_srcset = serializers.SerializerMethodField()
+    lesson_count = serializers.IntegerField()
+    total_duration_seconds = serializers.IntegerField(allow_null=True)
+    created_at = serializers.DateTimeField()
+    updated_at = serializers.DateTimeField()
+
+    def get_cover_url(self, obj):
+        cover = obj.get("cover")
+        if not cover:
+            return None
+        request = self.context.get("request")
+        url = default_storage.url(cover)
+        return request.build_absolute_uri(url) if request else url
+
+    def get_cover_srcset(self, obj):
+        return image_srcset(self.context, obj.get("cover"))
+
 
 class CourseMiniSerializer(serializers.ModelSerializer):
     class Meta:
@@ -155,6 +209,7 @@ class CourseMiniSerializer(serializers.ModelSerializer):
 
 class JobSerializer(serializers.ModelSerializer):
     image_url = serializers.SerializerMethodField()
+    image_srcset = serializers.SerializerMethodField()
     courses = CourseMiniSerializer(many=True, read_only=True)
 
     class Meta:
@@ -168,6 +223,7 @@ class JobSerializer(serializers.ModelSerializer):
             "description",
             "position_type",
             "image_url",    
+            "image_srcset",
             "courses",      
             "created_at",
             "updated_at",
@@ -179,4 +235,7 @@ class JobSerializer(serializers.ModelSerializer):
             return request.build_absolute_uri(obj.image.url) if request else obj.image.url
         return None
 
+    def get_image_srcset(self, obj):
+        return image_srcset(self.context, obj.image.name if obj.image else None)
+
 
@@ -0,0 +1,109 @@
+# courses/services/answer_keys.py
+"""
+cache เฉลยแบบทดสอบ (correct_order) ในหน่วยความจำของ process — LRU จำกัดขนาด
+
+- quiz_check / grade_answers อ่านจากที่นี่ ข้อที่เคยตรวจแล้วไม่ต้องแตะ DB อีก
+  ข้อที่ยังไม่มีใน cache โหลดรวมกันครั้งเดียว (1 query ต่อ request)
+- signals ของ QuizQuestion (save/delete) ล้างค่าของข้อนั้นใน process ที่แก้
+  process อื่น (gunicorn worker อื่น) จะเห็นค่าใหม่เมื่อหมด TTL (QUIZ_ANSWER_CACHE_TTL)
+- answer_key_stats() คืนตัวนับ hits/misses/evictions ของ process นี้ (/api/_perf/)
+  ตัวนับเดียวกันส่งออกเป็น Prometheus Counter ใน services/metrics.py ด้วย (/metrics รวมทุก worker)
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+from ..models import QuizQuestion
+from .metrics import ANSWER_KEY_EVICTIONS, ANSWER_KEY_LOOKUPS
+
+
+class AnswerKeyCache:
+    def __init__(self, maxsize=2048, ttl=60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()  # question_id -> (expires_at, correct_order)
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = 0
+
+    def get_many(self, ids):
+        """{question_id: correct_order (tuple)} เฉพาะข้อที่มีอยู่จริง"""
+        now = time.monotonic()
+        found, missing = {}, []
+        hits = 0
+        with self._lock:
+            for qid in ids:
+                entry = self._data.get(qid)
+                if entry is not None and entry[0] > now:
+                    self._data.move_to_end(qid)
+                    found[qid] = entry[1]
+                    hits += 1
+                else:
+                    missing.append(qid)
+            self.hits += hits
+            self.misses += len(missing)
+        if hits:
+            ANSWER_KEY_LOOKUPS.labels("hit").inc(hits)
+        if missing:
+            ANSWER_KEY_LOOKUPS.labels("miss").inc(len(missing))
+            rows = QuizQuestion.objects.filter(id__in=missing).values_list("id", "correct_order")
+            loaded = {qid: tuple(order or ()) for qid, order in rows}
+            self._store(loaded, now)
+            found.update(loaded)
+        return found
+
+    def _store(self, items, now):
+        evicted = 0
+        with self._lock:
+            for qid, order in items.items():
+                self._data[qid] = (now + self.ttl, order)
+                self._data.move_to_end(qid)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                evicted += 1
+            self.evictions += evicted
+        if evicted:
+            ANSWER_KEY_EVICTIONS.inc(evicted)
+
+    def invalidate(self, qid):
+        with self._lock:
+            self._data.pop(qid, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+_cache = AnswerKeyCache(
+    maxsize=getattr(settings, "QUIZ_ANSWER_CACHE_SIZE", 2048),
+    ttl=getattr(settings, "QUIZ_ANSWER_CACHE_TTL", 60),
+)
+
+
+def get_answer_keys(ids):
+    return _cache.get_many(ids)
+
+
+def get_answer_key(qid):
+    """เฉลยของข้อเดียว (ไม่มีข้อนี้ → None)"""
+    return _cache.get_many([qid]).get(qid)
+
+
+def invalidate_answer_key(qid):
+    _cache.invalidate(qid)
+
+
+def answer_key_stats():
+    return _cache.stats()
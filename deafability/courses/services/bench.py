@@ -0,0 +1,307 @@
+# courses/services/bench.py
+"""
+ชุด benchmark ของ API (ใช้ผ่าน `python manage.py bench`)
+
+- build_catalogue(): สร้างแคตตาล็อกสังเคราะห์ตามขนาดที่กำหนด (seed เดิม = ข้อมูลเดิม)
+  เขียนด้วย bulk_create แล้วคำนวณ CourseStats / ดัชนีค้นหางานทีเดียว (ไม่ผ่าน signals ทีละแถว)
+- build_scenarios(): request ของทุก endpoint ใน urls.py (ยกเว้น admin) พร้อม id ที่สุ่มจาก seed
+- run_scenario(): ยิงผ่าน Django test client วัดเวลา / จำนวน query ต่อ request
+  แล้ววัด peak memory (tracemalloc) แยกอีก 1 request เพื่อไม่ให้ tracemalloc ถ่วงเวลาที่วัด
+- uncovered_routes(): route ใน urls.py ที่ยังไม่มี scenario (เพิ่ม endpoint ใหม่แล้วจะเห็นที่นี่)
+"""
+import random
+import statistics
+import time
+import tracemalloc
+from collections import Counter, namedtuple
+from io import BytesIO
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection
+from django.urls import URLPattern, URLResolver, get_resolver
+from PIL import Image
+
+from ..models import Course, Job, Lesson, LessonLink, QuizQuestion
+from .course_stats import rebuild_course_stats
+from .guest import reset_guest_user_cache
+from .job_search import rebuild_job_search
+
+LEVELS = ["เริ่มต้น", "กลาง", "สูง"]
+CATEGORIES = ["การออกแบบ", "การเขียนโปรแกรม", "การตลาด", "บัญชี", "ภาษามือ"]
+TOPICS = ["UI/UX", "Python", "ภาษามือไทย", "การถ่ายภาพ", "Excel", "การขายออนไลน์", "React", "บัญชีเบื้องต้น"]
+POSITIONS = ["นักพัฒนาเว็บ", "นักออกแบบกราฟิก", "เจ้าหน้าที่บัญชี", "แอดมินออนไลน์", "Data Entry"]
+COMPANIES = ["บริษัท สยามดิจิทัล จำกัด", "Deaf Works", "ไทยโซลูชั่น", "Open Hands Co., Ltd."]
+LOCATIONS = ["กรุงเทพฯ", "เชียงใหม่", "ขอนแก่น", "ภูเก็ต", "ทำงานที่บ้าน"]
+WORDS = ["ฉัน", "ชอบ", "เรียน", "ภาษามือ", "ทุก", "วัน", "ที่", "บ้าน"]
+JOB_QUERY = "นักพัฒนา"
+_YOUTUBE_ALPHABET = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_"
+
+BENCH_USERNAME = "bench_staff"
+
+
+def _youtube_id(rng):
+    return "".join(rng.choice(_YOUTUBE_ALPHABET) for _ in range(11))
+
+
+def _cover_image():
+    buf = BytesIO()
+    Image.new("RGB", (1280, 720), (40, 90, 160)).save(buf, "PNG")
+    return ContentFile(buf.getvalue())
+
+
+def build_catalogue(courses=100, lessons=10, links=2, jobs=500, quiz=10, seed=1):
+    """สร้างข้อมูลสังเคราะห์ใน DB ปัจจุบัน คืน dict ของ id ที่ scenario ใช้"""
+    rng = random.Random(seed)
+    course_objs = Course.objects.bulk_create([
+        Course(
+            name=f"{rng.choice(TOPICS)} สำหรับผู้พิการทางการได้ยิน #{i}",
+            level=rng.choice(LEVELS),
+            category=rng.choice(CATEGORIES),
+            description="รายละเอียดคอร์ส " * rng.randint(5, 40),
+        )
+        for i in range(courses)
+    ])
+    lesson_objs = Lesson.objects.bulk_create([
+        Lesson(course=c, title=f"บทที่ {n}: {rng.choice(TOPICS)}", description="เนื้อหาบทเรียน " * 10, order=n)
+        for c in course_objs
+        for n in range(1, lessons + 1)
+    ])
+    link_objs = []
+    for lesson in lesson_objs:
+        for n in range(links):
+            link = LessonLink(
+                lesson=lesson, title=f"วิดีโอ {n + 1}", kind="youtube", role="main" if n == 0 else "sign",
+                url=f"https://www.youtube.com/watch?v={_youtube_id(rng)}",
+                duration_seconds=rng.randint(60, 1800),
+            )
+            link.sync_video_fields()
+            link_objs.append(link)
+    LessonLink.objects.bulk_create(link_objs, batch_size=1000)
+    rebuild_course_stats()
+
+    job_objs = Job.objects.bulk_create([
+        Job(
+            title=f"{rng.choice(POSITIONS)} ({i})",
+            description="รายละเอียดงาน รับผู้พิการทางการได้ยิน " * rng.randint(2, 20),
+            position_type=rng.choice(POSITIONS),
+            company=rng.choice(COMPANIES),
+            location=rng.choice(LOCATIONS),
+            salary=f"{rng.randint(15, 60)},000",
+        )
+        for i in range(jobs)
+    ], batch_size=1000)
+    if course_objs:
+        Through = Job.courses.through
+        Through.objects.bulk_create([
+            Through(job_id=job.pk, course_id=course.pk)
+            for job in job_objs
+            for course in rng.sample(course_objs, min(len(course_objs), rng.randint(0, 3)))
+        ], batch_size=1000)
+    rebuild_job_search()
+
+    quiz_objs = []
+    for c in course_objs:
+        for n in range(quiz):
+            answer = rng.sample(WORDS, rng.randint(3, 6))
+            words = answer[:]
+            rng.shuffle(words)
+            quiz_objs.append(QuizQuestion(course=c, prompt=f"เรียงประโยคข้อ {n + 1}", words=words,
+                                          correct_order=answer))
+    QuizQuestion.objects.bulk_create(quiz_objs, batch_size=1000)
+
+    # รูปปกหนึ่งรูป (ไว้วัด /media/ และ /media/variants/) — update() ไม่ให้ signals สร้าง variants ล่วงหน้า
+    cover = None
+    if course_objs:
+        cover = default_storage.save("course_covers/bench.png", _cover_image())
+        Course.objects.filter(pk=course_objs[0].pk).update(cover=cover)
+
+    User = get_user_model()
+    staff = User.objects.create_user(BENCH_USERNAME, password=None, is_staff=True)
+    reset_guest_user_cache()
+
+    return {
+        "courses": [c.pk for c in course_objs],
+        "lessons": [(lesson.course_id, lesson.pk) for lesson in lesson_objs],
+        "jobs": [j.pk for j in job_objs],
+        "quiz": [(q.pk, q.correct_order) for q in quiz_objs],
+        "cover": cover,
+        "staff": staff,
+        "counts": {
+            "courses": len(course_objs), "lessons": len(lesson_objs), "links": len(link_objs),
+            "jobs": len(job_objs), "quiz_questions": len(quiz_objs),
+        },
+    }
+
+
+# ---- scenarios ----
+# request(rng) คืน path หรือ (path, body) — ทุก request สุ่ม id ใหม่จาก seed เดียวกัน
+# auth=True ใช้ client ที่ล็อกอินเป็น staff, revalidate=True ส่ง If-None-Match จาก response แรก
+Scenario = namedtuple("Scenario", "name method request headers auth revalidate")
+
+
+def _scenario(name, request, method="get", headers=None, auth=False, revalidate=False):
+    return Scenario(name, method, request, headers or {}, auth, revalidate)
+
+
+def build_scenarios(dataset):
+    courses, lessons, jobs, quiz = dataset["courses"], dataset["lessons"], dataset["jobs"], dataset["quiz"]
+    cover = dataset["cover"]
+    first_course = courses[0] if courses else 0
+
+    def course(rng):
+        return rng.choice(courses)
+
+    def lesson(rng):
+        return rng.choice(lessons)
+
+    def check_one(rng):
+        pk, order = rng.choice(quiz)
+        return f"/api/quiz/questions/{pk}/check/", {"answer": order}
+
+    def check_batch(rng):
+        return "/api/quiz/check/", {"answers": {str(pk): order for pk, order in rng.sample(quiz, min(10, len(quiz)))}}
+
+    scenarios = [
+        _scenario("api-root", lambda rng: "/api/"),
+        _scenario("course-viewset-list", lambda rng: "/api/courses/"),
+        _scenario("course-viewset-detail", lambda rng: f"/api/courses/{course(rng)}/"),
+        _scenario("course-detail-304", lambda rng: f"/api/courses/{first_course}/", revalidate=True),
+        _scenario("csrf", lambda rng: "/api/csrf/"),
+        _scenario("course-list", lambda rng: "/api/courses-list/"),
+        _scenario("course-list-304", lambda rng: "/api/courses-list/", revalidate=True),
+        _scenario("course-summary", lambda rng: "/api/courses-summary/"),
+        _scenario("course-summary-search", lambda rng: "/api/courses-summary/?q=Python"),
+        _scenario("course-filters", lambda rng: "/api/courses-summary/filters/"),
+        _scenario("enroll-course", lambda rng: f"/api/courses/{course(rng)}/enroll/", method="post"),
+        _scenario("lesson-detail", lambda rng: "/api/courses/%s/lessons/%s/" % lesson(rng)),
+        _scenario("lesson_complete", lambda rng: "/api/courses/%s/lessons/%s/complete/" % lesson(rng),
+                  method="post"),
+        _scenario("course_progress", lambda rng: f"/api/courses/{course(rng)}/progress/"),
+        _scenario("progress_list", lambda rng: "/api/progress/"),
+        _scenario("reset_progress", lambda rng: f"/api/courses/{course(rng)}/reset_progress/", method="post",
+                  auth=True),
+        _scenario("job_list", lambda rng: "/api/jobs/"),
+        _scenario("job_list-search", lambda rng: f"/api/jobs/?q={JOB_QUERY}"),
+        _scenario("job_list-search-short", lambda rng: "/api/jobs/?q=UX"),
+        _scenario("job_detail", lambda rng: f"/api/jobs/{rng.choice(jobs)}/"),
+        _scenario("quiz_list", lambda rng: f"/api/quiz/questions/?course={course(rng)}"),
+        _scenario("quiz_list-page", lambda rng: "/api/quiz/questions/?page_size=2&fields=id,prompt,words"),
+        _scenario("quiz_list-session", lambda rng: f"/api/quiz/questions/?session=10&seed={rng.randint(1, 1000)}"),
+        _scenario("quiz_detail", lambda rng: f"/api/quiz/questions/{rng.choice(quiz)[0]}/"),
+        _scenario("quiz_check", check_one, method="post"),
+        _scenario("quiz_check_batch", check_batch, method="post"),
+        _scenario("perf_summary", lambda rng: "/api/_perf/", auth=True),
+        _scenario("metrics", lambda rng: "/metrics"),
+        _scenario("spa_index", lambda rng: f"/courses/{course(rng)}"),
+    ]
+    if cover:
+        scenarios += [
+            _scenario("media", lambda rng: f"/media/{cover}"),
+            _scenario("media-range", lambda rng: f"/media/{cover}", headers={"HTTP_RANGE": "bytes=0-1023"}),
+            _scenario("media_variant", lambda rng: f"/media/variants/{cover}.320w.webp"),
+        ]
+    return scenarios
+
+
+# ---- runner ----
+class _QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def _send(client, scenario, rng, headers):
+    path = scenario.request(rng)
+    if scenario.method == "post":
+        path, data = path if isinstance(path, tuple) else (path, {})
+        return client.post(path, data, content_type="application/json", **headers)
+    return client.get(path, **headers)
+
+
+def _quantiles(values):
+    if len(values) < 2:
+        v = values[0] if values else 0.0
+        return v, v, v
+    q = statistics.quantiles(values, n=100, method="inclusive")
+    return q[49], q[94], q[98]
+
+
+def run_scenario(scenario, clients, requests=50, warmup=5, seed=1):
+    """ยิง scenario requests ครั้ง (หลัง warmup) คืนสถิติ + route ที่ถูกเรียกจริง"""
+    client = clients["staff" if scenario.auth else "anon"]
+    rng = random.Random(f"{seed}:{scenario.name}")
+    headers = dict(scenario.headers)
+    routes = set()
+
+    if scenario.revalidate:
+        etag = _send(client, scenario, rng, headers).get("ETag")
+        if etag:
+            headers["HTTP_IF_NONE_MATCH"] = etag
+    for _ in range(warmup):
+        _send(client, scenario, rng, headers)
+
+    latencies, queries, statuses = [], [], Counter()
+    for _ in range(requests):
+        counter = _QueryCounter()
+        with connection.execute_wrapper(counter):
+            start = time.perf_counter()
+            response = _send(client, scenario, rng, headers)
+            elapsed = time.perf_counter() - start
+        latencies.append(elapsed * 1000)
+        queries.append(counter.count)
+        statuses[response.status_code] += 1
+        if response.resolver_match is not None:
+            routes.add(response.resolver_match.route)
+
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        _send(client, scenario, rng, headers)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    total = sum(latencies)
+    p50, p95, p99 = _quantiles(latencies)
+    return {
+        "method": scenario.method.upper(),
+        "requests": requests,
+        "statuses": {str(code): n for code, n in sorted(statuses.items())},
+        "throughput_rps": round(requests / (total / 1000), 1) if total else None,
+        "latency_ms": {
+            "mean": round(total / requests, 3) if requests else None,
+            "p50": round(p50, 3), "p95": round(p95, 3), "p99": round(p99, 3),
+            "max": round(max(latencies), 3) if latencies else None,
+        },
+        "queries": {
+            "mean": round(sum(queries) / requests, 2) if requests else None,
+            "max": max(queries) if queries else None,
+        },
+        "peak_alloc_kib": round(peak / 1024, 1),
+    }, routes
+
+
+def _flatten(patterns, prefix=""):
+    for p in patterns:
+        if isinstance(p, URLResolver):
+            yield from _flatten(p.url_patterns, _join(prefix, str(p.pattern)))
+        elif isinstance(p, URLPattern):
+            yield _join(prefix, str(p.pattern))
+
+
+def _join(prefix, route):
+    # ต่อแบบเดียวกับ ResolverMatch.route (ตัด ^ ของ pattern ชั้นใน)
+    return prefix + (route[1:] if prefix and route.startswith("^") else route)
+
+
+def uncovered_routes(covered):
+    """route ใน urls.py ที่ไม่มี scenario ไหนเรียกถึง (ไม่นับ admin และ format suffix ของ router)"""
+    return [
+        route for route in _flatten(get_resolver().url_patterns)
+        if not route.startswith("admin/") and "format>" not in route and route not in covered
+    ]
@@ -0,0 +1,69 @@
+# courses/services/catalogue_cache.py
+"""
+Cache ของ response แคตตาล็อก (course_list / CourseViewSet.retrieve)
+
+- เก็บเฉพาะส่วนที่ไม่ขึ้นกับ user (completed=False ทั้งหมด) จึงแชร์ข้าม user ได้
+- key มีเลขเวอร์ชันแคตตาล็อก (ตาราง CatalogueVersion ใน DB ไม่ใช่ใน cache — worker / cron
+  refresh_durations อยู่คนละเครื่องกับ web ก็ยังเห็นเวอร์ชันเดียวกัน)
+- signals ใน courses/signals.py เพิ่มเวอร์ชันหลัง commit เมื่อแก้ Course / Lesson / LessonLink / Job.courses
+  (ถ้าเพิ่มก่อน commit request อื่นอาจอ่านแถวเก่าแล้วเก็บไว้ใต้เวอร์ชันใหม่) → key เก่าจะไม่ถูกอ่านอีก
+- ฟิลด์ของ user (completed) เติมทีหลังด้วย merge_completed()
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+
+from ..models import CatalogueVersion
+
+
+def fresh_version():
+    # DB ใหม่ (แถวยังไม่มี) ห้ามเริ่มที่ 1 ไม่งั้นอาจชน entry เก่าที่ยังค้างใน cache
+    return int(time.time() * 1000)
+
+
+def get_catalogue_version(request=None):
+    """เวอร์ชันปัจจุบัน (1 query; ส่ง request มาด้วยจะจำไว้ตลอด request นั้น)"""
+    if request is not None and "_catalogue_version" in request.__dict__:
+        return request._catalogue_version
+    version = CatalogueVersion.objects.filter(pk=1).values_list("version", flat=True).first() or 0
+    if request is not None:
+        request._catalogue_version = version
+    return version
+
+
+def bump_catalogue_version():
+    if not CatalogueVersion.objects.filter(pk=1).update(version=F("version") + 1):
+        CatalogueVersion.objects.get_or_create(pk=1, defaults={"version": fresh_version()})
+
+
+def bump_catalogue_version_on_commit():
+    transaction.on_commit(bump_catalogue_version)
+
+
+def get_or_build(name, request, build):
+    """
+    คืนข้อมูลที่ cache ไว้สำหรับ name (เช่น "list", "course:5") ถ้าไม่มีก็เรียก build()
+    key รวม scheme/host ด้วยเพราะ cover_url เป็น absolute URL
+    """
+    key = "catalogue:%s:%s:%s://%s" % (
+        get_catalogue_version(request), name, request.scheme, request.get_host()
+    )
+    data = cache.get(key)
+    if data is None:
+        data = build()
+        cache.set(key, data, getattr(settings, "CATALOGUE_CACHE_TIMEOUT", 60 * 60 * 24))
+    return data
+
+
+def merge_completed(course, completed_ids):
+    """คืน dict คอร์สใหม่ที่ตั้ง lessons[*].completed ตาม set ของ user (ไม่แก้ object ที่ cache)"""
+    return {
+        **course,
+        "lessons": [
+            {**lesson, "completed": lesson["id"] in completed_ids}
+            for lesson in course.get("lessons", [])
+        ],
+    }
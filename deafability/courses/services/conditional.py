@@ -0,0 +1,131 @@
+# courses/services/conditional.py
+"""
+ETag สำหรับ conditional GET (If-None-Match → 304)
+
+คำนวณจาก max(updated_at) + จำนวนแถว + เวอร์ชันแคตตาล็อก ด้วย aggregate เท่านั้น ไม่ serialize ข้อมูล
+ใช้คู่กับ django.views.decorators.http.condition:
+
+    @api_view(['GET'])
+    @condition(etag_func=course_list_etag)
+    def course_list(request): ...
+
+ไม่ส่ง Last-Modified: max(updated_at/completed_at) ไม่ถอยหลังเมื่อมีการลบ (reset progress,
+ลบบทเรียน/ลิงก์, เอางานออกจากคอร์ส) client ที่ส่งแค่ If-Modified-Since จะได้ 304 ของเก่า
+ส่วน ETag เปลี่ยนเพราะรวมจำนวนแถวและเวอร์ชันแคตตาล็อก (signals เพิ่มทุกครั้งที่แก้/ลบ)
+
+ค่าที่คำนวณแล้วจำไว้บน request (HEAD/GET ที่เรียก etag_func ซ้ำไม่ query ใหม่)
+"""
+import hashlib
+
+from django.db.models import Count, Max
+
+from ..models import Course, Lesson, LessonLink, LessonProgress, Job
+from .catalogue_cache import get_catalogue_version
+
+
+def _state(request, key, compute):
+    cache = request.__dict__.setdefault("_conditional_state", {})
+    if key not in cache:
+        cache[key] = compute()
+    return cache[key]
+
+
+def _user_progress(request, **filters):
+    """ส่วนของ user (completed) — anonymous ไม่มี completed จึงไม่ต้องนับ"""
+    user = getattr(request, "user", None)
+    if not user or not user.is_authenticated:
+        return ("anon", None, 0)
+    agg = (LessonProgress.objects
+           .filter(user=user, completed=True, **filters)
+           .aggregate(last=Max("completed_at"), n=Count("id")))
+    return (user.pk, agg["last"], agg["n"])
+
+
+def _etag(parts):
+    raw = "|".join(str(p) for p in parts)
+    return hashlib.md5(raw.encode("utf-8")).hexdigest()
+
+
+def _catalogue_parts(request, course_filter=None, lesson_filter=None, link_filter=None):
+    courses = Course.objects.filter(**(course_filter or {})).aggregate(
+        last=Max("updated_at"), n=Count("id"))
+    lessons = Lesson.objects.filter(**(lesson_filter or {})).aggregate(
+        last=Max("updated_at"), n=Count("id"))
+    # LessonLink ไม่มี updated_at → ใช้จำนวน + duration_fetched_at ล่าสุด (+ เวอร์ชันแคตตาล็อก)
+    links = LessonLink.objects.filter(**(link_filter or {})).aggregate(
+        last=Max("duration_fetched_at"), n=Count("id"))
+    return [get_catalogue_version(request),
+            courses["last"], courses["n"], lessons["last"], lessons["n"], links["last"], links["n"]]
+
+
+# ---- Course list ----
+def _course_list_state(request):
+    def compute():
+        return _etag(["list", *_catalogue_parts(request), *_user_progress(request)])
+    return _state(request, "course_list", compute)
+
+
+def course_list_etag(request, *args, **kwargs):
+    return _course_list_state(request)
+
+
+# ---- Course detail ----
+def _course_detail_state(request, course_id):
+    # router ส่ง pk มาเป็นสตริง — ถ้าไม่ใช่ตัวเลขให้ view ตอบ 404 เอง
+    if not str(course_id).isdigit():
+        return None
+    course_id = int(course_id)
+
+    def compute():
+        parts = _catalogue_parts(
+            request,
+            course_filter={"id": course_id},
+            lesson_filter={"course_id": course_id},
+            link_filter={"lesson__course_id": course_id},
+        )
+        return _etag(["course", course_id, *parts, *_user_progress(request, course_id=course_id)])
+    return _state(request, ("course", course_id), compute)
+
+
+def course_detail_etag(request, pk, *args, **kwargs):
+    return _course_detail_state(request, pk)
+
+
+# ---- Lesson detail (ขึ้นกับคอร์ส + บทเรียนข้างเคียงด้วย เพราะมี next/previous) ----
+def _lesson_detail_state(request, course_id, lesson_id):
+    def compute():
+        parts = _catalogue_parts(
+            request,
+            course_filter={"id": course_id},
+            lesson_filter={"course_id": course_id},
+            link_filter={"lesson_id": lesson_id},
+        )
+        return _etag(["lesson", course_id, lesson_id, *parts, *_user_progress(request, lesson_id=lesson_id)])
+    return _state(request, ("lesson", lesson_id), compute)
+
+
+def lesson_detail_etag(request, course_id, lesson_id, *args, **kwargs):
+    return _lesson_detail_state(request, course_id, lesson_id)
+
+
+# ---- Jobs ----
+def _job_state(request, job_id=None):
+    def compute():
+        jobs = Job.objects.all() if job_id is None else Job.objects.filter(id=job_id)
+        job_agg = jobs.aggregate(last=Max("updated_at"), n=Count("id"))
+        through = Job.courses.through.objects.all()
+        if job_id is not None:
+            through = through.filter(job_id=job_id)
+        course_agg = through.aggregate(last=Max("course__updated_at"), n=Count("id"))
+        # เวอร์ชันแคตตาล็อกเพิ่มเมื่อ Job.courses เปลี่ยน (สลับคอร์สแล้วจำนวนเท่าเดิมก็ยังเปลี่ยน)
+        return _etag(["jobs", job_id, get_catalogue_version(request),
+                      job_agg["last"], job_agg["n"], course_agg["last"], course_agg["n"]])
+    return _state(request, ("jobs", job_id), compute)
+
+
+def job_list_etag(request, *args, **kwargs):
+    return _job_state(request)
+
+
+def job_detail_etag(request, job_id, *args, **kwargs):
+    return _job_state(request, job_id)
@@ -0,0 +1,103 @@
+# courses/services/course_stats.py
+"""
+ดูแลตาราง CourseStats (lesson_count, total_duration_seconds ต่อคอร์ส)
+
+- signals (courses/signals.py) เรียกฟังก์ชันในนี้ทุกครั้งที่ Lesson / LessonLink เปลี่ยน
+  lesson_count ใช้ F() +1/-1
+- duration ต่อบทเรียนไม่ใช่ผลบวกตรง ๆ (main ก่อน ไม่งั้นรวมทุกลิงก์) และตอนลบแบบ cascade
+  signal ของลิงก์หลายตัวมาพร้อมกัน จึงคำนวณ total ของคอร์สที่ได้รับผลใหม่ด้วย UPDATE เดียว
+  (subquery เฉพาะคอร์สนั้น) แทนการบวก delta
+- ไม่มีแถว (เช่นคอร์สจาก bulk_create/fixture) signals จะข้ามไป แล้วสร้างตอนอ่านครั้งแรก
+  ผ่าน get_course_stats() หรือจาก rebuild_course_stats() (ใช้ใน management command)
+"""
+from django.db.models import Case, Count, F, IntegerField, OuterRef, Q, Subquery, When
+from django.db.models.functions import Coalesce, NullIf
+from django.utils import timezone
+
+from ..models import Course, CourseStats, Lesson
+from .durations import course_duration_expression
+
+
+def refresh_course_duration(*course_ids):
+    """คำนวณ total_duration_seconds ของคอร์สที่ระบุใหม่ใน DB (1 UPDATE)"""
+    course_ids = [cid for cid in set(course_ids) if cid]
+    if not course_ids:
+        return
+    CourseStats.objects.filter(course_id__in=course_ids).update(
+        total_duration_seconds=Coalesce(course_duration_expression(OuterRef("course_id")), 0),
+        last_changed=timezone.now(),
+    )
+
+
+def apply_lesson_count(course_id, delta):
+    if not course_id or not delta:
+        return
+    CourseStats.objects.filter(course_id=course_id).update(
+        lesson_count=F("lesson_count") + delta,
+        last_changed=timezone.now(),
+    )
+
+
+def ensure_course_stats(course_id):
+    CourseStats.objects.get_or_create(course_id=course_id)
+
+
+def get_course_stats(course):
+    """อ่าน stats ของคอร์ส (ใช้ select_related('stats') ได้) ถ้าไม่มีแถวก็สร้างใหม่"""
+    try:
+        return course.stats
+    except CourseStats.DoesNotExist:
+        rebuild_course_stats([course.id])
+        return CourseStats.objects.get(course_id=course.id)
+
+
+def lesson_count_expression(course_ref=None):
+    course_ref = course_ref if course_ref is not None else OuterRef("pk")
+    return Coalesce(Subquery(
+        Lesson.objects.filter(course=course_ref)
+        .order_by().values("course")
+        .annotate(n=Count("id")).values("n")[:1],
+        output_field=IntegerField(),
+    ), 0)
+
+
+def annotate_course_stats(qs):
+    """
+    เพิ่มคอลัมน์ lesson_count / total_duration_seconds ให้ queryset ของ Course จาก CourseStats
+    (คอร์สที่ยังไม่มีแถว stats จะคำนวณสดจาก Lesson/LessonLink แทน)
+    """
+    missing = Q(stats__isnull=True)
+    return qs.annotate(
+        lesson_count=Case(
+            When(missing, then=lesson_count_expression()),
+            default=F("stats__lesson_count"),
+            output_field=IntegerField(),
+        ),
+        total_duration_seconds=Case(
+            When(missing, then=course_duration_expression()),
+            default=NullIf(F("stats__total_duration_seconds"), 0),
+            output_field=IntegerField(),
+        ),
+    )
+
+
+def rebuild_course_stats(course_ids=None):
+    """คำนวณ CourseStats ใหม่ (ทั้งหมด หรือเฉพาะ course_ids) แล้วคืนจำนวนแถวที่เขียน"""
+    qs = Course.objects.order_by()
+    if course_ids is not None:
+        qs = qs.filter(id__in=course_ids)
+    rows = qs.annotate(
+        n=lesson_count_expression(),
+        total=Coalesce(course_duration_expression(), 0),
+    ).values_list("id", "n", "total")
+
+    now = timezone.now()
+    stats = [CourseStats(course_id=cid, lesson_count=n, total_duration_seconds=total, last_changed=now)
+             for cid, n, total in rows]
+    CourseStats.objects.bulk_create(
+        stats,
+        update_conflicts=True,
+        unique_fields=["course"],
+        update_fields=["lesson_count", "total_duration_seconds", "last_changed"],
+    )
+    return len(stats)
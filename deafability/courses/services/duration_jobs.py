@@ -0,0 +1,158 @@
+# courses/services/duration_jobs.py
+"""
+คิวงานดึงความยาววิดีโอ (เก็บใน DB ไม่ต้องมี broker)
+
+- enqueue_duration_fetch(): admin action เรียก → สร้าง DurationFetchJob + Task แล้วกลับทันที
+- process_batch(): worker (manage.py run_duration_worker) จอง task ที่ pending แล้วให้ thread pool
+  เรียก extractor พร้อมกันตาม concurrency; thread ทำแค่ดึงข้อมูล (network) ส่วนการเขียน DB
+  ทำใน thread หลักทั้งหมด (SQLite เขียนได้ทีละ connection)
+- อ่านผ่าน VideoMetadata (services/video_metadata.py): วิดีโอเดียวกันหลายลิงก์ดึงครั้งเดียว
+  และวิดีโอที่ cache ยังสดไม่ต้องดึงเลย (ตอน enqueue ก็ใส่ค่าให้ทันที)
+- extractor ส่งเข้ามาเองได้ (เช่น fake ใน test) ค่าเริ่มต้นอ่านจาก settings.DURATION_FETCH_EXTRACTOR
+"""
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from ..models import DurationFetchJob, DurationFetchTask
+from .video_metadata import fetch_raw, fresh_metadata, get_extractor, link_video_id, store_metadata
+
+
+def get_concurrency():
+    return int(getattr(settings, "DURATION_FETCH_CONCURRENCY", 4))
+
+
+def enqueue_duration_fetch(links, user=None):
+    """
+    สร้าง job สำหรับลิงก์ youtube ที่มี url แล้วคืน job (ไม่มีลิงก์ที่ใช้ได้ → None)
+    ลิงก์ที่วิดีโอมีใน cache แล้วจะถูกใส่ค่าทันทีและนับเป็น done เลย
+    """
+    links = [lk for lk in links if (lk.kind or "").lower() == "youtube" and lk.url]
+    if not links:
+        return None
+    cached = fresh_metadata(filter(None, (link_video_id(lk) for lk in links)))
+    now = timezone.now()
+    with transaction.atomic():
+        job = DurationFetchJob.objects.create(total=len(links), created_by=user)
+        tasks = []
+        for lk in links:
+            meta = cached.get(link_video_id(lk))
+            if meta is not None and meta.ok:
+                lk.mark_duration(meta.duration_seconds)
+                tasks.append(DurationFetchTask(job=job, link=lk, status="done",
+                                               seconds=meta.duration_seconds, finished_at=now))
+            else:
+                tasks.append(DurationFetchTask(job=job, link=lk))
+        DurationFetchTask.objects.bulk_create(tasks)
+        done = sum(1 for t in tasks if t.status == "done")
+        if done:
+            DurationFetchJob.objects.filter(pk=job.pk).update(done_count=done)
+            job.done_count = done
+    _finish_jobs([job.pk])
+    return job
+
+
+def requeue_stale(timeout_seconds=600):
+    """task ที่ค้าง running นานเกิน timeout (worker ตาย) → กลับเป็น pending"""
+    cutoff = timezone.now() - timedelta(seconds=timeout_seconds)
+    return DurationFetchTask.objects.filter(status="running", claimed_at__lt=cutoff).update(
+        status="pending", worker=""
+    )
+
+
+def claim_tasks(limit):
+    """จอง task ที่ pending ให้ worker นี้ (กันหลาย worker หยิบซ้ำด้วย token)"""
+    token = uuid.uuid4().hex
+    now = timezone.now()
+    with transaction.atomic():
+        qs = DurationFetchTask.objects.filter(status="pending").order_by("id")
+        if connection.features.has_select_for_update_skip_locked:
+            qs = qs.select_for_update(skip_locked=True)
+        ids = list(qs.values_list("id", flat=True)[:limit])
+        if not ids:
+            return []
+        DurationFetchTask.objects.filter(id__in=ids, status="pending").update(
+            status="running", worker=token, claimed_at=now, attempts=F("attempts") + 1
+        )
+    tasks = list(DurationFetchTask.objects.filter(worker=token, status="running").select_related("link"))
+    job_ids = {t.job_id for t in tasks}
+    DurationFetchJob.objects.filter(id__in=job_ids, status="pending").update(status="running", started_at=now)
+    return tasks
+
+
+def _record(task, seconds, error):
+    now = timezone.now()
+    ok = bool(seconds)
+    if ok:
+        task.link.mark_duration(seconds)
+    DurationFetchTask.objects.filter(pk=task.pk).update(
+        status="done" if ok else "failed",
+        seconds=seconds or None,
+        error="" if ok else (error or "no duration"),
+        finished_at=now,
+    )
+    counter = "done_count" if ok else "failed_count"
+    DurationFetchJob.objects.filter(pk=task.job_id).update(**{counter: F(counter) + 1})
+    return ok
+
+
+def _finish_jobs(job_ids):
+    DurationFetchJob.objects.filter(id__in=job_ids).exclude(status="done").filter(
+        total__lte=F("done_count") + F("failed_count")
+    ).update(status="done", finished_at=timezone.now())
+
+
+def process_batch(extractor=None, max_workers=None, limit=None):
+    """
+    ทำงาน 1 รอบ: จอง task สูงสุด limit ตัว ดึงพร้อมกัน max_workers ตัว แล้วบันทึกผล
+    คืน (ok, failed)
+    """
+    extractor = extractor or get_extractor()
+    max_workers = max_workers or get_concurrency()
+    tasks = claim_tasks(limit or max_workers * 4)
+    if not tasks:
+        return 0, 0
+
+    # วิดีโอเดียวกันหลายลิงก์ → ดึงครั้งเดียว
+    by_video = defaultdict(list)
+    ok = failed = 0
+    for t in tasks:
+        video_id = link_video_id(t.link)
+        if video_id:
+            by_video[video_id].append(t)
+        else:
+            _record(t, None, "invalid youtube url")
+            failed += 1
+
+    def record_all(video_id, seconds, error):
+        nonlocal ok, failed
+        for t in by_video[video_id]:
+            if _record(t, seconds, error):
+                ok += 1
+            else:
+                failed += 1
+
+    cached = fresh_metadata(by_video)
+    for video_id, meta in cached.items():
+        record_all(video_id, meta.duration_seconds, meta.error)
+
+    misses = [v for v in by_video if v not in cached]
+    if misses:
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            futures = {pool.submit(fetch_raw, extractor, v): v for v in misses}
+            for future in as_completed(futures):
+                info, error = future.result()
+                meta = store_metadata(futures[future], info, error)
+                record_all(meta.video_id, meta.duration_seconds, meta.error)
+    _finish_jobs({t.job_id for t in tasks})
+    return ok, failed
+
+
+def has_pending():
+    return DurationFetchTask.objects.filter(status="pending").exists()
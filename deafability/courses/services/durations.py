@@ -0,0 +1,86 @@
+# courses/services/durations.py
+"""
+ความยาววิดีโอของบทเรียน/คอร์ส
+
+กติกาเดียวกันทั้งฝั่ง DB และ Python:
+  1) ถ้าบทเรียนมีลิงก์ youtube role=main ที่มี duration → ใช้ค่านั้น
+  2) ไม่เจอ main → รวม duration ของทุกลิงก์ youtube ที่ > 0
+  ผลรวมเป็น 0 → None
+"""
+from django.db.models import IntegerField, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce, NullIf
+
+from ..models import Lesson, LessonLink
+
+
+def _youtube_links(lesson_ref):
+    return LessonLink.objects.filter(lesson=lesson_ref, kind__iexact="youtube")
+
+
+def lesson_duration_expression(lesson_ref=None):
+    """
+    Expression (ไม่มี aggregate ชั้นนอก) สำหรับ duration ของบทเรียนหนึ่งบท
+    จึงเอาไป Sum ต่อในระดับคอร์สได้
+    """
+    lesson_ref = lesson_ref if lesson_ref is not None else OuterRef("pk")
+    main = Subquery(
+        _youtube_links(lesson_ref)
+        .filter(role__istartswith="main")
+        .order_by("id")
+        .values("duration_seconds")[:1],
+        output_field=IntegerField(),
+    )
+    all_youtube = Subquery(
+        _youtube_links(lesson_ref)
+        .filter(duration_seconds__gt=0)
+        .order_by()
+        .values("lesson")
+        .annotate(total=Sum("duration_seconds"))
+        .values("total")[:1],
+        output_field=IntegerField(),
+    )
+    return Coalesce(NullIf(main, 0), NullIf(all_youtube, 0), output_field=IntegerField())
+
+
+def course_duration_expression(course_ref=None):
+    course_ref = course_ref if course_ref is not None else OuterRef("pk")
+    per_course = Subquery(
+        Lesson.objects.filter(course=course_ref)
+        .order_by()
+        .annotate(duration=lesson_duration_expression())
+        .values("course")
+        .annotate(total=Sum("duration"))
+        .values("total")[:1],
+        output_field=IntegerField(),
+    )
+    return NullIf(per_course, 0)
+
+
+def annotate_lesson_durations(qs):
+    """เพิ่มคอลัมน์ lesson_duration_seconds ให้ queryset ของ Lesson"""
+    return qs.annotate(lesson_duration_seconds=lesson_duration_expression())
+
+
+# ---- Python fallback (ใช้เมื่อ object ไม่ได้มาจาก queryset ที่ annotate) ----
+def lesson_duration_from_links(links):
+    links = list(links)
+    main = next((lk for lk in links
+                 if (lk.kind or '').lower() == 'youtube' and (lk.role or '').lower().startswith('main')), None)
+    if main and main.duration_seconds:
+        return main.duration_seconds
+
+    total = 0
+    for lk in links:
+        if (lk.kind or '').lower() == 'youtube' and (lk.duration_seconds or 0) > 0:
+            total += lk.duration_seconds
+    return total or None
+
+
+def course_duration_from_lessons(lessons):
+    total = 0
+    for lesson in lessons:
+        d = getattr(lesson, "lesson_duration_seconds", None)
+        if d is None:
+            d = lesson_duration_from_links(lesson.links.all())
+        total += d or 0
+    return total or None
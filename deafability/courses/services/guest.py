@@ -0,0 +1,51 @@
+# courses/services/guest.py
+"""
+ผู้ใช้ที่ใช้กับ endpoint progress (dev): ถ้าล็อกอินใช้ request.user ไม่งั้นใช้ user 'guest_dev'
+
+หา/สร้าง guest_dev ครั้งเดียวต่อ process แล้วจำไว้ — request ปกติ (เช่น GET progress)
+จึงไม่มีการเขียน DB เลย เขียนเฉพาะตอนสร้าง user ครั้งแรก หรือตอน resolve ครั้งแรกแล้วพบว่า
+guest_dev ที่มีอยู่ยังมีรหัสผ่านที่ใช้ได้ (ตั้งเป็น unusable ให้)
+เฉพาะสำหรับ dev/testing — ห้ามใช้ใน production
+"""
+import threading
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+
+GUEST_USERNAME = 'guest_dev'
+
+_lock = threading.Lock()
+_guest = None
+
+
+def get_guest_user():
+    global _guest
+    if _guest is None:
+        with _lock:
+            if _guest is None:
+                User = get_user_model()
+                # สร้างพร้อม unusable password ในครั้งเดียว (ไม่ต้อง save ซ้ำทุก request)
+                guest, created = User.objects.get_or_create(
+                    username=GUEST_USERNAME,
+                    defaults={'is_active': True, 'password': make_password(None)},
+                )
+                # guest_dev ที่มีอยู่ก่อนอาจมีรหัสผ่านที่ใช้ล็อกอินได้ → ปิดครั้งเดียวต่อ process
+                if not created and guest.has_usable_password():
+                    guest.set_unusable_password()
+                    guest.save(update_fields=['password'])
+                _guest = guest
+    return _guest
+
+
+def reset_guest_user_cache():
+    """ล้างค่าที่จำไว้ (เช่นหลังลบ user guest_dev หรือใน test)"""
+    global _guest
+    with _lock:
+        _guest = None
+
+
+def resolve_progress_user(request):
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return user
+    return get_guest_user()
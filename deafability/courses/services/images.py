@@ -0,0 +1,147 @@
+# courses/services/images.py
+"""
+รูปย่อ (variants) ของ Course.cover / Lesson.cover / Job.image
+
+    ต้นฉบับ   course_covers/foo.png
+    variant   variants/course_covers/foo.png.640w.webp , variants/course_covers/foo.png.640w.jpg
+
+- ความกว้างคงที่ตาม IMAGE_VARIANT_WIDTHS (รูปที่เล็กกว่าไม่ขยาย ใช้ขนาดเดิม)
+- สร้างตอนอัปโหลด (signals), ครั้งแรกที่มีคนขอแล้วเก็บลงดิสก์ (view media_variant)
+  หรือย้อนหลังด้วย `python manage.py build_image_variants`
+- URL ของ variant คำนวณจากชื่อไฟล์ได้เลย serializer จึงไม่ต้องเช็คว่าไฟล์มีอยู่หรือยัง
+"""
+import logging
+import posixpath
+import re
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+VARIANT_DIR = "variants"
+FORMATS = {
+    "webp": ("WEBP", {"quality": 80, "method": 4}),
+    "jpg": ("JPEG", {"quality": 82, "optimize": True, "progressive": True}),
+}
+CONTENT_TYPES = {"webp": "image/webp", "jpg": "image/jpeg"}
+_VARIANT_RE = re.compile(r"^(?P<name>.+)\.(?P<width>\d+)w\.(?P<fmt>webp|jpg)$")
+
+
+def variant_widths():
+    return tuple(getattr(settings, "IMAGE_VARIANT_WIDTHS", (320, 640, 1024)))
+
+
+def variant_name(name, width, fmt):
+    return f"{VARIANT_DIR}/{name}.{width}w.{fmt}"
+
+
+def parse_variant_path(path):
+    """'course_covers/foo.png.640w.webp' (ส่วนหลัง variants/) → (ชื่อต้นฉบับ, width, fmt) หรือ None"""
+    m = _VARIANT_RE.match(path or "")
+    if not m:
+        return None
+    name = posixpath.normpath(m["name"])
+    if name.startswith(("..", "/")) or name.startswith(VARIANT_DIR + "/"):
+        return None
+    return name, int(m["width"]), m["fmt"]
+
+
+def variant_srcset(name, build_url=None):
+    """{"webp": "<url> 320w, <url> 640w, ...", "jpg": "..."} ของไฟล์ name"""
+    if not name:
+        return None
+    build_url = build_url or (lambda u: u)
+    return {
+        fmt: ", ".join(
+            f"{build_url(default_storage.url(variant_name(name, w, fmt)))} {w}w" for w in variant_widths()
+        )
+        for fmt in FORMATS
+    }
+
+
+def _open(name, storage):
+    with storage.open(name, "rb") as f:
+        img = Image.open(f)
+        img.load()
+    return ImageOps.exif_transpose(img)
+
+
+def _render(img, width, fmt):
+    if img.width > width:
+        img = img.resize((width, max(1, round(img.height * width / img.width))), Image.LANCZOS)
+    has_alpha = img.mode in ("RGBA", "LA") or (img.mode == "P" and "transparency" in img.info)
+    if fmt == "jpg":
+        if has_alpha:
+            rgba = img.convert("RGBA")
+            flat = Image.new("RGB", rgba.size, "white")
+            flat.paste(rgba, mask=rgba.getchannel("A"))
+            img = flat
+        elif img.mode not in ("RGB", "L"):
+            img = img.convert("RGB")
+    elif img.mode not in ("RGB", "RGBA"):
+        img = img.convert("RGBA" if has_alpha else "RGB")
+    pil_format, options = FORMATS[fmt]
+    buf = BytesIO()
+    img.save(buf, pil_format, **options)
+    return buf.getvalue()
+
+
+def _write(storage, target, data):
+    if storage.exists(target):
+        storage.delete(target)
+    storage.save(target, ContentFile(data))
+
+
+def generate_variants(name, widths=None, formats=None, force=False, storage=None):
+    """สร้าง variants ของไฟล์ต้นฉบับ name คืนรายชื่อไฟล์ที่เขียน (มีอยู่แล้วข้าม เว้นแต่ force)"""
+    storage = storage or default_storage
+    img = None
+    written = []
+    for width in widths or variant_widths():
+        for fmt in formats or FORMATS:
+            target = variant_name(name, width, fmt)
+            if not force and storage.exists(target):
+                continue
+            if img is None:
+                img = _open(name, storage)
+            _write(storage, target, _render(img, width, fmt))
+            written.append(target)
+    return written
+
+
+def ensure_variant(path, storage=None):
+    """
+    ใช้ตอนมีคนขอ variant ที่ยังไม่มี: ตรวจชื่อ/ขนาดที่อนุญาต สร้างแล้วคืนชื่อไฟล์ใน storage
+    ขอไม่ถูกต้อง/ไม่มีต้นฉบับ → None
+    """
+    storage = storage or default_storage
+    parsed = parse_variant_path(path)
+    if parsed is None:
+        return None
+    name, width, fmt = parsed
+    if width not in variant_widths():
+        return None
+    target = variant_name(name, width, fmt)
+    if storage.exists(target):
+        return target
+    if not storage.exists(name):
+        return None
+    try:
+        generate_variants(name, widths=[width], formats=[fmt], storage=storage)
+    except (OSError, ValueError, Image.DecompressionBombError) as e:
+        logger.warning("cannot build image variant %s: %s", target, e)
+        return None
+    return target
+
+
+def build_variants_safely(name):
+    """เรียกจาก signals หลังอัปโหลด — รูปเสียไม่ควรทำให้การบันทึกล้ม"""
+    try:
+        return generate_variants(name)
+    except (OSError, ValueError, Image.DecompressionBombError) as e:
+        logger.warning("cannot build image variants for %s: %s", name, e)
+        return []
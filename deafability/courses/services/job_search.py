@@ -0,0 +1,160 @@
+# courses/services/job_search.py
+"""
+ค้นหางานแบบมีดัชนี (แทน icontains ข้าม M2M + DISTINCT)
+
+- เอกสารค้นหาต่องาน 1 แถว (JobSearchDocument) รวมชื่อคอร์สที่เกี่ยวข้องไว้แล้ว → ตอนค้นไม่ต้อง join
+- ข้อความ normalize ก่อนเก็บและก่อนค้น (NFKC + casefold + ตัด zero-width space ที่เจอบ่อยในข้อความไทย)
+- ภาษาไทยไม่เว้นวรรคระหว่างคำ จึงทำดัชนีแบบ trigram (ตัวอักษร 3 ตัวติดกัน) ซึ่งหา substring ได้ทุกภาษา
+  ผลเหมือน icontains เดิม แต่ใช้ดัชนี
+    SQLite     : ตาราง FTS5 (tokenize='trigram') rowid = job_id จัดอันดับด้วย bm25()
+    PostgreSQL : GIN (document gin_trgm_ops) + GIN to_tsvector('simple', document)
+                 จัดอันดับด้วย similarity() + ts_rank()
+  คำที่สั้นกว่า 3 ตัวอักษร (trigram ใช้ไม่ได้) → LIKE บนตารางเอกสารตารางเดียว
+- ค้นหลายคำ (คั่นด้วยช่องว่าง) ต้องเจอครบทุกคำ
+- sync ผ่าน signals (courses/signals.py) ซ่อมได้ด้วย `python manage.py rebuild_job_search`
+"""
+import re
+import unicodedata
+from collections import defaultdict
+
+from django.db import connection
+from django.db.models import FloatField, Value
+from django.db.models.expressions import RawSQL
+
+from ..models import Job, JobSearchDocument
+
+FTS_TABLE = "courses_jobsearch_fts"
+_DOCUMENT_FIELDS = ("title", "company", "position_type", "location", "description")
+_ZERO_WIDTH = re.compile("[\u200b\u200c\u200d\u2060\ufeff]")
+_SPACES = re.compile(r"\s+")
+_fts_ready = set()
+
+
+def normalize_text(text):
+    text = _ZERO_WIDTH.sub("", unicodedata.normalize("NFKC", text or ""))
+    return _SPACES.sub(" ", text.casefold()).strip()
+
+
+def query_terms(q):
+    return [t for t in normalize_text(q).split(" ") if t]
+
+
+def build_document(job_fields, course_names=()):
+    """job_fields: dict (หรือ object) ที่มีฟิลด์ใน _DOCUMENT_FIELDS"""
+    get = job_fields.get if isinstance(job_fields, dict) else (lambda k: getattr(job_fields, k, ""))
+    parts = [get(k) for k in _DOCUMENT_FIELDS] + list(course_names)
+    return normalize_text(" ".join(p for p in parts if p))
+
+
+def has_fts(conn=None):
+    """มีตาราง FTS5 ไหม (SQLite เก่าที่ไม่มี trigram tokenizer จะไม่มี → ใช้ LIKE แทน)"""
+    conn = conn or connection
+    if conn.vendor != "sqlite":
+        return False
+    if conn.alias not in _fts_ready and FTS_TABLE in conn.introspection.table_names():
+        _fts_ready.add(conn.alias)
+    return conn.alias in _fts_ready
+
+
+def _write_fts(docs):
+    if not docs or not has_fts():
+        return
+    ids = [job_id for job_id, _ in docs]
+    with connection.cursor() as cur:
+        cur.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid IN ({', '.join(['%s'] * len(ids))})", ids)
+        cur.executemany(f"INSERT INTO {FTS_TABLE}(rowid, document) VALUES (%s, %s)", docs)
+
+
+def sync_job_documents(job_ids):
+    """สร้าง/อัปเดตเอกสารค้นหาของงานที่ระบุ (2 query อ่าน + upsert) คืนจำนวนแถว"""
+    job_ids = {jid for jid in job_ids if jid}
+    if not job_ids:
+        return 0
+    names = defaultdict(list)
+    through = (Job.courses.through.objects
+               .filter(job_id__in=job_ids)
+               .order_by("course__name")
+               .values_list("job_id", "course__name"))
+    for job_id, name in through:
+        names[job_id].append(name)
+
+    rows = Job.objects.filter(id__in=job_ids).values("id", *_DOCUMENT_FIELDS)
+    docs = [JobSearchDocument(job_id=row["id"], document=build_document(row, names[row["id"]]))
+            for row in rows]
+    JobSearchDocument.objects.bulk_create(
+        docs,
+        update_conflicts=True,
+        unique_fields=["job"],
+        update_fields=["document", "updated_at"],
+    )
+    _write_fts([(d.job_id, d.document) for d in docs])
+    return len(docs)
+
+
+def delete_job_documents(job_ids):
+    # แถว JobSearchDocument ลบตาม cascade แล้ว เหลือแค่ตาราง FTS
+    job_ids = [jid for jid in job_ids if jid]
+    if not job_ids or not has_fts():
+        return
+    with connection.cursor() as cur:
+        cur.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid IN ({', '.join(['%s'] * len(job_ids))})", job_ids)
+
+
+def rebuild_job_search(job_ids=None, batch_size=500):
+    """สร้างเอกสารค้นหาใหม่ (ทั้งหมด หรือเฉพาะ job_ids) คืนจำนวนแถวที่เขียน"""
+    if job_ids is None:
+        job_ids = list(Job.objects.order_by("id").values_list("id", flat=True))
+        JobSearchDocument.objects.exclude(job_id__in=job_ids).delete()
+        if has_fts():
+            with connection.cursor() as cur:
+                cur.execute(f"DELETE FROM {FTS_TABLE}")
+    job_ids = list(job_ids)
+    return sum(sync_job_documents(job_ids[i:i + batch_size]) for i in range(0, len(job_ids), batch_size))
+
+
+def _fts_match(terms):
+    # แต่ละคำเป็น phrase ในเครื่องหมายคำพูด (trigram = หา substring) และต้องเจอครบทุกคำ
+    return " ".join('"%s"' % t.replace('"', '""') for t in terms)
+
+
+def search_jobs(qs, q):
+    """
+    กรอง + จัดอันดับ queryset ของ Job ด้วยคำค้น q
+    เพิ่มคอลัมน์ search_rank (มาก = ตรงกว่า) แล้วเรียงตามนั้นก่อน ตามด้วยงานใหม่สุด
+    """
+    terms = query_terms(q)
+    if not terms:
+        return qs
+    long_terms = [t for t in terms if len(t) >= 3]
+    like_terms = [t for t in terms if len(t) < 3]
+    job_table = Job._meta.db_table
+    doc_table = JobSearchDocument._meta.db_table
+
+    if long_terms and has_fts():
+        match = _fts_match(long_terms)
+        qs = qs.filter(id__in=RawSQL(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", [match]))
+        # bm25 ยิ่งน้อยยิ่งตรง → กลับเครื่องหมาย
+        rank = RawSQL(
+            f"SELECT -bm25({FTS_TABLE}) FROM {FTS_TABLE} "
+            f"WHERE {FTS_TABLE} MATCH %s AND rowid = {job_table}.id",
+            [match],
+            output_field=FloatField(),
+        )
+    else:
+        like_terms = terms
+        if connection.vendor == "postgresql":
+            text = " ".join(terms)
+            rank = RawSQL(
+                f"SELECT similarity(d.document, %s) "
+                f"+ ts_rank(to_tsvector('simple', d.document), plainto_tsquery('simple', %s)) "
+                f"FROM {doc_table} d WHERE d.job_id = {job_table}.id",
+                [text, text],
+                output_field=FloatField(),
+            )
+        else:
+            rank = Value(0.0, output_field=FloatField())
+
+    # document เก็บแบบ casefold แล้ว จึงใช้ contains (LIKE) ซึ่งดัชนี trigram ของ Postgres ใช้ได้
+    for term in like_terms:
+        qs = qs.filter(search_document__document__contains=term)
+    return qs.annotate(search_rank=rank).order_by("-search_rank", "-created_at", "-id")
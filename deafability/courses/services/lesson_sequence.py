@@ -0,0 +1,40 @@
+# courses/services/lesson_sequence.py
+"""
+ลำดับบทเรียน (ก่อนหน้า/ถัดไป/บทสุดท้าย)
+
+คำนวณจาก lessons ที่ prefetch มาแล้วในรอบเดียว แทนการ query ทีละบท
+ผลลัพธ์เก็บไว้บน instance: _prev_lesson_id, _next_lesson_id, _is_last_lesson
+"""
+from itertools import groupby
+
+from ..models import Lesson
+
+
+def assign_lesson_sequence(lessons):
+    """ตั้งค่าลำดับให้ทุกบทเรียนใน iterable (รองรับหลายคอร์สปนกัน) แล้วคืน list เดิม"""
+    lessons = list(lessons)
+    ordered = sorted(lessons, key=lambda l: (l.course_id, l.order, l.id))
+    for _, group in groupby(ordered, key=lambda l: l.course_id):
+        group = list(group)
+        for i, lesson in enumerate(group):
+            lesson._prev_lesson_id = group[i - 1].id if i > 0 else None
+            lesson._next_lesson_id = group[i + 1].id if i + 1 < len(group) else None
+            lesson._is_last_lesson = lesson._next_lesson_id is None
+    return lessons
+
+
+def ensure_lesson_sequence(lesson):
+    """สำหรับบทเรียนเดี่ยว (เช่น lesson_detail) — ใช้ 2 query แบบ indexed แล้วจำไว้บน instance"""
+    if hasattr(lesson, "_next_lesson_id"):
+        return lesson
+    siblings = Lesson.objects.filter(course_id=lesson.course_id)
+    lesson._next_lesson_id = (siblings.filter(order__gt=lesson.order)
+                              .order_by("order", "id")
+                              .values_list("id", flat=True)
+                              .first())
+    lesson._prev_lesson_id = (siblings.filter(order__lt=lesson.order)
+                              .order_by("-order", "-id")
+                              .values_list("id", flat=True)
+                              .first())
+    lesson._is_last_lesson = lesson._next_lesson_id is None
+    return lesson
@@ -1,14 +1,154 @@
 # courses/services/lessonlink_duration.py
-from .youtube import extract_youtube_id, fetch_youtube_duration_seconds
+"""
+อัปเดต duration ของ LessonLink จาก YouTube
+
+- update_lessonlink_duration(): ทีละลิงก์ (อ่านผ่าน cache VideoMetadata)
+- refresh_durations(): แบบ bulk สำหรับ `manage.py refresh_durations`
+  เลือกลิงก์ที่ยังไม่มี/เก่า → ดึงต่อ video id พร้อมกันแบบจำกัดอัตรา + retry
+  → เขียนกลับด้วย bulk_update เป็นชุด ๆ
+"""
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from django.db.models import Q
+from django.utils import timezone
+
+from ..models import Lesson, LessonLink
+from .catalogue_cache import bump_catalogue_version_on_commit
+from .course_stats import refresh_course_duration
+from .video_metadata import fetch_raw, fresh_metadata, get_extractor, link_video_id, store_metadata
+
 
 def update_lessonlink_duration(link) -> bool:
-    if (link.kind or "").lower() != "youtube" or not link.url:
-        return False
-    vid = extract_youtube_id(link.url)
-    if not vid:
-        return False
-    sec = fetch_youtube_duration_seconds(vid)
-    if sec is None:
+    if not link_video_id(link):
         return False
-    link.mark_duration(sec)
-    return True
+    return link.refresh_duration()
+
+
+def stale_links(since=None, course_id=None):
+    """ลิงก์ youtube ที่ยังไม่เคยดึง duration หรือดึงไว้ก่อน since"""
+    cond = Q(duration_fetched_at__isnull=True)
+    if since is not None:
+        cond |= Q(duration_fetched_at__lt=since)
+    qs = (LessonLink.objects
+          .filter(kind__iexact="youtube")
+          .exclude(url="")
+          .filter(cond)
+          .order_by("id"))
+    if course_id is not None:
+        qs = qs.filter(lesson__course_id=course_id)
+    return qs
+
+
+class RateLimiter:
+    """จำกัดจำนวนครั้งต่อวินาที (ใช้ร่วมกันทุก thread)"""
+
+    def __init__(self, per_second):
+        self.interval = 1.0 / per_second if per_second and per_second > 0 else 0.0
+        self._lock = threading.Lock()
+        self._next = 0.0
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            at = max(now, self._next)
+            self._next = at + self.interval
+        if at > now:
+            time.sleep(at - now)
+
+
+def _fetch_with_retry(extractor, video_id, limiter, retries, backoff):
+    attempt = 0
+    while True:
+        limiter.wait()
+        info, error = fetch_raw(extractor, video_id)
+        # "no duration" คือดึงได้แต่ไม่มีค่า → ไม่ต้อง retry
+        if info is not None or error == "no duration" or attempt >= retries:
+            return info, error, attempt + 1
+        attempt += 1
+        time.sleep(backoff * (2 ** (attempt - 1)))
+
+
+def refresh_durations(links, extractor=None, concurrency=4, rate=2.0, retries=2, backoff=1.0,
+                      batch_size=200, dry_run=False, force=False):
+    """
+    ดึง duration ให้ links (iterable ของ LessonLink) แล้วคืน dict สรุปผล
+    dry_run=True: นับอย่างเดียว ไม่ดึง/ไม่เขียน
+    """
+    started = time.monotonic()
+    by_video = defaultdict(list)
+    skipped = 0
+    for link in links:
+        video_id = link_video_id(link)
+        if video_id:
+            by_video[video_id].append(link)
+        else:
+            skipped += 1
+
+    stats = {
+        "links": sum(len(v) for v in by_video.values()),
+        "videos": len(by_video),
+        "skipped": skipped,
+        "cached": 0,
+        "fetched": 0,
+        "requests": 0,
+        "updated": 0,
+        "failed": 0,
+        "dry_run": dry_run,
+    }
+    if dry_run or not by_video:
+        stats["elapsed"] = round(time.monotonic() - started, 3)
+        return stats
+
+    durations = {}
+    cached = {} if force else fresh_metadata(by_video)
+    for video_id, meta in cached.items():
+        durations[video_id] = meta.duration_seconds if meta.ok else None
+        stats["cached"] += 1
+
+    misses = [v for v in by_video if v not in cached]
+    if misses:
+        extractor = extractor or get_extractor()
+        limiter = RateLimiter(rate)
+        with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+            futures = {
+                pool.submit(_fetch_with_retry, extractor, v, limiter, retries, backoff): v
+                for v in misses
+            }
+            for future in as_completed(futures):
+                info, error, attempts = future.result()
+                meta = store_metadata(futures[future], info, error)
+                durations[meta.video_id] = meta.duration_seconds if meta.ok else None
+                stats["fetched"] += 1
+                stats["requests"] += attempts
+
+    # ดึงไม่สำเร็จไม่ประทับ duration_fetched_at → stale_links() เลือกกลับมาลองใหม่รอบหน้า
+    # (ระหว่างนั้น negative cache ของ VideoMetadata กันไม่ให้ยิงซ้ำถี่เกิน VIDEO_METADATA_NEGATIVE_TTL)
+    now = timezone.now()
+    changed = []
+    for video_id, group in by_video.items():
+        seconds = durations.get(video_id)
+        for link in group:
+            if not seconds:
+                stats["failed"] += 1
+                continue
+            link.duration_seconds = seconds
+            link.duration_fetched_at = now
+            stats["updated"] += 1
+            changed.append(link)
+    LessonLink.objects.bulk_update(changed, ["duration_seconds", "duration_fetched_at"], batch_size=batch_size)
+
+    # bulk_update ไม่ส่ง signal → อัปเดต CourseStats / เวอร์ชัน cache เอง
+    course_ids = set(Lesson.objects.filter(id__in={lk.lesson_id for lk in changed})
+                     .values_list("course_id", flat=True))
+    refresh_course_duration(*course_ids)
+    bump_catalogue_version_on_commit()
+
+    elapsed = time.monotonic() - started
+    stats["elapsed"] = round(elapsed, 3)
+    stats["links_per_second"] = round(len(changed) / elapsed, 2) if elapsed else None
+    return stats
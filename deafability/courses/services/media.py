@@ -0,0 +1,161 @@
+# courses/services/media.py
+"""
+เสิร์ฟไฟล์ media ตอน production (แทน django.views.static.serve)
+
+- ชื่อไฟล์มี hash ของเนื้อไฟล์ (courses/storage.py) → Cache-Control: immutable 1 ปี
+  ไฟล์เก่าที่ไม่มี hash → max-age สั้น (MEDIA_CACHE_MAX_AGE) แล้ว revalidate ด้วย ETag
+  รูปย่อใน variants/ ก็ใช้แบบหลัง: ชื่อมี hash ของต้นฉบับแต่ build_image_variants --force เขียนทับชื่อเดิม
+- If-None-Match → 304, Range: bytes=a-b (ช่วงเดียว) → 206 / 416, If-Range
+- มี proxy ข้างหน้า ส่งต่อให้ proxy ส่งไฟล์เองได้ ไม่ต้องกิน gunicorn worker:
+    MEDIA_ACCEL_REDIRECT=/_media/   → X-Accel-Redirect (nginx, location internal)
+    MEDIA_X_SENDFILE=1              → X-Sendfile (Apache mod_xsendfile / lighttpd)
+  ไม่มี proxy → FileResponse (gunicorn ใช้ sendfile() ผ่าน wsgi.file_wrapper)
+"""
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.http import http_date, parse_etags, quote_etag
+
+from ..storage import HASH_LENGTH, HashedMediaStorage, is_hashed_name
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+_HASH_IN_NAME = re.compile(r"\.([0-9a-f]{%d})\." % HASH_LENGTH)
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def parse_range(header, size):
+    """คืน (start, end) รวมปลาย หรือ None ถ้าไม่มี/อ่านไม่ออก (ส่งทั้งไฟล์)"""
+    m = _RANGE_RE.match((header or "").strip())
+    if not m or m.group(1) == m.group(2) == "":
+        return None
+    first, last = m.groups()
+    if size == 0:  # ไฟล์ว่างไม่มีไบต์ไหนให้ส่ง (bytes=-N จะได้ 0--1)
+        raise RangeNotSatisfiable
+    if first == "":
+        suffix = int(last)
+        if suffix == 0:
+            raise RangeNotSatisfiable
+        return max(0, size - suffix), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size:
+        raise RangeNotSatisfiable
+    if end < start:
+        return None
+    return start, end
+
+
+class _LimitedReader:
+    """อ่านไฟล์ได้แค่ length ไบต์ (เนื้อของ 206)"""
+
+    def __init__(self, f, length):
+        self.f = f
+        self.remaining = length
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b""
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.f.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.f.close()
+
+
+def is_immutable(name):
+    """ชื่อมี hash ของเนื้อไฟล์นี้เอง (ไฟล์ที่ระบบสร้างใน variants/ ไม่นับ)"""
+    return is_hashed_name(name) and not name.replace(os.sep, "/").startswith(HashedMediaStorage.unhashed_prefixes)
+
+
+def _etag(name, stat):
+    m = _HASH_IN_NAME.search(os.path.basename(name)) if is_immutable(name) else None
+    if m:
+        return quote_etag(m.group(1))
+    return quote_etag(f"{stat.st_mtime_ns:x}-{stat.st_size:x}")
+
+
+def _not_modified(request, etag):
+    header = request.META.get("HTTP_IF_NONE_MATCH")
+    if not header:
+        return False
+    etags = parse_etags(header)
+    return "*" in etags or etag.removeprefix("W/") in [e.removeprefix("W/") for e in etags]
+
+
+def _cache_headers(response, name, etag, stat):
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(stat.st_mtime)
+    if is_immutable(name):
+        response["Cache-Control"] = IMMUTABLE
+    else:
+        response["Cache-Control"] = f"public, max-age={getattr(settings, 'MEDIA_CACHE_MAX_AGE', 3600)}"
+    return response
+
+
+def media_response(request, name, root=None):
+    """response ของไฟล์ name (path ใต้ MEDIA_ROOT) — ไม่มีไฟล์ → Http404"""
+    root = str(root or settings.MEDIA_ROOT)
+    try:
+        full_path = safe_join(root, name)
+    except Exception:
+        raise Http404("invalid path")
+    try:
+        stat = os.stat(full_path)
+    except OSError:
+        raise Http404("file not found")
+    if not os.path.isfile(full_path):
+        raise Http404("file not found")
+
+    etag = _etag(name, stat)
+    if _not_modified(request, etag):
+        return _cache_headers(HttpResponseNotModified(), name, etag, stat)
+
+    content_type, encoding = mimetypes.guess_type(full_path)
+    content_type = content_type or "application/octet-stream"
+
+    # ---- ส่งต่อให้ proxy ----
+    accel_prefix = getattr(settings, "MEDIA_ACCEL_REDIRECT", "")
+    if accel_prefix or getattr(settings, "MEDIA_X_SENDFILE", False):
+        response = HttpResponse(content_type=content_type)
+        if accel_prefix:
+            response["X-Accel-Redirect"] = accel_prefix.rstrip("/") + "/" + quote(name.replace(os.sep, "/"))
+        else:
+            response["X-Sendfile"] = full_path
+        return _cache_headers(response, name, etag, stat)
+
+    # ---- Range ----
+    byte_range = None
+    if_range = request.META.get("HTTP_IF_RANGE")
+    if request.META.get("HTTP_RANGE") and (not if_range or if_range.strip() == etag):
+        try:
+            byte_range = parse_range(request.META["HTTP_RANGE"], stat.st_size)
+        except RangeNotSatisfiable:
+            response = HttpResponse(status=416)
+            response["Content-Range"] = f"bytes */{stat.st_size}"
+            return _cache_headers(response, name, etag, stat)
+
+    f = open(full_path, "rb")
+    if byte_range is None:
+        response = FileResponse(f, content_type=content_type)
+    else:
+        start, end = byte_range
+        f.seek(start)
+        response = FileResponse(_LimitedReader(f, end - start + 1), content_type=content_type, status=206)
+        response["Content-Length"] = str(end - start + 1)
+        response["Content-Range"] = f"bytes {start}-{end}/{stat.st_size}"
+    if encoding:
+        response["Content-Encoding"] = encoding
+    response["Accept-Ranges"] = "bytes"
+    return _cache_headers(response, name, etag, stat)
@@ -0,0 +1,89 @@
+# courses/services/metrics.py
+"""
+metrics รูปแบบ Prometheus ต่อ route (label = ชื่อ URL ที่ resolve ได้ เช่น course-list, job_list)
+
+- deafability_http_requests_total            Counter   method, view, status
+- deafability_http_errors_total              Counter   method, view (status >= 500)
+- deafability_http_request_duration_seconds  Histogram method, view
+- deafability_http_response_size_bytes       Histogram method, view
+- deafability_answer_key_cache_lookups_total Counter   result (hit / miss) — cache เฉลย quiz (services/answer_keys.py)
+- deafability_answer_key_cache_evictions_total Counter
+
+หลาย gunicorn worker: ตั้ง env PROMETHEUS_MULTIPROC_DIR (gunicorn.conf.py ตั้งให้และล้างไดเรกทอรีตอน start)
+ทุก worker เขียนค่าลงไฟล์ mmap ในไดเรกทอรีนั้น /metrics รวมของทุก worker ด้วย MultiProcessCollector
+ไม่ได้ตั้ง (runserver / manage.py) → เก็บในหน่วยความจำของ process เดียว
+"""
+import os
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest, multiprocess,
+)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+REQUESTS = Counter(
+    "deafability_http_requests_total", "HTTP requests by route", ["method", "view", "status"]
+)
+ERRORS = Counter(
+    "deafability_http_errors_total", "HTTP 5xx responses by route", ["method", "view"]
+)
+LATENCY = Histogram(
+    "deafability_http_request_duration_seconds", "Request latency by route", ["method", "view"],
+    buckets=LATENCY_BUCKETS,
+)
+RESPONSE_SIZE = Histogram(
+    "deafability_http_response_size_bytes", "Response body size by route", ["method", "view"],
+    buckets=SIZE_BUCKETS,
+)
+ANSWER_KEY_LOOKUPS = Counter(
+    "deafability_answer_key_cache_lookups_total", "Quiz answer-key cache lookups", ["result"]
+)
+ANSWER_KEY_EVICTIONS = Counter(
+    "deafability_answer_key_cache_evictions_total", "Quiz answer-key cache LRU evictions"
+)
+
+# method แปลก ๆ รวมเป็นค่าเดียว ไม่ให้จำนวน label บานปลาย
+_METHODS = {"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"}
+
+
+def view_label(request):
+    """ชื่อ URL ที่ resolve ได้; route ที่ไม่ได้ตั้งชื่อใช้ pattern แทน; resolve ไม่ได้ → 'unresolved'"""
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return "unresolved"
+    return match.view_name if match.url_name else f"/{match.route}"
+
+
+def response_size(response):
+    if response.streaming:
+        length = response.get("Content-Length")
+        return int(length) if length and length.isdigit() else None
+    return len(response.content)
+
+
+def observe(request, response, duration):
+    method = request.method if request.method in _METHODS else "other"
+    view = view_label(request)
+    status = response.status_code
+    REQUESTS.labels(method, view, str(status)).inc()
+    if status >= 500:
+        ERRORS.labels(method, view).inc()
+    LATENCY.labels(method, view).observe(duration)
+    size = response_size(response)
+    if size is not None:
+        RESPONSE_SIZE.labels(method, view).observe(size)
+
+
+def multiprocess_dir():
+    return os.environ.get("PROMETHEUS_MULTIPROC_DIR") or None
+
+
+def render():
+    """(body, content_type) ของ /metrics"""
+    if multiprocess_dir():
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -0,0 +1,147 @@
+# courses/services/perf.py
+"""
+วัดเวลาต่อ request: SQL (จำนวน + เวลา), serializer และเวลารวมของ view
+
+- PerfMiddleware (courses/middleware.py) สร้าง RequestTimings ต่อ request เก็บใน contextvar
+  แล้วครอบ connection.execute_wrapper() ทุก connection เพื่อนับ query
+- เวลา serializer: view ครอบจุดที่อ่าน serializer.data เองด้วย span("serialize") (ดู views.py)
+  query แบบ lazy ที่เกิดระหว่าง serialize จะถูกนับทั้งใน db และ serialize
+- ผลทุก request เข้า PerfSummary (หน้าต่างล่าสุด PERF_WINDOW ตัวอย่างต่อ endpoint ต่อ process)
+  ดูได้ที่ /api/_perf/ (staff เท่านั้น)
+"""
+import contextvars
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+from django.conf import settings
+
+from .answer_keys import answer_key_stats
+
+_current = contextvars.ContextVar("request_timings", default=None)
+
+
+class RequestTimings:
+    __slots__ = ("queries", "db", "spans", "active")
+
+    def __init__(self):
+        self.queries = 0
+        self.db = 0.0
+        self.spans = defaultdict(float)
+        self.active = set()
+
+    # ใช้กับ connection.execute_wrapper()
+    def db_wrapper(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db += time.perf_counter() - start
+            self.queries += 1
+
+
+def start_request():
+    timings = RequestTimings()
+    return timings, _current.set(timings)
+
+
+def end_request(token):
+    _current.reset(token)
+
+
+def current():
+    return _current.get()
+
+
+@contextmanager
+def span(name):
+    """บวกเวลาเข้า span ชื่อ name ของ request ปัจจุบัน (ซ้อนชื่อเดียวกันนับแค่ชั้นนอก)"""
+    timings = _current.get()
+    if timings is None or name in timings.active:
+        yield
+        return
+    timings.active.add(name)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.spans[name] += time.perf_counter() - start
+        timings.active.discard(name)
+
+
+def server_timing_header(timings, total):
+    parts = [
+        f'db;dur={timings.db * 1000:.1f};desc="{timings.queries} queries"',
+        *(f"{name};dur={secs * 1000:.1f}" for name, secs in timings.spans.items()),
+        f"view;dur={total * 1000:.1f}",
+    ]
+    return ", ".join(parts)
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    k = max(0, min(len(sorted_values) - 1, round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[k]
+
+
+class PerfSummary:
+    """สถิติต่อ endpoint ของ process นี้ (เก็บ window ล่าสุด + ตัวนับสะสม)"""
+
+    def __init__(self, window=200):
+        self.window = window
+        self._lock = threading.Lock()
+        self._samples = {}
+        self._totals = defaultdict(lambda: {"count": 0, "errors": 0})
+
+    def record(self, endpoint, status, total, timings):
+        sample = (total, timings.db, timings.queries, timings.spans.get("serialize", 0.0))
+        with self._lock:
+            samples = self._samples.get(endpoint)
+            if samples is None:
+                samples = self._samples[endpoint] = deque(maxlen=self.window)
+            samples.append(sample)
+            totals = self._totals[endpoint]
+            totals["count"] += 1
+            if status >= 500:
+                totals["errors"] += 1
+
+    def snapshot(self):
+        with self._lock:
+            data = {k: (list(v), dict(self._totals[k])) for k, v in self._samples.items()}
+        endpoints = {}
+        for endpoint, (samples, totals) in data.items():
+            n = len(samples)
+            totals_ms = sorted(s[0] * 1000 for s in samples)
+            endpoints[endpoint] = {
+                **totals,
+                "window": n,
+                "total_ms": {
+                    "p50": round(_percentile(totals_ms, 50), 2),
+                    "p95": round(_percentile(totals_ms, 95), 2),
+                    "max": round(totals_ms[-1], 2),
+                },
+                "db_ms_avg": round(sum(s[1] for s in samples) * 1000 / n, 2),
+                "queries_avg": round(sum(s[2] for s in samples) / n, 2),
+                "queries_max": max(s[2] for s in samples),
+                "serialize_ms_avg": round(sum(s[3] for s in samples) * 1000 / n, 2),
+            }
+        return dict(sorted(endpoints.items(), key=lambda kv: -kv[1]["total_ms"]["p95"]))
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+            self._totals.clear()
+
+
+summary = PerfSummary(window=getattr(settings, "PERF_WINDOW", 200))
+
+
+def perf_snapshot():
+    return {
+        "pid": os.getpid(),
+        "endpoints": summary.snapshot(),
+        "caches": {"quiz_answer_keys": answer_key_stats()},
+    }
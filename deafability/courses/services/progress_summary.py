@@ -0,0 +1,85 @@
+# courses/services/progress_summary.py
+"""
+ตัวนับความคืบหน้าต่อ (user, course) — CourseProgressSummary
+
+- mark_lesson_completed(): บันทึก LessonProgress และ +1 ด้วย F() เฉพาะตอนที่
+  เปลี่ยนจาก "ยังไม่จบ" → "จบ" จริง ๆ (กดซ้ำไม่นับซ้ำ)
+- LessonProgress ที่ completed ถูกลบทีละแถว (cascade ฯลฯ) → -1 ผ่าน signal
+- reset ทั้งคอร์ส (clear_course_progress) → ลบรวดเดียวแล้วตั้งเป็น 0 ด้วย UPDATE เดียว ไม่ -1 ทีละแถว
+- การอ่านเป็น lookup เดียวบน unique (user, course) แทน COUNT บน LessonProgress
+"""
+import contextvars
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from ..models import CourseProgressSummary, LessonProgress
+
+# ระหว่าง clear_course_progress() signal ของแต่ละแถวไม่ต้องแก้ตัวนับ (ตั้งเป็น 0 ทีเดียวตอนจบ)
+_bulk_removal = contextvars.ContextVar("progress_bulk_removal", default=False)
+
+
+def _add(user_id, course_id, delta):
+    updated = CourseProgressSummary.objects.filter(user_id=user_id, course_id=course_id).update(
+        completed_count=F("completed_count") + delta
+    )
+    if not updated and delta > 0:
+        summary, created = CourseProgressSummary.objects.get_or_create(
+            user_id=user_id, course_id=course_id, defaults={"completed_count": delta}
+        )
+        if not created:
+            # มี request อื่นสร้างแถวไปก่อน
+            CourseProgressSummary.objects.filter(pk=summary.pk).update(
+                completed_count=F("completed_count") + delta
+            )
+
+
+def mark_lesson_completed(user, course, lesson):
+    """ตั้ง LessonProgress เป็น completed แล้วคืน (progress, newly_completed)"""
+    now = timezone.now()
+    with transaction.atomic():
+        progress, created = LessonProgress.objects.get_or_create(
+            user=user, course=course, lesson=lesson,
+            defaults={"completed": True, "completed_at": now},
+        )
+        if created:
+            newly = True
+        else:
+            # อัปเดตแบบมีเงื่อนไข เพื่อให้ request ที่มาพร้อมกันนับได้ครั้งเดียว
+            newly = LessonProgress.objects.filter(pk=progress.pk, completed=False).update(
+                completed=True, completed_at=now
+            ) == 1
+            if not newly:
+                LessonProgress.objects.filter(pk=progress.pk).update(completed_at=now)
+            progress.completed, progress.completed_at = True, now
+        if newly:
+            _add(user.pk, course.pk, +1)
+    return progress, newly
+
+
+def lesson_progress_removed(progress):
+    """เรียกจาก post_delete ของ LessonProgress"""
+    if progress.completed and not _bulk_removal.get():
+        CourseProgressSummary.objects.filter(
+            user_id=progress.user_id, course_id=progress.course_id, completed_count__gt=0
+        ).update(completed_count=F("completed_count") - 1)
+
+
+def clear_course_progress(user, course):
+    """ลบ LessonProgress ทั้งคอร์สของ user แล้วคืนจำนวนแถวที่ลบ (ตัวนับ = 0 ด้วย UPDATE เดียว)"""
+    with transaction.atomic():
+        token = _bulk_removal.set(True)
+        try:
+            deleted, _ = LessonProgress.objects.filter(user=user, course=course).delete()
+        finally:
+            _bulk_removal.reset(token)
+        CourseProgressSummary.objects.filter(user=user, course=course).update(completed_count=0)
+    return deleted
+
+
+def get_completed_count(user, course):
+    return (CourseProgressSummary.objects
+            .filter(user=user, course=course)
+            .values_list("completed_count", flat=True)
+            .first()) or 0
@@ -0,0 +1,54 @@
+# courses/services/quiz.py
+"""
+ชุดคำถามแบบทดสอบ
+
+- sample_questions(): สุ่มคำถาม n ข้อด้วย query คงที่ 2 ครั้ง
+  (อ่านแค่ id ทั้งหมด → สุ่มใน Python → ดึงเฉพาะที่สุ่มได้) ไม่ใช้ ORDER BY RANDOM() ที่ต้อง sort ทั้งตาราง
+  ส่ง seed เดิมจะได้ชุดเดิม (รีเฟรชหน้า/ตรวจคำตอบภายหลังได้)
+- grade_answers(): ตรวจหลายข้อในครั้งเดียว สำหรับ POST /api/quiz/check/
+  เฉลยอ่านจาก cache ในหน่วยความจำ (services/answer_keys.py) ข้อที่ไม่มีใน cache โหลดรวม 1 query
+"""
+import random
+
+from .answer_keys import get_answer_keys
+
+MAX_SESSION_SIZE = 50
+
+
+def sample_questions(qs, size, seed=None):
+    """คืน (seed, list ของคำถาม) เรียงตามลำดับที่สุ่มได้"""
+    if seed is None:
+        seed = random.randrange(1, 2 ** 31)
+    size = max(1, min(int(size), MAX_SESSION_SIZE))
+    ids = sorted(qs.order_by().values_list("id", flat=True))
+    picked = random.Random(seed).sample(ids, min(size, len(ids)))
+    by_id = qs.in_bulk(picked) if picked else {}
+    return seed, [by_id[i] for i in picked if i in by_id]
+
+
+def is_correct(answer, correct_order):
+    return list(answer) == list(correct_order or [])
+
+
+def grade_answers(answers):
+    """
+    answers: {question_id: [คำ, ...]}
+    คืน dict {results: [...], score, total} — ข้อที่ไม่มีในระบบได้ error และไม่นับใน total
+    """
+    keys = get_answer_keys(list(answers))
+    results = []
+    score = 0
+    for qid, answer in answers.items():
+        expected = keys.get(qid)
+        if expected is None:
+            results.append({"question_id": qid, "correct": False, "error": "not found"})
+            continue
+        correct = is_correct(answer, expected)
+        score += correct
+        results.append({
+            "question_id": qid,
+            "correct": correct,
+            "expected": list(expected),
+            "your_answer": answer,
+        })
+    return {"results": results, "score": score, "total": len(keys)}
@@ -0,0 +1,115 @@
+# courses/services/spa_shell.py
+"""
+index.html ของ React (SPA shell) เก็บไว้ในหน่วยความจำ
+
+- อ่านไฟล์ครั้งเดียว (warm ตอน start ใน wsgi.py) แล้วบีบอัดไว้ล่วงหน้า: identity / gzip / br
+  (br ใช้ได้เมื่อติดตั้งแพ็กเกจ Brotli)
+- เช็ค mtime อย่างมากทุก SPA_SHELL_CHECK_INTERVAL วินาที ไฟล์เปลี่ยน (deploy ใหม่) → โหลดใหม่
+- ทุก deep link (/courses/1/lessons/2 ฯลฯ) เหลือแค่เลือก bytes จาก dict + เทียบ ETag
+- Cache-Control: no-cache (ให้ browser revalidate ทุกครั้ง เพราะ shell ชี้ไป bundle ที่ hash ใหม่ได้)
+"""
+import gzip
+import hashlib
+import os
+import threading
+import time
+
+from django.conf import settings
+
+try:
+    import brotli
+except ImportError:  # ไม่มี Brotli → ส่ง gzip/identity
+    brotli = None
+
+CACHE_CONTROL = "no-cache"
+
+
+def _compress(data):
+    variants = {"identity": data, "gzip": gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants["br"] = brotli.compress(data, quality=11, mode=brotli.MODE_TEXT)
+    # บีบแล้วไม่เล็กลงก็ไม่ต้องใช้
+    return {enc: body for enc, body in variants.items() if enc == "identity" or len(body) < len(data)}
+
+
+class SpaShell:
+    def __init__(self, path, check_interval=1.0):
+        self.path = str(path)
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._mtime = None
+        self._checked_at = 0.0
+        self.etag = None
+        self.variants = {}
+
+    def _reload(self, mtime):
+        with open(self.path, "rb") as f:
+            data = f.read()
+        digest = hashlib.sha1(data).hexdigest()[:16]
+        self.variants = _compress(data)
+        self.etag = digest
+        self._mtime = mtime
+
+    def get(self):
+        """(etag, {encoding: bytes}) — ไม่มีไฟล์ → (None, {})"""
+        now = time.monotonic()
+        if self._mtime is None or now - self._checked_at >= self.check_interval:
+            with self._lock:
+                if self._mtime is None or now - self._checked_at >= self.check_interval:
+                    self._checked_at = now
+                    try:
+                        mtime = os.stat(self.path).st_mtime_ns
+                    except OSError:
+                        self._mtime, self.etag, self.variants = None, None, {}
+                        return None, {}
+                    if mtime != self._mtime:
+                        self._reload(mtime)
+        return self.etag, self.variants
+
+    warm = get
+
+
+def _accepted(header):
+    """encoding ที่ client รับ (q > 0)"""
+    accepted = set()
+    for part in (header or "").split(","):
+        token, _, params = part.strip().partition(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if q > 0:
+            accepted.add(token)
+    return accepted
+
+
+def choose_encoding(accept_encoding, available):
+    accepted = _accepted(accept_encoding)
+    for enc in ("br", "gzip"):
+        if enc in available and (enc in accepted or "*" in accepted):
+            return enc
+    return "identity"
+
+
+def representation_etag(etag, encoding):
+    return f'"{etag}"' if encoding == "identity" else f'"{etag}-{encoding}"'
+
+
+_shell = None
+_shell_lock = threading.Lock()
+
+
+def get_shell():
+    global _shell
+    if _shell is None:
+        with _shell_lock:
+            if _shell is None:
+                path = getattr(settings, "SPA_INDEX_PATH", None) or os.path.join(settings.STATIC_ROOT, "index.html")
+                _shell = SpaShell(path, getattr(settings, "SPA_SHELL_CHECK_INTERVAL", 1.0))
+    return _shell
@@ -0,0 +1,103 @@
+# courses/services/video_metadata.py
+"""
+Read-through cache ของข้อมูลวิดีโอ YouTube (ตาราง VideoMetadata) ต่อ video id
+
+- ลิงก์กี่อันก็ตามที่ชี้วิดีโอเดียวกัน ดึงจาก yt-dlp อย่างมากครั้งเดียวต่อ TTL
+- ดึงไม่สำเร็จก็เก็บ (negative cache) ด้วย TTL ที่สั้นกว่า กันยิงซ้ำรัว ๆ
+- fetch_raw() แตะแค่ network (เรียกจาก thread ได้); store_metadata() เขียน DB
+
+extractor คือ callable(url) คืน dict {title, duration, thumbnail} หรือคืนแค่จำนวนวินาทีก็ได้
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from ..models import VideoMetadata
+from ..youtube import extract_youtube_id, youtube_watch_url
+
+DEFAULT_EXTRACTOR = "courses.youtube.fetch_youtube_metadata_noapi"
+
+
+def get_extractor():
+    return import_string(getattr(settings, "DURATION_FETCH_EXTRACTOR", DEFAULT_EXTRACTOR))
+
+
+def _ttl(ok):
+    if ok:
+        return timedelta(seconds=getattr(settings, "VIDEO_METADATA_TTL", 60 * 60 * 24 * 30))
+    return timedelta(seconds=getattr(settings, "VIDEO_METADATA_NEGATIVE_TTL", 60 * 60))
+
+
+def is_fresh(meta, now=None):
+    now = now or timezone.now()
+    return meta.fetched_at + _ttl(meta.ok) > now
+
+
+def fresh_metadata(video_ids):
+    """{video_id: VideoMetadata} เฉพาะตัวที่ยังไม่หมดอายุ (รวม negative) — 1 query"""
+    now = timezone.now()
+    rows = VideoMetadata.objects.filter(video_id__in=set(video_ids))
+    return {m.video_id: m for m in rows if is_fresh(m, now)}
+
+
+def _normalize(result):
+    if isinstance(result, dict):
+        return {
+            "title": (result.get("title") or "")[:300],
+            "duration": int(result.get("duration") or 0) or None,
+            "thumbnail": (result.get("thumbnail") or "")[:500],
+        }
+    return {"title": "", "duration": int(result or 0) or None, "thumbnail": ""}
+
+
+def fetch_raw(extractor, video_id):
+    """เรียก extractor แล้วคืน (info, error) — ไม่แตะ DB"""
+    try:
+        info = _normalize(extractor(youtube_watch_url(video_id)))
+    except Exception as e:
+        return None, str(e) or e.__class__.__name__
+    if not info["duration"]:
+        return None, "no duration"
+    return info, ""
+
+
+def store_metadata(video_id, info=None, error=""):
+    defaults = {"fetched_at": timezone.now(), "error": error}
+    if info:
+        defaults.update(
+            title=info["title"], duration_seconds=info["duration"], thumbnail_url=info["thumbnail"]
+        )
+    meta, _ = VideoMetadata.objects.update_or_create(video_id=video_id, defaults=defaults)
+    return meta
+
+
+def link_video_id(link):
+    """video id ของ LessonLink (ใช้ค่าที่เก็บไว้ ถ้ายังไม่มี เช่นแถวจาก bulk_create ค่อย parse)"""
+    if (link.kind or "").lower() != "youtube" or not link.url:
+        return None
+    return link.video_id or extract_youtube_id(link.url)
+
+
+def remember_duration(video_id, seconds):
+    """มี duration มาจากทางอื่นที่ไม่ใช่ cache (mark_duration(..., remember=True)) → เก็บลง cache ด้วย"""
+    if not video_id or not seconds:
+        return
+    VideoMetadata.objects.update_or_create(
+        video_id=video_id,
+        defaults={"duration_seconds": seconds, "fetched_at": timezone.now(), "error": ""},
+    )
+
+
+def get_video_metadata(url=None, extractor=None, force=False, video_id=None):
+    """อ่านจาก cache ถ้ายังสด ไม่งั้นดึงใหม่แล้วเก็บ; url ไม่ใช่ youtube → None"""
+    video_id = video_id or extract_youtube_id(url or "")
+    if not video_id:
+        return None
+    if not force:
+        meta = fresh_metadata([video_id]).get(video_id)
+        if meta is not None:
+            return meta
+    info, error = fetch_raw(extractor or get_extractor(), video_id)
+    return store_metadata(video_id, info, error)
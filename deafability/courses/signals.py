@@ -0,0 +1,184 @@
+# courses/signals.py
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete, m2m_changed
+from django.db import transaction
+from django.dispatch import receiver
+
+from .models import Course, Lesson, LessonLink, LessonProgress, Job, QuizQuestion
+from .services.catalogue_cache import bump_catalogue_version_on_commit
+from .services import course_stats, job_search
+from .services.progress_summary import lesson_progress_removed
+from .services.answer_keys import invalidate_answer_key
+from .services.images import build_variants_safely
+
+
+# ---- แคตตาล็อกเปลี่ยน → เพิ่มเวอร์ชัน cache (หลัง commit เหมือน _image_saved) ----
+@receiver(post_save, sender=Course)
+@receiver(post_delete, sender=Course)
+@receiver(post_save, sender=Lesson)
+@receiver(post_delete, sender=Lesson)
+@receiver(post_save, sender=LessonLink)
+@receiver(post_delete, sender=LessonLink)
+def _catalogue_changed(sender, **kwargs):
+    bump_catalogue_version_on_commit()
+
+
+@receiver(m2m_changed, sender=Job.courses.through)
+def _job_courses_changed(sender, action, **kwargs):
+    if action in ("post_add", "post_remove", "post_clear"):
+        bump_catalogue_version_on_commit()
+
+
+# ---- CourseStats (incremental) ----
+# ฟิลด์ของ LessonLink ที่มีผลต่อ duration ของบทเรียน
+_DURATION_FIELDS = {"duration_seconds", "kind", "role", "lesson", "lesson_id"}
+
+
+@receiver(post_save, sender=Course)
+def _course_created(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        course_stats.ensure_course_stats(instance.id)
+
+
+@receiver(pre_save, sender=Lesson)
+@receiver(pre_save, sender=LessonLink)
+def _remember_parent(sender, instance, raw=False, **kwargs):
+    # จำ parent เดิมไว้ เผื่อถูกย้ายไปคอร์ส/บทเรียนอื่น
+    instance._stats_old_parent = None
+    if raw or not instance.pk:
+        return
+    if sender is Lesson:
+        instance._stats_old_parent = (Lesson.objects.filter(pk=instance.pk)
+                                      .values_list("course_id", flat=True).first())
+    else:
+        instance._stats_old_parent = (LessonLink.objects.filter(pk=instance.pk)
+                                      .values_list("lesson__course_id", flat=True).first())
+
+
+@receiver(post_save, sender=Lesson)
+def _lesson_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        course_stats.apply_lesson_count(instance.course_id, +1)
+        return
+    old_course = getattr(instance, "_stats_old_parent", None)
+    if old_course and old_course != instance.course_id:
+        course_stats.apply_lesson_count(old_course, -1)
+        course_stats.apply_lesson_count(instance.course_id, +1)
+        course_stats.refresh_course_duration(old_course, instance.course_id)
+
+
+@receiver(post_delete, sender=Lesson)
+def _lesson_deleted(sender, instance, **kwargs):
+    course_stats.apply_lesson_count(instance.course_id, -1)
+    course_stats.refresh_course_duration(instance.course_id)
+
+
+@receiver(post_save, sender=LessonLink)
+def _lesson_link_saved(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    if update_fields is not None and not (set(update_fields) & _DURATION_FIELDS):
+        return
+    course_id = (Lesson.objects.filter(pk=instance.lesson_id)
+                 .values_list("course_id", flat=True).first())
+    course_stats.refresh_course_duration(course_id, getattr(instance, "_stats_old_parent", None))
+
+
+@receiver(post_delete, sender=LessonLink)
+def _lesson_link_deleted(sender, instance, **kwargs):
+    course_id = (Lesson.objects.filter(pk=instance.lesson_id)
+                 .values_list("course_id", flat=True).first())
+    course_stats.refresh_course_duration(course_id)
+
+
+# ---- CourseProgressSummary ----
+@receiver(post_delete, sender=LessonProgress)
+def _lesson_progress_deleted(sender, instance, **kwargs):
+    lesson_progress_removed(instance)
+
+
+# ---- ดัชนีค้นหางาน (JobSearchDocument) ----
+@receiver(post_save, sender=Job)
+def _job_saved(sender, instance, raw=False, **kwargs):
+    if not raw:
+        job_search.sync_job_documents([instance.id])
+
+
+@receiver(post_delete, sender=Job)
+def _job_deleted(sender, instance, **kwargs):
+    job_search.delete_job_documents([instance.id])
+
+
+@receiver(m2m_changed, sender=Job.courses.through)
+def _job_courses_search(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action in ("post_add", "post_remove", "post_clear"):
+            job_search.sync_job_documents([instance.pk])
+        return
+    # ฝั่ง course.jobs.* → pk_set คือ job id (clear ไม่มี pk_set ต้องจำไว้ก่อน)
+    if action == "pre_clear":
+        instance._search_job_ids = list(instance.jobs.values_list("id", flat=True))
+    elif action in ("post_add", "post_remove"):
+        job_search.sync_job_documents(pk_set or [])
+    elif action == "post_clear":
+        job_search.sync_job_documents(getattr(instance, "_search_job_ids", []))
+
+
+@receiver(pre_save, sender=Course)
+def _remember_course_name(sender, instance, raw=False, **kwargs):
+    instance._search_old_name = None
+    if not raw and instance.pk:
+        instance._search_old_name = (Course.objects.filter(pk=instance.pk)
+                                     .values_list("name", flat=True).first())
+
+
+@receiver(post_save, sender=Course)
+def _course_renamed(sender, instance, created, raw=False, **kwargs):
+    if raw or created or getattr(instance, "_search_old_name", None) == instance.name:
+        return
+    job_search.sync_job_documents(instance.jobs.values_list("id", flat=True))
+
+
+@receiver(pre_delete, sender=Course)
+def _remember_course_jobs(sender, instance, **kwargs):
+    instance._search_job_ids = list(instance.jobs.values_list("id", flat=True))
+
+
+@receiver(post_delete, sender=Course)
+def _course_deleted_search(sender, instance, **kwargs):
+    # แถวใน M2M ถูกลบไปพร้อมคอร์สแล้ว → สร้างเอกสารของงานเหล่านั้นใหม่ (ไม่มีชื่อคอร์สนี้)
+    job_search.sync_job_documents(getattr(instance, "_search_job_ids", []))
+
+
+# ---- cache เฉลยแบบทดสอบ ----
+@receiver(post_save, sender=QuizQuestion)
+@receiver(post_delete, sender=QuizQuestion)
+def _quiz_question_changed(sender, instance, **kwargs):
+    # ล้างหลัง commit — ถ้าล้างทันที request อื่นอาจโหลดเฉลยเก่าจาก DB กลับเข้า cache ก่อน commit
+    pk = instance.pk
+    transaction.on_commit(lambda: invalidate_answer_key(pk))
+
+
+# ---- รูปย่อ (variants) ตอนอัปโหลดรูปใหม่ ----
+_IMAGE_FIELDS = {Course: "cover", Lesson: "cover", Job: "image"}
+
+
+@receiver(pre_save, sender=Course)
+@receiver(pre_save, sender=Lesson)
+@receiver(pre_save, sender=Job)
+def _remember_image(sender, instance, raw=False, **kwargs):
+    instance._old_image_name = None
+    if not raw and instance.pk:
+        instance._old_image_name = (sender.objects.filter(pk=instance.pk)
+                                    .values_list(_IMAGE_FIELDS[sender], flat=True).first())
+
+
+@receiver(post_save, sender=Course)
+@receiver(post_save, sender=Lesson)
+@receiver(post_save, sender=Job)
+def _image_saved(sender, instance, raw=False, **kwargs):
+    name = getattr(instance, _IMAGE_FIELDS[sender]).name
+    if raw or not name or name == getattr(instance, "_old_image_name", None):
+        return
+    transaction.on_commit(lambda: build_variants_safely(name))
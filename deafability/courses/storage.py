@@ -0,0 +1,50 @@
+# courses/storage.py
+"""
+Storage ของไฟล์อัปโหลด (media) ที่ใส่ hash ของเนื้อไฟล์ไว้ในชื่อ
+
+    course_covers/foo.png  →  course_covers/foo.3f2a9c1b7d4e.png
+
+ชื่อเปลี่ยนทุกครั้งที่เนื้อไฟล์เปลี่ยน จึงส่ง Cache-Control: immutable ได้ (ดู services/media.py)
+ไฟล์เนื้อเดียวกันอัปโหลดซ้ำจะได้ชื่อเดิม ไม่เขียนซ้ำ
+ไฟล์ที่ระบบสร้างเอง (variants/) มีชื่อตายตัวอยู่แล้ว ไม่ต้องใส่ hash
+"""
+import hashlib
+import posixpath
+import re
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+
+HASH_LENGTH = 12
+_HASHED_RE = re.compile(r"\.[0-9a-f]{%d}\." % HASH_LENGTH)
+
+
+def is_hashed_name(name):
+    return bool(_HASHED_RE.search(posixpath.basename(name or "")))
+
+
+def content_hash(content):
+    digest = hashlib.sha256()
+    if hasattr(content, "seek"):
+        content.seek(0)
+    for chunk in content.chunks():
+        digest.update(chunk)
+    if hasattr(content, "seek"):
+        content.seek(0)
+    return digest.hexdigest()[:HASH_LENGTH]
+
+
+class HashedMediaStorage(FileSystemStorage):
+    unhashed_prefixes = ("variants/",)
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, "chunks"):
+            content = File(content, name)
+        if not name.startswith(self.unhashed_prefixes) and not is_hashed_name(name):
+            root, ext = posixpath.splitext(self.generate_filename(name))
+            name = f"{root}.{content_hash(content)}{ext}"
+            if self.exists(name):
+                return name
+        return super().save(name, content, max_length=max_length)
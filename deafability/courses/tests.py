@@ -1,3 +1,1123 @@
-from django.test import TestCase
+import base64
+import json
+import os
+import tempfile
+import threading
+from datetime import timedelta
+from io import BytesIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from PIL import Image
+from prometheus_client import REGISTRY
+
+from .models import (
+    Course, CourseProgressSummary, CourseStats, DurationFetchTask, Job, JobSearchDocument, Lesson, LessonLink,
+    LessonProgress, QuizQuestion, VideoMetadata,
+)
+from .services import answer_keys, bench, guest, images, job_search, media, spa_shell
+from .services.catalogue_cache import bump_catalogue_version, get_catalogue_version
+from .services.course_stats import rebuild_course_stats
+from .services.duration_jobs import claim_tasks, enqueue_duration_fetch, process_batch, requeue_stale
+from .services.lessonlink_duration import refresh_durations, stale_links
+
+# cache ของ test แยกจาก /tmp/deafability-cache ของเครื่อง (เวอร์ชันแคตตาล็อกเก่าจะไม่ค้างข้ามรอบ)
+LOCMEM_CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "tests"}}
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class CacheIsolatedTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+
+
+def _cursor(payload):
+    raw = json.dumps(payload).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+# -------------------------------------------
+# Keyset pagination (courses/pagination.py)
+# -------------------------------------------
+class KeysetPaginationTests(CacheIsolatedTestCase):
+    def setUp(self):
+        super().setUp()
+        self.jobs = [Job.objects.create(title=f"job {i}", position_type="dev") for i in range(5)]
+
+    def _titles(self, body):
+        return [row["title"] for row in body["results"]]
+
+    def test_walks_forward_and_back_without_gaps(self):
+        first = self.client.get("/api/jobs/", {"page_size": 2}).json()
+        second = self.client.get(first["next"]).json()
+        third = self.client.get(second["next"]).json()
+
+        newest_first = [j.title for j in reversed(self.jobs)]
+        self.assertEqual(self._titles(first) + self._titles(second) + self._titles(third), newest_first)
+        self.assertIsNone(first["previous"])
+        self.assertIsNone(third["next"])
+        self.assertEqual(self._titles(self.client.get(third["previous"]).json()), self._titles(second))
+
+    def test_count_is_opt_in(self):
+        self.assertNotIn("count", self.client.get("/api/jobs/").json())
+        self.assertEqual(self.client.get("/api/jobs/", {"count": 1}).json()["count"], 5)
+
+    def test_tied_created_at_is_broken_by_id(self):
+        stamp = self.jobs[0].created_at
+        Job.objects.update(created_at=stamp)
+        first = self.client.get("/api/jobs/", {"page_size": 3}).json()
+        second = self.client.get(first["next"]).json()
+        ids = [r["id"] for r in first["results"] + second["results"]]
+        self.assertEqual(ids, sorted((j.id for j in self.jobs), reverse=True))
+
+    def test_malformed_cursor_is_404(self):
+        for token in (
+            "not-base64!!",
+            _cursor({"p": ["garbage", 1]}),
+            _cursor({"p": ["2024-01-01T00:00:00+00:00", "x"]}),
+            _cursor({"p": [None, 1]}),
+            _cursor({"p": [[1], {"a": 1}]}),
+            _cursor({"p": [1]}),
+        ):
+            with self.subTest(token=token):
+                self.assertEqual(self.client.get("/api/jobs/", {"cursor": token}).status_code, 404)
+
+
+# -------------------------------------------
+# คิวดึงความยาววิดีโอ (courses/services/duration_jobs.py) กับ extractor ปลอม
+# -------------------------------------------
+class FakeExtractor:
+    """callable(url) แบบเดียวกับ yt-dlp: video id ใน durations → วินาที, ไม่มี → raise"""
+
+    def __init__(self, durations):
+        self.durations = durations
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def __call__(self, url):
+        video_id = url.rsplit("=", 1)[-1]
+        with self._lock:
+            self.calls.append(video_id)
+        if video_id not in self.durations:
+            raise RuntimeError("video unavailable")
+        return {"title": f"video {video_id}", "duration": self.durations[video_id], "thumbnail": ""}
+
+
+def _video_id(n):
+    return f"vid{n:08d}"
+
+
+class DurationWorkerTests(CacheIsolatedTestCase):
+    def setUp(self):
+        super().setUp()
+        course = Course.objects.create(name="c", level="l", category="x")
+        lesson = Lesson.objects.create(course=course, title="t", order=1)
+        self.links = [
+            LessonLink.objects.create(lesson=lesson, title=f"v{n}", kind="youtube",
+                                      url=f"https://www.youtube.com/watch?v={_video_id(n)}")
+            for n in range(4)
+        ]
+
+    def test_claim_uses_one_token_per_batch_and_never_overlaps(self):
+        enqueue_duration_fetch(self.links)
+        first = claim_tasks(2)
+        second = claim_tasks(10)
+        self.assertEqual(len(first), 2)
+        self.assertEqual(len(second), 2)
+        self.assertEqual(len({t.worker for t in first}), 1)
+        self.assertNotEqual(first[0].worker, second[0].worker)
+        self.assertFalse({t.pk for t in first} & {t.pk for t in second})
+        self.assertTrue(all(t.status == "running" and t.attempts == 1 for t in first + second))
+        self.assertEqual(claim_tasks(10), [])
+
+    def test_success_and_failure_are_written_and_counted(self):
+        job = enqueue_duration_fetch(self.links)
+        extractor = FakeExtractor({_video_id(0): 61, _video_id(1): 120})
+
+        ok, failed = process_batch(extractor=extractor, max_workers=2)
+
+        self.assertEqual((ok, failed), (2, 2))
+        job.refresh_from_db()
+        self.assertEqual((job.done_count, job.failed_count, job.status), (2, 2, "done"))
+        self.assertIsNotNone(job.finished_at)
+        durations = {lk.pk: lk.duration_seconds for lk in LessonLink.objects.all()}
+        self.assertEqual(durations[self.links[0].pk], 61)
+        self.assertEqual(durations[self.links[1].pk], 120)
+        self.assertIsNone(durations[self.links[2].pk])
+        failed_task = DurationFetchTask.objects.get(link=self.links[2])
+        self.assertEqual(failed_task.status, "failed")
+        self.assertIn("video unavailable", failed_task.error)
+        # ดึงไม่สำเร็จเก็บเป็น negative cache
+        self.assertFalse(VideoMetadata.objects.get(video_id=_video_id(2)).ok)
+
+    def test_same_video_is_fetched_once(self):
+        lesson = self.links[0].lesson
+        LessonLink.objects.create(lesson=lesson, title="dup", kind="youtube",
+                                  url=f"https://youtu.be/{_video_id(0)}")
+        enqueue_duration_fetch(LessonLink.objects.filter(url__contains=_video_id(0)))
+        extractor = FakeExtractor({_video_id(0): 30})
+        self.assertEqual(process_batch(extractor=extractor), (2, 0))
+        self.assertEqual(extractor.calls, [_video_id(0)])
+
+    def test_fresh_metadata_skips_the_extractor(self):
+        VideoMetadata.objects.create(video_id=_video_id(0), duration_seconds=45)
+        job = enqueue_duration_fetch(self.links[:1])
+        job.refresh_from_db()
+        self.assertEqual((job.done_count, job.status), (1, "done"))
+        self.assertEqual(process_batch(extractor=FakeExtractor({})), (0, 0))
+
+    def test_cache_hits_do_not_extend_the_ttl(self):
+        aged = timezone.now() - timedelta(days=29)
+        VideoMetadata.objects.create(video_id=_video_id(0), duration_seconds=45, fetched_at=aged)
+        extractor = FakeExtractor({_video_id(0): 90})
+
+        self.assertTrue(self.links[0].refresh_duration(extractor=extractor))
+        enqueue_duration_fetch(self.links[:1])
+        self.assertEqual(extractor.calls, [])
+        self.assertEqual(VideoMetadata.objects.get(video_id=_video_id(0)).fetched_at, aged)
+
+        # หมดอายุจริง (เกิน 30 วัน) → ดึงใหม่
+        VideoMetadata.objects.filter(video_id=_video_id(0)).update(fetched_at=aged - timedelta(days=2))
+        self.assertTrue(self.links[0].refresh_duration(extractor=extractor))
+        self.assertEqual(extractor.calls, [_video_id(0)])
+        self.links[0].refresh_from_db()
+        self.assertEqual(self.links[0].duration_seconds, 90)
+
+    def test_worker_cache_hits_do_not_extend_the_ttl(self):
+        aged = timezone.now() - timedelta(days=29)
+        enqueue_duration_fetch(self.links[:1])
+        VideoMetadata.objects.create(video_id=_video_id(0), duration_seconds=45, fetched_at=aged)
+        self.assertEqual(process_batch(extractor=FakeExtractor({})), (1, 0))
+        self.assertEqual(VideoMetadata.objects.get(video_id=_video_id(0)).fetched_at, aged)
+
+    def test_stale_running_tasks_are_requeued(self):
+        enqueue_duration_fetch(self.links[:2])
+        claimed = claim_tasks(1)
+        DurationFetchTask.objects.filter(pk=claimed[0].pk).update(
+            claimed_at=timezone.now() - timedelta(minutes=30)
+        )
+        self.assertEqual(requeue_stale(timeout_seconds=600), 1)
+        task = DurationFetchTask.objects.get(pk=claimed[0].pk)
+        self.assertEqual((task.status, task.worker), ("pending", ""))
+        # task ที่เพิ่งจองยังไม่หมดเวลา ไม่ถูกดึงคืน
+        claim_tasks(1)
+        self.assertEqual(requeue_stale(timeout_seconds=600), 0)
+
+        extractor = FakeExtractor({_video_id(0): 10, _video_id(1): 20})
+        self.assertEqual(process_batch(extractor=extractor), (1, 0))
+        self.assertEqual(DurationFetchTask.objects.get(pk=claimed[0].pk).attempts, 2)
+
+
+# -------------------------------------------
+# ลำดับบทเรียน prev/next/last (courses/services/lesson_sequence.py)
+# -------------------------------------------
+class LessonSequenceTests(CacheIsolatedTestCase):
+    def setUp(self):
+        super().setUp()
+        self.course = Course.objects.create(name="c", level="l", category="x")
+        other = Course.objects.create(name="other", level="l", category="x")
+        Lesson.objects.create(course=other, title="other course", order=2)
+        # สร้างสลับลำดับและ order เว้นช่วง — ต้องเรียงตาม order ไม่ใช่ id
+        self.lessons = [
+            Lesson.objects.create(course=self.course, title=title, order=order)
+            for title, order in [("d", 30), ("a", 1), ("c", 20), ("b", 5)]
+        ]
+        by_title = {lesson.title: lesson.id for lesson in self.lessons}
+        self.expected_order = [by_title[t] for t in ("a", "b", "c", "d")]
+
+    def _expected(self, lesson_id):
+        order = self.expected_order
+        i = order.index(lesson_id)
+        return {
+            "previous_lesson_id": order[i - 1] if i > 0 else None,
+            "next_lesson_id": order[i + 1] if i + 1 < len(order) else None,
+            "is_last_lesson": i == len(order) - 1,
+        }
+
+    def _sequence(self, data):
+        return {k: data[k] for k in ("previous_lesson_id", "next_lesson_id", "is_last_lesson")}
+
+    def test_course_detail_lessons(self):
+        lessons = self.client.get(f"/api/courses/{self.course.id}/").json()["lessons"]
+        self.assertEqual(sorted(lesson["id"] for lesson in lessons), sorted(self.expected_order))
+        for lesson in lessons:
+            with self.subTest(lesson=lesson["title"]):
+                self.assertEqual(self._sequence(lesson), self._expected(lesson["id"]))
+
+    def test_lesson_detail_matches_course_detail(self):
+        for lesson_id in self.expected_order:
+            with self.subTest(lesson=lesson_id):
+                data = self.client.get(f"/api/courses/{self.course.id}/lessons/{lesson_id}/").json()
+                self.assertEqual(self._sequence(data), self._expected(lesson_id))
+
+    def test_single_lesson_is_first_and_last(self):
+        course = Course.objects.create(name="solo", level="l", category="x")
+        lesson = Lesson.objects.create(course=course, title="only", order=1)
+        data = self.client.get(f"/api/courses/{course.id}/lessons/{lesson.id}/").json()
+        self.assertEqual(self._sequence(data),
+                         {"previous_lesson_id": None, "next_lesson_id": None, "is_last_lesson": True})
+
+
+# -------------------------------------------
+# ตัวนับความคืบหน้า CourseProgressSummary (courses/services/progress_summary.py)
+# -------------------------------------------
+class ProgressCounterTests(CacheIsolatedTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = get_user_model().objects.create_user("learner", password="pw")
+        self.client.force_login(self.user)
+        self.course = Course.objects.create(name="c", level="l", category="x")
+        self.lessons = [Lesson.objects.create(course=self.course, title=f"l{n}", order=n) for n in range(1, 5)]
+
+    def _complete(self, lesson):
+        return self.client.post(f"/api/courses/{self.course.id}/lessons/{lesson.id}/complete/").json()
+
+    def _count(self):
+        return CourseProgressSummary.objects.get(user=self.user, course=self.course).completed_count
+
+    def test_completing_twice_counts_once(self):
+        self._complete(self.lessons[0])
+        body = self._complete(self.lessons[0])
+        self._complete(self.lessons[1])
+        self.assertEqual(body["completed_lessons"], 1)
+        self.assertEqual(self._count(), 2)
+        progress = self.client.get(f"/api/courses/{self.course.id}/progress/").json()
+        self.assertEqual((progress["completed_lessons"], progress["total_lessons"], progress["percent"]),
+                         (2, 4, 50.0))
+
+    def test_single_row_delete_decrements(self):
+        for lesson in self.lessons[:3]:
+            self._complete(lesson)
+        LessonProgress.objects.get(user=self.user, lesson=self.lessons[0]).delete()
+        self.assertEqual(self._count(), 2)
+        # ลบบทเรียน → progress ถูกลบแบบ cascade ก็ต้อง -1 ด้วย
+        self.lessons[1].delete()
+        self.assertEqual(self._count(), 1)
+
+    def test_reset_sets_zero_with_one_counter_update(self):
+        for lesson in self.lessons:
+            self._complete(lesson)
+        with CaptureQueriesContext(connection) as ctx:
+            body = self.client.post(f"/api/courses/{self.course.id}/reset_progress/").json()
+        self.assertEqual(body["deleted_count"], 4)
+        self.assertEqual(self._count(), 0)
+        counter_updates = [q for q in ctx.captured_queries
+                           if q["sql"].startswith("UPDATE") and "courseprogresssummary" in q["sql"]]
+        self.assertEqual(len(counter_updates), 1)
+        # นับใหม่ได้ตามปกติหลัง reset
+        self._complete(self.lessons[0])
+        self.assertEqual(self._count(), 1)
+
+    def test_progress_list_reads_counters(self):
+        self._complete(self.lessons[0])
+        rows = self.client.get("/api/progress/", {"ids": self.course.id}).json()
+        self.assertEqual(rows, [{"course_id": self.course.id, "completed_lessons": 1, "total_lessons": 4,
+                                 "percent": 25.0}])
+
+
+# -------------------------------------------
+# CourseStats ที่ signals ดูแล (courses/services/course_stats.py)
+# -------------------------------------------
+class CourseStatsTests(CacheIsolatedTestCase):
+    def setUp(self):
+        super().setUp()
+        self.course = Course.objects.create(name="c", level="l", category="x")
+        self.other = Course.objects.create(name="other", level="l", category="x")
+
+    def _stats(self, course):
+        stats = CourseStats.objects.get(course=course)
+        return stats.lesson_count, stats.total_duration_seconds
+
+    def _link(self, lesson, seconds, role="main", kind="youtube"):
+        return LessonLink.objects.create(lesson=lesson, title="v", kind=kind, role=role,
+                                         url="https://www.youtube.com/watch?v=abcdefghijk",
+                                         duration_seconds=seconds)
+
+    def assertMatchesRebuild(self):
+        incremental = {c.id: self._stats(c) for c in (self.course, self.other)}
+        rebuild_course_stats()
+        self.assertEqual(incremental, {c.id: self._stats(c) for c in (self.course, self.other)})
+
+    def test_lesson_and_link_changes(self):
+        first = Lesson.objects.create(course=self.course, title="1", order=1)
+        second = Lesson.objects.create(course=self.course, title="2", order=2)
+        self.assertEqual(self._stats(self.course), (2, 0))
+
+        self._link(first, 100)
+        self._link(first, 50, role="sign")  # มี main แล้ว sign ไม่นับ
+        self._link(second, 30, role="sign")
+        self._link(second, 40, role="sign")  # ไม่มี main → รวมทุกลิงก์
+        self.assertEqual(self._stats(self.course), (2, 170))
+        self.assertMatchesRebuild()
+
+        link = first.links.get(role="main")
+        link.mark_duration(200)
+        self.assertEqual(self._stats(self.course), (2, 270))
+
+        link.delete()  # เหลือ sign 50 ของบทแรก
+        self.assertEqual(self._stats(self.course), (2, 120))
+        self.assertMatchesRebuild()
+
+    def test_moving_and_deleting_lessons(self):
+        lesson = Lesson.objects.create(course=self.course, title="1", order=1)
+        Lesson.objects.create(course=self.course, title="2", order=2)
+        self._link(lesson, 60)
+
+        lesson.course = self.other
+        lesson.save()
+        self.assertEqual(self._stats(self.course), (1, 0))
+        self.assertEqual(self._stats(self.other), (1, 60))
+
+        lesson.delete()  # ลิงก์ถูกลบแบบ cascade ด้วย
+        self.assertEqual(self._stats(self.other), (0, 0))
+        self.assertMatchesRebuild()
+
+    def test_course_summary_reads_stats(self):
+        lesson = Lesson.objects.create(course=self.course, title="1", order=1)
+        self._link(lesson, 90)
+        rows = {r["id"]: r for r in self.client.get("/api/courses-summary/").json()["results"]}
+        self.assertEqual(rows[self.course.id]["lesson_count"], 1)
+        self.assertEqual(rows[self.course.id]["total_duration_seconds"], 90)
+
+
+# -------------------------------------------
+# หน้าแคตตาล็อก: กรองที่ server + ตัวเลือก dropdown ของทั้งแคตตาล็อก
+# -------------------------------------------
+class CourseSummaryFilterTests(CacheIsolatedTestCase):
+    def setUp(self):
+        super().setUp()
+        for i in range(5):
+            Course.objects.create(name=f"Python {i}", level="ต้น", category="dev")
+        Course.objects.create(name="Design", level="กลาง", category="ux")
+
+    def test_filters_apply_across_pages(self):
+        first = self.client.get("/api/courses-summary/", {"level": "ต้น", "page_size": 2, "count": 1}).json()
+        self.assertEqual(first["count"], 5)
+        rows = first["results"]
+        url = first["next"]
+        while url:
+            page = self.client.get(url).json()
+            rows += page["results"]
+            url = page["next"]
+        self.assertEqual(len(rows), 5)
+        self.assertEqual({r["level"] for r in rows}, {"ต้น"})
+
+        body = self.client.get("/api/courses-summary/", {"q": "desi", "category": "ux", "count": 1}).json()
+        self.assertEqual([r["name"] for r in body["results"]], ["Design"])
+
+    def test_filter_options_cover_whole_catalogue(self):
+        body = self.client.get("/api/courses-summary/filters/").json()
+        self.assertEqual(body, {"levels": ["กลาง", "ต้น"], "categories": ["dev", "ux"]})
+
+        with self.captureOnCommitCallbacks(execute=True):  # เวอร์ชันแคตตาล็อกเพิ่มหลัง commit
+            Course.objects.create(name="Sign", level="สูง", category="sign")
+        body = self.client.get("/api/courses-summary/filters/").json()
+        self.assertIn("สูง", body["levels"])
+        self.assertIn("sign", body["categories"])
+
+
+# -------------------------------------------
+# ตรวจคำตอบหลายข้อในครั้งเดียว POST /api/quiz/check/
+# -------------------------------------------
+class QuizBatchCheckTests(CacheIsolatedTestCase):
+    def setUp(self):
+        super().setUp()
+        answer_keys._cache.clear()
+        course = Course.objects.create(name="c", level="l", category="x")
+        self.q1 = QuizQuestion.objects.create(course=course, prompt="1", words=["b", "a"], correct_order=["a", "b"])
+        self.q2 = QuizQuestion.objects.create(course=course, prompt="2", words=["y", "x"], correct_order=["x", "y"])
+
+    def _check(self, payload):
+        return self.client.post("/api/quiz/check/", payload, content_type="application/json")
+
+    def test_grades_each_answer_and_scores(self):
+        missing = self.q2.id + 100
+        body = self._check({"answers": {
+            str(self.q1.id): ["a", "b"], str(self.q2.id): ["y", "x"], str(missing): ["a"],
+        }}).json()
+        results = {r["question_id"]: r for r in body["results"]}
+        self.assertTrue(results[self.q1.id]["correct"])
+        self.assertFalse(results[self.q2.id]["correct"])
+        self.assertEqual(results[self.q2.id]["expected"], ["x", "y"])
+        self.assertEqual(results[missing]["error"], "not found")
+        # ข้อที่ไม่มีในระบบไม่นับใน total
+        self.assertEqual((body["score"], body["total"]), (1, 2))
+
+    def test_bare_mapping_is_accepted(self):
+        body = self._check({str(self.q1.id): ["a", "b"]}).json()
+        self.assertEqual((body["score"], body["total"]), (1, 1))
+
+    def test_rejects_bad_payloads(self):
+        self.assertEqual(self._check({"answers": {"abc": ["a"]}}).status_code, 400)
+        self.assertEqual(self._check({"answers": {}}).status_code, 400)
+        too_many = {str(i): ["a"] for i in range(1, 102)}
+        self.assertEqual(self._check({"answers": too_many}).status_code, 400)
+
+    def test_answer_keys_load_in_one_query_then_from_cache(self):
+        payload = {"answers": {str(self.q1.id): ["a", "b"], str(self.q2.id): ["x", "y"]}}
+        with self.assertNumQueries(1):
+            self.assertEqual(self._check(payload).json()["score"], 2)
+        with self.assertNumQueries(0):
+            self._check(payload)
+
+    def test_cache_counters_are_exported_to_prometheus(self):
+        def sample(name, **labels):
+            return REGISTRY.get_sample_value(name, labels) or 0.0
+
+        lookups = "deafability_answer_key_cache_lookups_total"
+        before = sample(lookups, result="hit"), sample(lookups, result="miss")
+        payload = {"answers": {str(self.q1.id): ["a", "b"], str(self.q2.id): ["x", "y"]}}
+        self._check(payload)
+        self._check(payload)
+        self.assertEqual(sample(lookups, result="hit") - before[0], 2)
+        self.assertEqual(sample(lookups, result="miss") - before[1], 2)
+
+        evictions = sample("deafability_answer_key_cache_evictions_total")
+        answer_keys.AnswerKeyCache(maxsize=1).get_many([self.q1.id, self.q2.id])
+        self.assertEqual(sample("deafability_answer_key_cache_evictions_total") - evictions, 1)
+
+        body = self.client.get("/metrics").content.decode()
+        self.assertIn('deafability_answer_key_cache_lookups_total{result="hit"}', body)
+        self.assertIn("deafability_answer_key_cache_evictions_total", body)
+
+    def test_edited_question_is_graded_with_new_key(self):
+        payload = {"answers": {str(self.q1.id): ["b", "a"]}}
+        self.assertEqual(self._check(payload).json()["score"], 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.q1.correct_order = ["b", "a"]
+            self.q1.save()
+        self.assertEqual(self._check(payload).json()["score"], 1)
+
+    def test_answer_key_is_dropped_only_after_commit(self):
+        answer_keys.get_answer_keys([self.q1.id, self.q2.id])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.q1.correct_order = ["b", "a"]
+            self.q1.save()
+            q2_id = self.q2.id
+            self.q2.delete()
+            # ยังไม่ commit → cache ยังไม่ถูกแตะ
+            self.assertIn(self.q1.id, answer_keys._cache._data)
+            self.assertIn(q2_id, answer_keys._cache._data)
+        self.assertNotIn(self.q1.id, answer_keys._cache._data)
+        self.assertNotIn(q2_id, answer_keys._cache._data)
+
+
+# -------------------------------------------
+# รายการคำถาม GET /api/quiz/questions/
+# -------------------------------------------
+class QuizListTests(CacheIsolatedTestCase):
+    URL = "/api/quiz/questions/"
+
+    def setUp(self):
+        super().setUp()
+        self.courses = [Course.objects.create(name=f"c{i}", level="l", category="x") for i in range(3)]
+        self._add_questions(6)
+
+    def _add_questions(self, n):
+        start = QuizQuestion.objects.count()
+        QuizQuestion.objects.bulk_create(
+            QuizQuestion(course=self.courses[i % 3], prompt=str(i), words=["b", "a"], correct_order=["a", "b"])
+            for i in range(start, start + n)
+        )
+
+    def test_fields_can_omit_the_answer(self):
+        rows = self.client.get(self.URL, {"fields": "id, prompt,words"}).json()
+        self.assertEqual(len(rows), 6)
+        self.assertEqual(set(rows[0]), {"id", "prompt", "words"})
+        # ไม่ใส่ fields → ได้ครบเหมือนเดิม
+        self.assertIn("correct_order", self.client.get(self.URL).json()[0])
+
+    def test_session_is_reproducible_by_seed(self):
+        first = self.client.get(self.URL, {"session": 4, "seed": 42}).json()
+        self.assertEqual((first["seed"], first["size"]), (42, 4))
+        self.assertNotIn("correct_order", first["results"][0])
+        self.assertEqual(first["results"][0]["course_name"][0], "c")
+        again = self.client.get(self.URL, {"session": 4, "seed": 42}).json()
+        self.assertEqual([q["id"] for q in again["results"]], [q["id"] for q in first["results"]])
+
+        # ไม่ส่ง seed → สุ่มให้และบอกกลับมา ใช้ซ้ำได้
+        drawn = self.client.get(self.URL, {"session": 3}).json()
+        replay = self.client.get(self.URL, {"session": 3, "seed": drawn["seed"]}).json()
+        self.assertEqual(replay["results"], drawn["results"])
+
+        self.assertEqual(self.client.get(self.URL, {"session": "x"}).status_code, 400)
+        self.assertEqual(self.client.get(self.URL, {"session": 2, "seed": "y"}).status_code, 400)
+
+    def test_session_query_count_does_not_grow(self):
+        # id ทั้งหมด 1 query + in_bulk พร้อม course 1 query
+        with self.assertNumQueries(2):
+            self.client.get(self.URL, {"session": 3, "seed": 1})
+        self._add_questions(30)
+        with self.assertNumQueries(2):
+            body = self.client.get(self.URL, {"session": 20, "seed": 1}).json()
+        self.assertEqual(body["size"], 20)
+
+    def test_course_name_without_n_plus_one(self):
+        with self.assertNumQueries(1):
+            rows = self.client.get(self.URL).json()
+        self.assertEqual({r["course_name"] for r in rows}, {"c0", "c1", "c2"})
+        self._add_questions(30)
+        with self.assertNumQueries(1):
+            self.assertEqual(len(self.client.get(self.URL).json()), 36)
+        with self.assertNumQueries(1):
+            rows = self.client.get(self.URL, {"course": self.courses[1].id}).json()
+        self.assertEqual({r["course_name"] for r in rows}, {"c1"})
+
+
+# -------------------------------------------
+# Conditional GET (courses/services/conditional.py)
+# -------------------------------------------
+class ConditionalGetTests(CacheIsolatedTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = get_user_model().objects.create_user("learner", password="pw")
+        self.client.force_login(self.user)
+        self.course = Course.objects.create(name="c", level="l", category="x")
+        self.lessons = [Lesson.objects.create(course=self.course, title=f"l{n}", order=n) for n in (1, 2)]
+
+    def _revalidate(self, url, first):
+        return self.client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+
+    def test_unchanged_resource_is_304(self):
+        url = f"/api/courses/{self.course.id}/"
+        first = self.client.get(url)
+        self.assertNotIn("Last-Modified", first)
+        self.assertEqual(self._revalidate(url, first).status_code, 304)
+
+    def test_reset_progress_invalidates(self):
+        url = f"/api/courses/{self.course.id}/"
+        self.client.post(f"/api/courses/{self.course.id}/lessons/{self.lessons[0].id}/complete/")
+        first = self.client.get(url)
+        self.assertTrue(first.json()["lessons"][0]["completed"])
+
+        self.client.post(f"/api/courses/{self.course.id}/reset_progress/")
+        again = self._revalidate(url, first)
+        self.assertEqual(again.status_code, 200)
+        self.assertFalse(any(lesson["completed"] for lesson in again.json()["lessons"]))
+        # client ที่ส่งแค่ If-Modified-Since ได้ข้อมูลใหม่เสมอ
+        stale = self.client.get(url, HTTP_IF_MODIFIED_SINCE="Fri, 01 Jan 2100 00:00:00 GMT")
+        self.assertEqual(stale.status_code, 200)
+
+    def test_deleting_a_lesson_invalidates_the_list(self):
+        first = self.client.get("/api/courses-list/")
+        self.lessons[1].delete()
+        self.assertEqual(self._revalidate("/api/courses-list/", first).status_code, 200)
+
+    def test_swapping_job_courses_invalidates_job_detail(self):
+        other = Course.objects.create(name="other", level="l", category="x")
+        job = Job.objects.create(title="j", position_type="dev")
+        job.courses.add(self.course)
+        url = f"/api/jobs/{job.id}/"
+        first = self.client.get(url)
+        self.assertEqual(self._revalidate(url, first).status_code, 304)
+        with self.captureOnCommitCallbacks(execute=True):
+            job.courses.set([other])
+        self.assertEqual(self._revalidate(url, first).status_code, 200)
+
+    def test_version_is_bumped_after_commit_only(self):
+        before = get_catalogue_version()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.course.name = "renamed"
+            self.course.save()
+            # ยังไม่ commit: request อื่นต้องยังเห็นเวอร์ชันเดิม (ไม่เก็บแถวเก่าไว้ใต้ key ใหม่)
+            self.assertEqual(get_catalogue_version(), before)
+        self.assertGreater(get_catalogue_version(), before)
+
+    def test_cached_body_follows_version_in_database(self):
+        url = f"/api/courses/{self.course.id}/"
+        self.assertEqual(self.client.get(url).json()["name"], "c")
+        # process อื่น (worker / cron บนเครื่องอื่น) แก้แถวแล้วเพิ่มเวอร์ชันใน DB โดยไม่แตะ cache ของเรา
+        Course.objects.filter(pk=self.course.pk).update(name="renamed")
+        bump_catalogue_version()
+        self.assertEqual(self.client.get(url).json()["name"], "renamed")
+
+
+# -------------------------------------------
+# manage.py refresh_durations (courses/services/lessonlink_duration.py)
+# -------------------------------------------
+class RefreshDurationsTests(CacheIsolatedTestCase):
+    def setUp(self):
+        super().setUp()
+        course = Course.objects.create(name="c", level="l", category="x")
+        lesson = Lesson.objects.create(course=course, title="t", order=1)
+        self.link = LessonLink.objects.create(lesson=lesson, title="v", kind="youtube",
+                                              url=f"https://www.youtube.com/watch?v={_video_id(1)}")
+
+    def _refresh(self, extractor):
+        return refresh_durations(stale_links(), extractor=extractor, rate=0, retries=0)
+
+    def test_failed_fetch_is_retried_after_negative_ttl(self):
+        stats = self._refresh(FakeExtractor({}))
+        self.assertEqual((stats["updated"], stats["failed"]), (0, 1))
+        self.link.refresh_from_db()
+        self.assertIsNone(self.link.duration_fetched_at)
+        self.assertEqual(list(stale_links()), [self.link])
+
+        # ยังอยู่ใน negative TTL → ไม่ยิง extractor ซ้ำ
+        extractor = FakeExtractor({_video_id(1): 75})
+        self._refresh(extractor)
+        self.assertEqual(extractor.calls, [])
+
+        VideoMetadata.objects.update(fetched_at=timezone.now() - timedelta(days=1))
+        stats = self._refresh(extractor)
+        self.assertEqual(stats["updated"], 1)
+        self.link.refresh_from_db()
+        self.assertEqual(self.link.duration_seconds, 75)
+        self.assertIsNotNone(self.link.duration_fetched_at)
+        self.assertEqual(list(stale_links()), [])
+
+
+# -------------------------------------------
+# ผู้ใช้ guest_dev (courses/services/guest.py)
+# -------------------------------------------
+class GuestUserTests(TestCase):
+    def setUp(self):
+        guest.reset_guest_user_cache()
+        self.addCleanup(guest.reset_guest_user_cache)
+
+    def test_created_without_usable_password(self):
+        user = guest.get_guest_user()
+        self.assertEqual(user.username, guest.GUEST_USERNAME)
+        self.assertFalse(user.has_usable_password())
+
+    def test_existing_usable_password_is_disabled_once(self):
+        get_user_model().objects.create_user(guest.GUEST_USERNAME, password="secret")
+
+        user = guest.get_guest_user()
+        self.assertFalse(user.has_usable_password())
+        self.assertFalse(get_user_model().objects.get(pk=user.pk).has_usable_password())
+
+        with self.assertNumQueries(0):
+            self.assertIs(guest.get_guest_user(), user)
+        guest.reset_guest_user_cache()
+        with self.assertNumQueries(1):  # ตั้งไว้แล้ว ไม่ต้องเขียนซ้ำ
+            guest.get_guest_user()
+
+
+# -------------------------------------------
+# SPA shell: 304 เฉพาะเมื่อ ETag ตรงกับ encoding ที่จะส่ง
+# -------------------------------------------
+class SpaIndexTests(TestCase):
+    def setUp(self):
+        workdir = tempfile.TemporaryDirectory()
+        self.addCleanup(workdir.cleanup)
+        path = os.path.join(workdir.name, "index.html")
+        with open(path, "w") as f:
+            f.write("<!doctype html><div id=\"root\"></div>" + "<script src=\"/static/js/main.js\"></script>" * 20)
+        settings_override = override_settings(SPA_INDEX_PATH=path)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        spa_shell._shell = None
+        self.addCleanup(setattr, spa_shell, "_shell", None)
+
+    def _get(self, accept_encoding, if_none_match=None):
+        headers = {"HTTP_ACCEPT_ENCODING": accept_encoding}
+        if if_none_match:
+            headers["HTTP_IF_NONE_MATCH"] = if_none_match
+        return self.client.get("/courses/1", **headers)
+
+    def test_revalidates_only_same_encoding(self):
+        gzip_etag = self._get("gzip")["ETag"]
+        identity_etag = self._get("identity")["ETag"]
+        self.assertNotEqual(gzip_etag, identity_etag)
+
+        self.assertEqual(self._get("gzip", gzip_etag).status_code, 304)
+        self.assertEqual(self._get("gzip", "W/" + gzip_etag).status_code, 304)
+        self.assertEqual(self._get("identity", identity_etag).status_code, 304)
+
+        # ETag ของ gzip ที่ cache ไว้ แต่รอบนี้ต้องส่ง identity → ต้องได้ body เต็ม
+        response = self._get("identity", gzip_etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["ETag"], identity_etag)
+        self.assertNotIn("Content-Encoding", response)
+        self.assertEqual(self._get("gzip", identity_etag).status_code, 200)
+
+
+# -------------------------------------------
+# manage.py bench: ทุก scenario ตอบได้ และทุก route ใน urls.py มี scenario
+# -------------------------------------------
+class BenchScenarioTests(TestCase):
+    def setUp(self):
+        workdir = tempfile.TemporaryDirectory()
+        self.addCleanup(workdir.cleanup)
+        index = os.path.join(workdir.name, "index.html")
+        with open(index, "w") as f:
+            f.write("<!doctype html><div id=\"root\"></div>")
+        settings_override = override_settings(
+            CACHES=LOCMEM_CACHES, MEDIA_ROOT=os.path.join(workdir.name, "media"), SPA_INDEX_PATH=index,
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        cache.clear()
+        spa_shell._shell = None
+        self.addCleanup(setattr, spa_shell, "_shell", None)
+
+    def test_every_scenario_succeeds_and_covers_all_routes(self):
+        dataset = bench.build_catalogue(courses=3, lessons=2, links=1, jobs=5, quiz=3)
+        staff = Client()
+        staff.force_login(dataset["staff"])
+        clients = {"anon": Client(), "staff": staff}
+
+        covered = set()
+        for scenario in bench.build_scenarios(dataset):
+            stats, routes = bench.run_scenario(scenario, clients, requests=2, warmup=0)
+            with self.subTest(scenario=scenario.name):
+                self.assertTrue(all(int(code) < 400 for code in stats["statuses"]), stats["statuses"])
+            covered |= routes
+        self.assertEqual(bench.uncovered_routes(covered), [])
+
+    def test_command_rejects_non_positive_sizes(self):
+        for name in ("courses", "lessons", "jobs", "quiz", "requests"):
+            with self.subTest(option=name), self.assertRaisesMessage(CommandError, f"--{name}"):
+                call_command("bench", **{name: 0})
+
+
+# -------------------------------------------
+# PerfMiddleware (PERF_HEADERS="staff"): ไม่โหลด session เองเพื่อตัดสินใส่ header
+# -------------------------------------------
+@override_settings(PERF_HEADERS="staff")
+class PerfHeadersTests(CacheIsolatedTestCase):
+    def setUp(self):
+        super().setUp()
+        answer_keys._cache.clear()
+        course = Course.objects.create(name="c", level="l", category="x")
+        self.question = QuizQuestion.objects.create(course=course, prompt="1", words=["b", "a"], correct_order=["a", "b"])
+
+    def _login(self, is_staff):
+        user = get_user_model().objects.create_user("u", password="pw", is_staff=is_staff)
+        self.client.force_login(user)
+
+    def test_auth_free_endpoints_do_not_touch_the_session(self):
+        self._login(is_staff=True)
+        payload = {"answers": {str(self.question.id): ["a", "b"]}}
+        self.client.post("/api/quiz/check/", payload, content_type="application/json")  # โหลดเฉลยเข้า cache
+        with self.assertNumQueries(0):
+            response = self.client.post("/api/quiz/check/", payload, content_type="application/json")
+        self.assertNotIn("Cookie", response.get("Vary", ""))
+        self.assertNotIn("Server-Timing", response)
+
+    def test_staff_gets_timings_where_the_user_was_resolved(self):
+        self._login(is_staff=True)
+        response = self.client.get("/api/courses-list/")
+        self.assertIn("serialize;dur=", response["Server-Timing"])
+        self.assertIn("X-DB-Queries", response)
+
+    def test_non_staff_gets_no_timings(self):
+        self._login(is_staff=False)
+        self.assertNotIn("Server-Timing", self.client.get("/api/courses-list/"))
+
+
+# -------------------------------------------
+# ดัชนีค้นหางาน (courses/services/job_search.py + signals)
+# -------------------------------------------
+class JobSearchTests(CacheIsolatedTestCase):
+    QUERIES = [
+        "พัฒนา", "ออกแบบ", "กรุงเทพ", "python", "PYTHON", "deaf works", "นัก ออกแบบ",
+        "ui/ux", "ข้อมูลภาษาไทย", "ux", "ui", "นั", "zzz",
+    ]
+
+    def setUp(self):
+        super().setUp()
+        self.python = Course.objects.create(name="Python เบื้องต้น", level="l", category="dev")
+        self.design = Course.objects.create(name="ออกแบบ UI/UX", level="l", category="ux")
+        self.dev = Job.objects.create(title="นักพัฒนาเว็บไซต์", company="Deaf Works", position_type="dev",
+                                      location="กรุงเทพฯ")
+        self.dev.courses.add(self.python)
+        self.artist = Job.objects.create(title="นักออกแบบกราฟิก", company="สยามดิจิทัล", position_type="design",
+                                         location="เชียงใหม่")
+        self.artist.courses.add(self.design)
+        self.clerk = Job.objects.create(title="Data Entry", company="Open Hands", position_type="admin",
+                                        description="พิมพ์ข้อมูล\u200bภาษาไทย")
+
+    def _search(self, q):
+        return set(job_search.search_jobs(Job.objects.all(), q).values_list("id", flat=True))
+
+    def _search_like(self, q):
+        with mock.patch.object(job_search, "has_fts", return_value=False):
+            return self._search(q)
+
+    def _icontains(self, q):
+        # พฤติกรรมเดิม (icontains ทุกฟิลด์ + ชื่อคอร์ส ครบทุกคำ) บนข้อความที่ normalize แล้ว
+        terms = job_search.query_terms(q)
+        return {
+            job.id for job in Job.objects.prefetch_related("courses")
+            if all(t in job_search.build_document(job, [c.name for c in job.courses.all()]) for t in terms)
+        }
+
+    def test_fts_and_like_match_icontains(self):
+        if not job_search.has_fts():
+            self.skipTest("SQLite นี้ไม่มี FTS5 trigram")
+        for q in self.QUERIES:
+            with self.subTest(q=q):
+                expected = self._icontains(q)
+                self.assertEqual(self._search(q), expected)
+                self.assertEqual(self._search_like(q), expected)
+
+    def test_thai_latin_and_short_terms(self):
+        self.assertEqual(self._search("พัฒนา"), {self.dev.id})
+        self.assertEqual(self._search("PyThOn"), {self.dev.id})  # จากชื่อคอร์ส
+        self.assertEqual(self._search("นัก ออกแบบ"), {self.artist.id})
+        self.assertEqual(self._search("ข้อมูลภาษาไทย"), {self.clerk.id})  # zero-width space ถูกตัด
+        # สั้นกว่า 3 ตัวอักษร → LIKE
+        self.assertEqual(self._search("ux"), {self.artist.id})
+        self.assertEqual(self._search("นั"), {self.dev.id, self.artist.id})
+        self.assertEqual(self._search("ux กราฟิก"), {self.artist.id})
+
+    def test_course_rename_updates_jobs(self):
+        self.python.name = "Django"
+        self.python.save()
+        self.assertEqual(self._search("django"), {self.dev.id})
+        self.assertEqual(self._search("python"), set())
+
+    def test_reverse_clear_and_add(self):
+        self.design.jobs.clear()
+        self.assertEqual(self._search("ui/ux"), set())
+        self.design.jobs.add(self.clerk)
+        self.assertEqual(self._search("ui/ux"), {self.clerk.id})
+
+    def test_deleting_course_and_job(self):
+        self.python.delete()
+        self.assertEqual(self._search("python"), set())
+        self.assertEqual(self._search("พัฒนา"), {self.dev.id})
+
+        clerk_id = self.clerk.id
+        self.clerk.delete()
+        self.assertEqual(self._search("data"), set())
+        if job_search.has_fts():
+            with connection.cursor() as cur:
+                cur.execute(f"SELECT COUNT(*) FROM {job_search.FTS_TABLE} WHERE rowid = %s", [clerk_id])
+                self.assertEqual(cur.fetchone()[0], 0)
+
+    def test_rebuild_restores_the_index(self):
+        JobSearchDocument.objects.all().delete()
+        if job_search.has_fts():
+            with connection.cursor() as cur:
+                cur.execute(f"DELETE FROM {job_search.FTS_TABLE}")
+        self.assertEqual(self._search("python"), set())
+
+        self.assertEqual(job_search.rebuild_job_search(), 3)
+        self.assertEqual(JobSearchDocument.objects.count(), 3)
+        for q in self.QUERIES:
+            with self.subTest(q=q):
+                self.assertEqual(self._search(q), self._icontains(q))
+
+
+# -------------------------------------------
+# LessonLink.save(): video_id / embed_url คำนวณจาก url
+# -------------------------------------------
+class LessonLinkVideoFieldsTests(CacheIsolatedTestCase):
+    def setUp(self):
+        super().setUp()
+        course = Course.objects.create(name="c", level="l", category="x")
+        self.lesson = Lesson.objects.create(course=course, title="t", order=1)
+
+    def _link(self, url, kind="youtube"):
+        return LessonLink.objects.create(lesson=self.lesson, title="v", kind=kind, url=url)
+
+    def _stored(self, link):
+        return LessonLink.objects.values_list("video_id", "embed_url").get(pk=link.pk)
+
+    def test_youtube_url_forms(self):
+        for url in (
+            "https://www.youtube.com/watch?v=abc123XYZ_-&t=10",
+            "https://youtu.be/abc123XYZ_-",
+            "https://youtube.com/shorts/abc123XYZ_-",
+            "https://www.youtube-nocookie.com/embed/abc123XYZ_-",
+        ):
+            with self.subTest(url=url):
+                self.assertEqual(self._stored(self._link(url)),
+                                 ("abc123XYZ_-", "https://www.youtube-nocookie.com/embed/abc123XYZ_-"))
+
+    def test_non_youtube_links_are_blank(self):
+        self.assertEqual(self._stored(self._link("https://example.com/watch?v=abc", kind="youtube")), ("", ""))
+        self.assertEqual(self._stored(self._link("https://youtu.be/abc", kind="external")), ("", ""))
+
+    def test_update_fields_including_url_also_writes_video_fields(self):
+        link = self._link("https://youtu.be/first")
+        link.url = "https://youtu.be/second"
+        link.save(update_fields=["url"])
+        self.assertEqual(self._stored(link)[0], "second")
+
+        link.kind = "external"
+        link.save(update_fields=["kind"])
+        self.assertEqual(self._stored(link), ("", ""))
+
+    def test_update_fields_without_url_leaves_video_fields_alone(self):
+        link = self._link("https://youtu.be/first")
+        with CaptureQueriesContext(connection) as ctx:
+            link.mark_duration(30)
+        update = next(q["sql"] for q in ctx.captured_queries if q["sql"].startswith("UPDATE"))
+        self.assertNotIn("video_id", update)
+        self.assertEqual(self._stored(link)[0], "first")
+
+
+# -------------------------------------------
+# เสิร์ฟ media (courses/services/media.py): 304 / Range / Cache-Control / ส่งต่อให้ proxy
+# -------------------------------------------
+class MediaResponseTests(TestCase):
+    HASHED = "course_covers/cover.3f2a9c1b7d4e.png"
+    PLAIN = "course_covers/old.png"
+    BODY = bytes(range(256)) * 4  # 1024 ไบต์
+
+    def setUp(self):
+        workdir = tempfile.TemporaryDirectory()
+        self.addCleanup(workdir.cleanup)
+        for name, body in ((self.HASHED, self.BODY), (self.PLAIN, self.BODY), ("empty.txt", b"")):
+            path = os.path.join(workdir.name, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "wb") as f:
+                f.write(body)
+        settings_override = override_settings(MEDIA_ROOT=workdir.name, MEDIA_CACHE_MAX_AGE=600,
+                                              MEDIA_ACCEL_REDIRECT="", MEDIA_X_SENDFILE=False)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.root = workdir.name
+
+    def _get(self, name, **headers):
+        return self.client.get(f"/media/{name}", **headers)
+
+    def test_parse_range(self):
+        self.assertEqual(media.parse_range("bytes=0-99", 1024), (0, 99))
+        self.assertEqual(media.parse_range("bytes=1000-", 1024), (1000, 1023))
+        self.assertEqual(media.parse_range("bytes=-24", 1024), (1000, 1023))
+        self.assertEqual(media.parse_range("bytes=-5000", 1024), (0, 1023))
+        self.assertEqual(media.parse_range("bytes=0-5000", 1024), (0, 1023))
+        self.assertIsNone(media.parse_range("bytes=0-1,5-9", 1024))
+        self.assertIsNone(media.parse_range("items=0-1", 1024))
+        for header, size in (("bytes=1024-", 1024), ("bytes=-0", 1024), ("bytes=-10", 0), ("bytes=0-", 0)):
+            with self.subTest(header=header, size=size):
+                with self.assertRaises(media.RangeNotSatisfiable):
+                    media.parse_range(header, size)
+
+    def test_cache_control_depends_on_hashed_name(self):
+        self.assertEqual(self._get(self.HASHED)["Cache-Control"], media.IMMUTABLE)
+        self.assertEqual(self._get(self.HASHED)["ETag"], '"3f2a9c1b7d4e"')
+        self.assertEqual(self._get(self.PLAIN)["Cache-Control"], "public, max-age=600")
+
+    def test_if_none_match_is_304(self):
+        etag = self._get(self.PLAIN)["ETag"]
+        response = self._get(self.PLAIN, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+        self.assertEqual(self._get(self.PLAIN, HTTP_IF_NONE_MATCH="W/" + etag).status_code, 304)
+        self.assertEqual(self._get(self.PLAIN, HTTP_IF_NONE_MATCH='"other"').status_code, 200)
+
+    def test_range_206_and_416(self):
+        response = self._get(self.HASHED, HTTP_RANGE="bytes=10-19")
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response["Content-Range"], "bytes 10-19/1024")
+        self.assertEqual(response["Content-Length"], "10")
+        self.assertEqual(b"".join(response.streaming_content), self.BODY[10:20])
+
+        response = self._get(self.HASHED, HTTP_RANGE="bytes=2000-")
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response["Content-Range"], "bytes */1024")
+
+        response = self._get("empty.txt", HTTP_RANGE="bytes=-10")
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response["Content-Range"], "bytes */0")
+
+    def test_if_range(self):
+        etag = self._get(self.HASHED)["ETag"]
+        self.assertEqual(self._get(self.HASHED, HTTP_RANGE="bytes=0-9", HTTP_IF_RANGE=etag).status_code, 206)
+        # ETag ไม่ตรง (ไฟล์เปลี่ยน) → ส่งทั้งไฟล์
+        response = self._get(self.HASHED, HTTP_RANGE="bytes=0-9", HTTP_IF_RANGE='"stale"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b"".join(response.streaming_content), self.BODY)
+
+    def test_proxy_handoff(self):
+        with override_settings(MEDIA_ACCEL_REDIRECT="/_media/"):
+            response = self._get(self.HASHED)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["X-Accel-Redirect"], f"/_media/{self.HASHED}")
+        self.assertEqual(response.content, b"")
+        self.assertEqual(response["Cache-Control"], media.IMMUTABLE)
+
+        with override_settings(MEDIA_X_SENDFILE=True):
+            response = self._get(self.PLAIN)
+        self.assertEqual(response["X-Sendfile"], os.path.join(self.root, self.PLAIN))
+        self.assertEqual(response.content, b"")
+
+    def test_path_outside_media_root_is_404(self):
+        self.assertEqual(self._get("../settings.py").status_code, 404)
+        self.assertEqual(self._get("missing.png").status_code, 404)
+
+
+# -------------------------------------------
+# รูปย่อ (courses/services/images.py)
+# -------------------------------------------
+@override_settings(IMAGE_VARIANT_WIDTHS=(100, 400), MEDIA_CACHE_MAX_AGE=600)
+class ImageVariantTests(CacheIsolatedTestCase):
+    def setUp(self):
+        super().setUp()
+        workdir = tempfile.TemporaryDirectory()
+        self.addCleanup(workdir.cleanup)
+        settings_override = override_settings(MEDIA_ROOT=workdir.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        buf = BytesIO()
+        Image.new("RGBA", (300, 150), (200, 30, 30, 128)).save(buf, "PNG")
+        self.name = default_storage.save("course_covers/cover.png", ContentFile(buf.getvalue()))
+
+    def _size(self, name):
+        with default_storage.open(name) as f:
+            img = Image.open(f)
+            return img.size, img.mode
+
+    def test_generate_variants(self):
+        written = images.generate_variants(self.name)
+        self.assertEqual(sorted(written), sorted(
+            images.variant_name(self.name, w, fmt) for w in (100, 400) for fmt in ("webp", "jpg")
+        ))
+        self.assertEqual(self._size(images.variant_name(self.name, 100, "jpg")), ((100, 50), "RGB"))
+        # เล็กกว่าความกว้างที่ขอ → ไม่ขยาย
+        self.assertEqual(self._size(images.variant_name(self.name, 400, "webp"))[0], (300, 150))
+
+        self.assertEqual(images.generate_variants(self.name), [])
+        self.assertEqual(len(images.generate_variants(self.name, force=True)), 4)
+
+    def test_ensure_variant_validates_the_path(self):
+        self.assertEqual(images.ensure_variant(f"{self.name}.100w.webp"), images.variant_name(self.name, 100, "webp"))
+        self.assertTrue(default_storage.exists(images.variant_name(self.name, 100, "webp")))
+        for path in (
+            f"{self.name}.200w.webp",            # ความกว้างที่ไม่อนุญาต
+            f"{self.name}.100w.gif",             # format ที่ไม่มี
+            f"../{self.name}.100w.webp",         # ออกนอก MEDIA_ROOT
+            f"/etc/passwd.100w.jpg",
+            f"variants/{self.name}.100w.webp.100w.webp",  # variant ของ variant
+            "course_covers/missing.png.100w.webp",
+            self.name,
+        ):
+            with self.subTest(path=path):
+                self.assertIsNone(images.ensure_variant(path))
+
+    def test_srcset_in_api(self):
+        course = Course.objects.create(name="c", level="l", category="x", cover=self.name)
+        data = self.client.get(f"/api/courses/{course.id}/").json()
+        base = f"http://testserver/media/variants/{self.name}"
+        self.assertEqual(data["cover_srcset"], {
+            "webp": f"{base}.100w.webp 100w, {base}.400w.webp 400w",
+            "jpg": f"{base}.100w.jpg 100w, {base}.400w.jpg 400w",
+        })
+        summary = self.client.get("/api/courses-summary/").json()["results"][0]
+        self.assertEqual(summary["cover_srcset"], data["cover_srcset"])
+
+    def test_variants_are_not_immutable(self):
+        url = f"/media/variants/{self.name}.100w.webp"
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first["Cache-Control"], "public, max-age=600")
+        # ต้นฉบับ (ชื่อมี hash ของตัวเอง) ยัง immutable
+        self.assertEqual(self.client.get(f"/media/{self.name}")["Cache-Control"], media.IMMUTABLE)
+
+        os.utime(default_storage.path(images.variant_name(self.name, 100, "webp")), ns=(1, 1))
+        images.generate_variants(self.name, widths=[100], formats=["webp"], force=True)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=first["ETag"]).status_code, 200)
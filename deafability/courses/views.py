@@ -1,35 +1,83 @@
 # views.py
 from rest_framework import viewsets ,status
 from rest_framework.response import Response
+from django.conf import settings
 from django.shortcuts import get_object_or_404
-from .models import Course, Lesson, LessonProgress, Job ,QuizQuestion
-from .serializers import CourseSerializer, LessonSerializer, CourseProgressSerializer, JobSerializer ,QuizQuestionSerializer, QuizCheckSerializer
-from django.utils import timezone
+from django.http import Http404, HttpResponse, HttpResponseForbidden, HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+from django.utils.crypto import constant_time_compare
+from django.utils.http import parse_etags
+from .models import Course, Lesson, LessonProgress, Job ,QuizQuestion, CourseProgressSummary
+from .serializers import CourseSerializer, LessonSerializer, CourseProgressSerializer, JobSerializer ,QuizQuestionSerializer, QuizCheckSerializer, QuizBatchCheckSerializer, CourseSummarySerializer
 from rest_framework.decorators import api_view, permission_classes, authentication_classes
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.permissions import AllowAny, IsAuthenticated, IsAdminUser
 from django.views.decorators.csrf import ensure_csrf_cookie
-from django.db.models import Q
+from django.views.decorators.http import condition, require_safe
+from django.utils.decorators import method_decorator
+from django.db.models import Prefetch, OuterRef, Subquery, IntegerField
+from django.db.models.functions import Coalesce, Substr
 from rest_framework.generics import ListAPIView, RetrieveAPIView
+from rest_framework.pagination import PageNumberPagination
 
 
 from django.contrib.auth import get_user_model
+from .services.durations import annotate_lesson_durations
+from .services.course_stats import annotate_course_stats, get_course_stats
+from .services.progress_summary import mark_lesson_completed, get_completed_count, clear_course_progress
+from .services.guest import resolve_progress_user
+from .services.job_search import search_jobs
+from .services.quiz import sample_questions, grade_answers, is_correct
+from .services.answer_keys import get_answer_key
+from .services.images import ensure_variant
+from .services.media import media_response
+from .services import metrics, perf
+from .services.spa_shell import get_shell, choose_encoding, representation_etag, CACHE_CONTROL as SPA_CACHE_CONTROL
+from .pagination import KeysetPagination
+from .services import catalogue_cache
+from .services.conditional import (
+    course_list_etag, course_detail_etag, lesson_detail_etag, job_list_etag, job_detail_etag,
+)
 
 User = get_user_model()
 
-# helper: คืน user ที่จะใช้ (จริงหรือ guest)
-def _get_or_create_dev_guest_user():
-    """
-    คืน user ที่ล็อกอินถ้ามี ถ้าไม่มีก็หา/สร้าง user ชื่อ 'guest_dev' แบบไม่ต้องพาสเวิร์ด
-    เฉพาะสำหรับ dev/testing เท่านั้น — ห้ามใช้ใน production
-    """
-    try:
-        # ถ้ามี request.user ที่ authenticated ให้ใช้
-        # (เราเรียก helper จากภายใน view และส่ง request.user ถ้ามี)
-        # แต่ helper นี้ไม่เห็น request, ดังนั้น caller ควรตรวจก่อนเรียก
-        # ใน view ด้านล่างเราจะตรวจและใช้ request.user ถ้า authenticated
-        return None
-    except Exception:
-        return None
+# helper: queryset คอร์สพร้อม lessons/links, duration ต่อบทจาก DB และยอดรวมจาก CourseStats
+def _course_queryset():
+    lessons = annotate_lesson_durations(Lesson.objects.all())
+    return annotate_course_stats(Course.objects.all()).prefetch_related(
+        Prefetch('lessons', queryset=lessons),
+        'lessons__links',
+    )
+
+# helper: set ของ lesson id ที่ user เรียนจบแล้ว (1 query ต่อ request) สำหรับ serializer context
+def _completed_lesson_ids(request, course_ids=None):
+    user = getattr(request, 'user', None)
+    if not user or not user.is_authenticated:
+        return set()
+    qs = LessonProgress.objects.filter(user=user, completed=True)
+    if course_ids is not None:
+        qs = qs.filter(course_id__in=course_ids)
+    return set(qs.values_list('lesson_id', flat=True))
+
+
+# helper: serializer.data พร้อมจับเวลาเข้า span "serialize" ของ /api/_perf/
+def _serialized(serializer):
+    with perf.span("serialize"):
+        return serializer.data
+
+
+class _SerializeSpanMixin:
+    """list / retrieve ของ generic view ที่จับเวลา serialize ด้วย (เหมือนของ DRF ทุกอย่าง)"""
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(_serialized(self.get_serializer(page, many=True)))
+        return Response(_serialized(self.get_serializer(queryset, many=True)))
+
+    def retrieve(self, request, *args, **kwargs):
+        return Response(_serialized(self.get_serializer(self.get_object())))
+
 
 # -------------------------------------------
 # CSRF bootstrap (for frontend)
@@ -49,51 +97,125 @@ def csrf_bootstrap(request):
 def reset_course_progress(request, course_id):
     user = request.user
     course = get_object_or_404(Course, id=course_id)
-    deleted, _ = LessonProgress.objects.filter(user=user, course=course).delete()
+    deleted = clear_course_progress(user, course)
     return Response({'ok': True, 'deleted_count': deleted})
 
 
 # -------------------------------------------
 # Course ViewSet (for DRF router)
 # -------------------------------------------
-class CourseViewSet(viewsets.ModelViewSet):
+class CourseViewSet(_SerializeSpanMixin, viewsets.ModelViewSet):
     queryset = Course.objects.all()
     serializer_class = CourseSerializer
+    pagination_class = KeysetPagination
+
+    def get_queryset(self):
+        return _course_queryset()
+
+    @method_decorator(condition(etag_func=course_detail_etag))
+    def retrieve(self, request, *args, **kwargs):
+        pk = self.kwargs[self.lookup_field]
+        if not str(pk).isdigit():
+            raise Http404
+        return Response(_course_payload(request, int(pk)))
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        pk = self.kwargs.get(self.lookup_url_kwarg or self.lookup_field)
+        context['completed_lesson_ids'] = _completed_lesson_ids(
+            self.request, [pk] if pk is not None else None
+        )
+        return context
 
 
 # -------------------------------------------
-# Course list and detail (API)
+# Course list (API) — รายละเอียดคอร์สอยู่ที่ CourseViewSet.retrieve (router ได้ /api/courses/<pk>/)
 # -------------------------------------------
+# ส่วนที่ไม่ขึ้นกับ user ถูก cache ตามเวอร์ชันแคตตาล็อก แล้วเติม completed ของ user ทีหลัง
+def _catalogue_context(request):
+    return {'request': request, 'completed_lesson_ids': set()}
+
+
+def _course_payload(request, course_id):
+    def build():
+        course = get_object_or_404(_course_queryset(), id=course_id)
+        return _serialized(CourseSerializer(course, context=_catalogue_context(request)))
+
+    data = catalogue_cache.get_or_build('course:%s' % course_id, request, build)
+    completed = _completed_lesson_ids(request, [data['id']])
+    return catalogue_cache.merge_completed(data, completed) if completed else data
+
+
 @api_view(['GET'])
+@condition(etag_func=course_list_etag)
 def course_list(request):
-    qs = (Course.objects
-          .prefetch_related('lessons__links')   # สำคัญ: ให้รวมคอลัมน์ใหม่มาด้วย
-          .order_by('-created_at'))
-    data = CourseSerializer(qs, many=True, context={'request': request}).data
+    def build():
+        courses = _course_queryset().order_by('-created_at')
+        return list(_serialized(CourseSerializer(courses, many=True, context=_catalogue_context(request))))
+
+    data = catalogue_cache.get_or_build('list', request, build)
+    completed = _completed_lesson_ids(request, [c['id'] for c in data])
+    if completed:
+        data = [catalogue_cache.merge_completed(c, completed) for c in data]
     return Response(data)
 
 
+# -------------------------------------------
+# Course summary (การ์ดคอร์ส: อ่านจาก CourseStats, 1 query + COUNT ของ pagination)
+# -------------------------------------------
+class CourseSummaryListAPIView(_SerializeSpanMixin, ListAPIView):
+    permission_classes = [AllowAny]
+    serializer_class = CourseSummarySerializer
+    pagination_class = KeysetPagination
+
+    def get_queryset(self):
+        qs = annotate_course_stats(
+            Course.objects
+            .order_by('-created_at', '-id')
+            .values('id', 'name', 'level', 'category', 'cover', 'created_at', 'updated_at')
+            .annotate(description=Substr('description', 1, 200))
+        )
+
+        q = self.request.query_params.get("q")
+        level = self.request.query_params.get("level")
+        category = self.request.query_params.get("category")
+        if q:
+            qs = qs.filter(name__icontains=q)
+        if level:
+            qs = qs.filter(level=level)
+        if category:
+            qs = qs.filter(category=category)
+        return qs
+
+
+# ตัวเลือก dropdown ระดับ/สายงานของหน้าแคตตาล็อก (ทั้งแคตตาล็อก ไม่ใช่แค่หน้าที่โหลดแล้ว)
 @api_view(['GET'])
-def course_detail(request, course_id):
-    course = get_object_or_404(
-        Course.objects.prefetch_related('lessons__links'),
-        id=course_id
-    )
-    ser = CourseSerializer(course, context={'request': request})
-    return Response(ser.data)
+@permission_classes([AllowAny])
+def course_filters(request):
+    def build():
+        return {
+            'levels': list(Course.objects.order_by('level').values_list('level', flat=True).distinct()),
+            'categories': list(Course.objects.order_by('category').values_list('category', flat=True).distinct()),
+        }
+
+    return Response(catalogue_cache.get_or_build('filters', request, build))
 
 
 # -------------------------------------------
 # Lesson detail (include course video URL)
 # -------------------------------------------
 @api_view(['GET'])
+@condition(etag_func=lesson_detail_etag)
 def lesson_detail(request, course_id, lesson_id):
     lesson = get_object_or_404(
-        Lesson.objects.select_related('course').prefetch_related('links'),
+        annotate_lesson_durations(Lesson.objects.select_related('course').prefetch_related('links')),
         id=lesson_id, course_id=course_id
     )
-    ser = LessonSerializer(lesson, context={'request': request})
-    return Response(ser.data)
+    context = {
+        'request': request,
+        'completed_lesson_ids': _completed_lesson_ids(request, [lesson.course_id]),
+    }
+    return Response(_serialized(LessonSerializer(lesson, context=context)))
 
 
 # -------------------------------------------
@@ -115,33 +237,17 @@ def enroll_course(request, course_id):
 @api_view(['POST'])
 @permission_classes([AllowAny])  # ระหว่าง dev ให้เปิดไว้
 def lesson_complete(request, course_id, lesson_id):
-    # ใช้ user ที่ล็อกอิน ถ้าไม่มี ให้หา/สร้าง guest_dev
-    if getattr(request, 'user', None) and request.user.is_authenticated:
-        user = request.user
-    else:
-        User = get_user_model()
-        user, _ = User.objects.get_or_create(
-            username='guest_dev',
-            defaults={'is_active': True}
-        )
-        # ให้พาสเวิร์ด unusable เพื่อความปลอดภัย (ถ้ามีไปสร้างผ่าน shell)
-        try:
-            user.set_unusable_password()
-            user.save(update_fields=['password'])
-        except Exception:
-            pass
+    # ใช้ user ที่ล็อกอิน ถ้าไม่มี ให้ใช้ guest_dev (cache ต่อ process ไม่เขียน DB ซ้ำ)
+    user = resolve_progress_user(request)
 
-    course = get_object_or_404(Course, id=course_id)
+    course = get_object_or_404(Course.objects.select_related('stats'), id=course_id)
     lesson = get_object_or_404(Lesson, id=lesson_id, course=course)
 
-    obj, _ = LessonProgress.objects.get_or_create(user=user, course=course, lesson=lesson)
-    obj.completed = True
-    obj.completed_at = timezone.now()
-    obj.save()
+    mark_lesson_completed(user, course, lesson)
 
-    # คำนวณ progress ใหม่
-    total_lessons = Lesson.objects.filter(course=course).count()
-    completed_lessons = LessonProgress.objects.filter(user=user, course=course, completed=True).count()
+    # คำนวณ progress ใหม่ (อ่านจากตัวนับ ไม่ COUNT)
+    total_lessons = get_course_stats(course).lesson_count
+    completed_lessons = min(get_completed_count(user, course), total_lessons)
     percent = (completed_lessons / total_lessons * 100.0) if total_lessons else 0.0
 
     return Response({
@@ -159,23 +265,11 @@ def lesson_complete(request, course_id, lesson_id):
 @api_view(['GET'])
 @permission_classes([AllowAny])  # ระหว่าง dev ให้เปิดไว้
 def course_progress(request, course_id):
-    if getattr(request, 'user', None) and request.user.is_authenticated:
-        user = request.user
-    else:
-        User = get_user_model()
-        user, _ = User.objects.get_or_create(
-            username='guest_dev',
-            defaults={'is_active': True}
-        )
-        try:
-            user.set_unusable_password()
-            user.save(update_fields=['password'])
-        except Exception:
-            pass
+    user = resolve_progress_user(request)
 
-    course = get_object_or_404(Course, id=course_id)
-    total_lessons = Lesson.objects.filter(course=course).count()
-    completed_lessons = LessonProgress.objects.filter(user=user, course=course, completed=True).count()
+    course = get_object_or_404(Course.objects.select_related('stats'), id=course_id)
+    total_lessons = get_course_stats(course).lesson_count
+    completed_lessons = min(get_completed_count(user, course), total_lessons)
     percent = (completed_lessons / total_lessons * 100.0) if total_lessons else 0.0
 
     return Response({
@@ -185,24 +279,66 @@ def course_progress(request, course_id):
         'percent': round(percent, 2)
     })
 
+# -------------------------------------------
+# Progress (ทุกคอร์ส หรือเฉพาะ ?ids=1,2,3) — 1 query
+# -------------------------------------------
+@api_view(['GET'])
+@permission_classes([AllowAny])  # ระหว่าง dev ให้เปิดไว้
+def progress_list(request):
+    user = resolve_progress_user(request)
+
+    completed = Subquery(
+        CourseProgressSummary.objects
+        .filter(user=user, course=OuterRef('pk'))
+        .values('completed_count')[:1],
+        output_field=IntegerField(),
+    )
+    qs = annotate_course_stats(Course.objects.order_by('-created_at', '-id').values('id'))
+    qs = qs.annotate(completed=Coalesce(completed, 0))
+
+    ids = request.query_params.get('ids')
+    if ids:
+        try:
+            qs = qs.filter(id__in=[int(x) for x in ids.split(',') if x.strip()])
+        except ValueError:
+            return Response({'detail': 'ids ต้องเป็นตัวเลขคั่นด้วย ,'}, status=status.HTTP_400_BAD_REQUEST)
+
+    rows = []
+    for row in qs:
+        total = row['lesson_count'] or 0
+        done = min(row['completed'], total)
+        rows.append({
+            'course_id': row['id'],
+            'completed_lessons': done,
+            'total_lessons': total,
+            'percent': round(done / total * 100.0, 2) if total else 0.0,
+        })
+    return Response(_serialized(CourseProgressSerializer(rows, many=True)))
+
+
 # -------------------------------------------
 # Jobs API
 # -------------------------------------------
-class JobListAPIView(ListAPIView):
+@method_decorator(condition(etag_func=job_list_etag), name='get')
+class JobListAPIView(_SerializeSpanMixin, ListAPIView):
     permission_classes = [AllowAny]
     serializer_class = JobSerializer
 
+    @property
+    def pagination_class(self):
+        # ผลค้นหาเรียงตามความตรง ไม่ใช่ created_at → keyset ใช้ไม่ได้ กลับไปใช้เลขหน้า
+        if self.request.query_params.get("q"):
+            return PageNumberPagination
+        return KeysetPagination
+
     def get_queryset(self):
         qs = Job.objects.prefetch_related("courses").order_by("-created_at")
         q = self.request.query_params.get("q")
         pos = self.request.query_params.get("position_type")
 
         if q:
-            qs = qs.filter(
-                Q(title__icontains=q) |
-                Q(description__icontains=q) |
-                Q(courses__name__icontains=q)
-            ).distinct()
+            # ค้นจากดัชนี (รวมชื่อคอร์สไว้แล้ว) เรียงตามความตรง — ดู services/job_search.py
+            qs = search_jobs(qs, q)
 
         if pos:
             qs = qs.filter(position_type__icontains=pos)
@@ -210,7 +346,8 @@ class JobListAPIView(ListAPIView):
         return qs
 
 
-class JobDetailAPIView(RetrieveAPIView):
+@method_decorator(condition(etag_func=job_detail_etag), name='get')
+class JobDetailAPIView(_SerializeSpanMixin, RetrieveAPIView):
     permission_classes = [AllowAny]
     serializer_class = JobSerializer
     queryset = Job.objects.prefetch_related("courses").all()
@@ -227,12 +364,39 @@ class JobDetailAPIView(RetrieveAPIView):
 @authentication_classes([])               
 @permission_classes([AllowAny])
 def quiz_list(request):
+    """
+    ?course=<id>                 เฉพาะคอร์ส
+    ?fields=id,prompt,words      เลือกฟิลด์ (ไม่ใส่ correct_order = ไม่ส่งเฉลยไปหน้าเว็บ)
+    ?cursor= / ?page_size=       แบ่งหน้าแบบ keyset (ไม่ใส่ = ส่งทั้งหมดเหมือนเดิม)
+    ?session=<n>[&seed=<s>]      สุ่มชุดคำถาม n ข้อ (ค่าเริ่มต้นไม่มีเฉลย) query คงที่
+    """
     course_id = request.GET.get("course")
-    qs = QuizQuestion.objects.all()
+    fields = [f.strip() for f in request.GET.get("fields", "").split(",") if f.strip()] or None
+    qs = QuizQuestion.objects.select_related("course").order_by("-created_at", "-id")
     if course_id:
         qs = qs.filter(course_id=course_id)
-    data = QuizQuestionSerializer(qs, many=True).data
-    return Response(data)
+
+    session = request.GET.get("session")
+    if session is not None:
+        try:
+            size = int(session)
+            seed = int(request.GET["seed"]) if request.GET.get("seed") else None
+        except ValueError:
+            return Response({"detail": "session/seed ต้องเป็นตัวเลข"}, status=status.HTTP_400_BAD_REQUEST)
+        seed, questions = sample_questions(qs, size, seed)
+        fields = fields or ["id", "prompt", "words", "course", "course_name"]
+        return Response({
+            "seed": seed,
+            "size": len(questions),
+            "results": _serialized(QuizQuestionSerializer(questions, many=True, fields=fields)),
+        })
+
+    # แบ่งหน้าเฉพาะเมื่อขอ (หน้าเว็บเดิมโหลดทั้งหมดต่อคอร์ส)
+    if "cursor" in request.GET or "page_size" in request.GET:
+        paginator = KeysetPagination()
+        page = paginator.paginate_queryset(qs, request)
+        return paginator.get_paginated_response(_serialized(QuizQuestionSerializer(page, many=True, fields=fields)))
+    return Response(_serialized(QuizQuestionSerializer(qs, many=True, fields=fields)))
 
 
 @api_view(["GET"])
@@ -243,15 +407,15 @@ def quiz_detail(request, pk):
         q = QuizQuestion.objects.get(pk=pk)
     except QuizQuestion.DoesNotExist:
         return Response({"detail": "Not found"}, status=404)
-    return Response(QuizQuestionSerializer(q).data)
+    return Response(_serialized(QuizQuestionSerializer(q)))
 
 @api_view(["POST"])
 @authentication_classes([])
 @permission_classes([AllowAny])
 def quiz_check(request, pk):
-    try:
-        q = QuizQuestion.objects.get(pk=pk)
-    except QuizQuestion.DoesNotExist:
+    # อ่านเฉลยจาก cache ในหน่วยความจำ ไม่ต้องโหลดทั้งแถวจาก DB
+    expected = get_answer_key(pk)
+    if expected is None:
         return Response({"detail": "Not found"}, status=404)
 
     ser = QuizCheckSerializer(data=request.data)
@@ -259,11 +423,93 @@ def quiz_check(request, pk):
     answer = ser.validated_data["answer"]
 
 
-    correct = list(answer) == list(q.correct_order or [])
+    correct = is_correct(answer, expected)
 
     return Response({
-        "question_id": q.id,
+        "question_id": pk,
         "correct": correct,
-        "expected": q.correct_order,
+        "expected": list(expected),
         "your_answer": answer,
-    }, status=status.HTTP_200_OK)
\ No newline at end of file
+    }, status=status.HTTP_200_OK)
+
+@api_view(["POST"])
+@authentication_classes([])
+@permission_classes([AllowAny])
+def quiz_check_batch(request):
+    """
+    ตรวจหลายข้อในครั้งเดียว: {"answers": {question_id: [...]}} (หรือส่ง mapping ตรง ๆ ก็ได้)
+    คืนผลรายข้อ + คะแนนรวม
+    """
+    data = request.data
+    if "answers" not in data:
+        data = {"answers": data}
+    ser = QuizBatchCheckSerializer(data=data)
+    ser.is_valid(raise_exception=True)
+    return Response(grade_answers(ser.validated_data["answers"]), status=status.HTTP_200_OK)
+
+
+# -------------------------------------------
+# รูปย่อ (variants) — สร้างครั้งแรกที่มีคนขอ แล้วเก็บลงดิสก์
+# -------------------------------------------
+def media_variant(request, path):
+    name = ensure_variant(path)
+    if name is None:
+        raise Http404("variant not found")
+    return media_response(request, name)
+
+
+# -------------------------------------------
+# Media (production): cache ยาวสำหรับชื่อที่มี hash, Range, ส่งต่อให้ proxy — ดู services/media.py
+# -------------------------------------------
+@require_safe
+def serve_media(request, path):
+    return media_response(request, path)
+
+
+# -------------------------------------------
+# React SPA shell (index.html ในหน่วยความจำ บีบอัดไว้แล้ว) — ดู services/spa_shell.py
+# -------------------------------------------
+@require_safe
+def spa_index(request, *args, **kwargs):
+    etag, variants = get_shell().get()
+    if not variants:
+        raise Http404("index.html not found (ยังไม่ได้ build/collectstatic)")
+    encoding = choose_encoding(request.META.get("HTTP_ACCEPT_ENCODING"), variants)
+    current = representation_etag(etag, encoding)
+    # เทียบกับ ETag ของ encoding ที่จะส่งจริงเท่านั้น (If-None-Match ใช้ weak comparison)
+    # ETag ของ gzip ที่ cache ไว้ห้ามได้ 304 เมื่อรอบนี้ต้องส่ง identity/br
+    if_none_match = parse_etags(request.META.get("HTTP_IF_NONE_MATCH", ""))
+    if "*" in if_none_match or current in {tag.removeprefix("W/") for tag in if_none_match}:
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(variants[encoding], content_type="text/html; charset=utf-8")
+        if encoding != "identity":
+            response["Content-Encoding"] = encoding
+    response["ETag"] = current
+    response["Cache-Control"] = SPA_CACHE_CONTROL
+    patch_vary_headers(response, ["Accept-Encoding"])
+    return response
+
+
+# -------------------------------------------
+# Perf summary (staff) — สถิติต่อ endpoint ของ worker ที่ตอบ request นี้
+# -------------------------------------------
+@api_view(["GET", "DELETE"])
+@permission_classes([IsAdminUser])
+def perf_summary(request):
+    if request.method == "DELETE":
+        perf.summary.reset()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+    return Response(perf.perf_snapshot())
+
+
+# -------------------------------------------
+# Prometheus /metrics — รวมทุก gunicorn worker เมื่อตั้ง PROMETHEUS_MULTIPROC_DIR
+# -------------------------------------------
+@require_safe
+def prometheus_metrics(request):
+    token = getattr(settings, "METRICS_TOKEN", "")
+    if token and not constant_time_compare(request.headers.get("Authorization", ""), f"Bearer {token}"):
+        return HttpResponseForbidden("invalid metrics token")
+    body, content_type = metrics.render()
+    return HttpResponse(body, content_type=content_type)
@@ -1,13 +1,46 @@
 # courses/services/youtube_noapi.py
-import yt_dlp
+from urllib.parse import urlparse, parse_qs
 
-def fetch_youtube_duration_seconds_noapi(url: str) -> int | None:
-    """ดึงความยาววิดีโอ (วินาที) โดยไม่ใช้ API Key"""
+
+def extract_youtube_id(u: str) -> str | None:
+    """ดึง video id จากลิงก์ youtube.com/watch, youtu.be, /shorts/, /embed/"""
     try:
-        ydl_opts = {"quiet": True, "skip_download": True, "forcejson": True}
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            info = ydl.extract_info(url, download=False)
-        return int(info.get("duration") or 0)
-    except Exception as e:
-        print("yt_dlp error:", e)
+        p = urlparse(u); host = (p.hostname or "").lower()
+        vid = None
+        if host == "youtu.be":
+            vid = p.path.lstrip("/").split("/")[0]
+        elif host.endswith("youtube.com") or host.endswith("youtube-nocookie.com"):
+            if p.path == "/watch":
+                vid = parse_qs(p.query).get("v", [None])[0]
+            elif p.path.startswith("/shorts/") or p.path.startswith("/embed/"):
+                parts = p.path.split("/")
+                vid = parts[2] if len(parts) > 2 else None
+        return vid or None
+    except Exception:
         return None
+
+
+def youtube_watch_url(video_id: str) -> str:
+    return f"https://www.youtube.com/watch?v={video_id}"
+
+
+def youtube_embed_url(video_id: str) -> str:
+    return f"https://www.youtube-nocookie.com/embed/{video_id}"
+
+
+def fetch_youtube_metadata_noapi(url: str) -> dict:
+    """
+    ดึง title / duration / thumbnail ของวิดีโอโดยไม่ใช้ API Key
+    error จะ raise ออกไป เพื่อให้ผู้เรียกเก็บเป็น negative cache ได้
+    """
+    import yt_dlp  # import ตอนใช้ เพื่อไม่ให้ web process ต้องโหลด yt_dlp
+
+    ydl_opts = {"quiet": True, "skip_download": True, "forcejson": True}
+    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        info = ydl.extract_info(url, download=False)
+    return {
+        "title": info.get("title") or "",
+        "duration": int(info.get("duration") or 0) or None,
+        "thumbnail": info.get("thumbnail") or "",
+    }
+
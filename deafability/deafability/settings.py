@@ -29,6 +29,7 @@ INSTALLED_APPS = [
 
 # --- Middleware (กำหนดครั้งเดียวพอ) ---
 MIDDLEWARE = [
+    "courses.middleware.MetricsMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
@@ -36,6 +37,7 @@ MIDDLEWARE = [
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "courses.middleware.PerfMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -100,6 +102,41 @@ if os.environ.get("DB_HOST") in (None, "",):
         }
     }
 
+# --- Cache ---
+# ใช้ file-based เป็นค่าเริ่มต้น เพื่อให้ gunicorn หลาย worker เห็น cache/เวอร์ชันเดียวกัน
+CACHES = {
+    "default": {
+        "BACKEND": os.environ.get("CACHE_BACKEND", "django.core.cache.backends.filebased.FileBasedCache"),
+        "LOCATION": os.environ.get("CACHE_LOCATION", "/tmp/deafability-cache"),
+    }
+}
+# อายุ response ของแคตตาล็อกที่ cache ไว้ (วินาที) — ปกติจะหมดอายุเพราะเวอร์ชันเปลี่ยนก่อน
+CATALOGUE_CACHE_TIMEOUT = int(os.environ.get("CATALOGUE_CACHE_TIMEOUT", 60 * 60 * 24))
+
+# --- Duration fetch worker (manage.py run_duration_worker) ---
+DURATION_FETCH_CONCURRENCY = int(os.environ.get("DURATION_FETCH_CONCURRENCY", 4))
+DURATION_FETCH_EXTRACTOR = os.environ.get(
+    "DURATION_FETCH_EXTRACTOR", "courses.youtube.fetch_youtube_metadata_noapi"
+)
+# อายุ cache ของ VideoMetadata (วินาที): ดึงสำเร็จ / ดึงไม่สำเร็จ (negative cache)
+VIDEO_METADATA_TTL = int(os.environ.get("VIDEO_METADATA_TTL", 60 * 60 * 24 * 30))
+VIDEO_METADATA_NEGATIVE_TTL = int(os.environ.get("VIDEO_METADATA_NEGATIVE_TTL", 60 * 60))
+
+# --- Perf (courses/middleware.py): Server-Timing / X-DB-Queries ---
+# all = ทุก request, staff = เฉพาะ staff, off = ไม่ใส่ header (สถิติที่ /api/_perf/ ยังเก็บ)
+PERF_HEADERS = os.environ.get("PERF_HEADERS", "staff")
+PERF_WINDOW = int(os.environ.get("PERF_WINDOW", 200))  # จำนวนตัวอย่างล่าสุดต่อ endpoint
+
+# --- Prometheus /metrics (courses/services/metrics.py) ---
+# ตั้งค่าแล้ว scraper ต้องส่ง "Authorization: Bearer <token>" (ว่าง = เปิดให้ดึงได้ทุกคน)
+# หลาย worker ใช้ env PROMETHEUS_MULTIPROC_DIR (gunicorn.conf.py ตั้งให้)
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN", "")
+
+# --- cache เฉลยแบบทดสอบในหน่วยความจำ (ต่อ process) ---
+QUIZ_ANSWER_CACHE_SIZE = int(os.environ.get("QUIZ_ANSWER_CACHE_SIZE", 2048))
+# worker อื่นที่ไม่ได้รับ signal จะเห็นเฉลยใหม่ภายในเวลานี้ (วินาที)
+QUIZ_ANSWER_CACHE_TTL = int(os.environ.get("QUIZ_ANSWER_CACHE_TTL", 60))
+
 # --- i18n/tz ---
 LANGUAGE_CODE = "en-us"
 TIME_ZONE = "UTC"
@@ -125,9 +162,25 @@ if candidate_build.exists():
 # WhiteNoise
 STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
 
+# ไฟล์อัปโหลดใส่ hash ของเนื้อไฟล์ในชื่อ → เสิร์ฟแบบ immutable ได้ (courses/storage.py)
+# (Django 5.1+ อ่าน storage จาก STORAGES; staticfiles คงค่าเดิมของ Django ไว้)
+STORAGES = {
+    "default": {"BACKEND": "courses.storage.HashedMediaStorage"},
+    "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+}
+
 # --- Media (สำหรับ ImageField) ---
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
+# เสิร์ฟ media (courses/services/media.py)
+# มี nginx ข้างหน้า: MEDIA_ACCEL_REDIRECT=/_media/ (location internal ที่ alias ไป MEDIA_ROOT)
+MEDIA_ACCEL_REDIRECT = os.environ.get("MEDIA_ACCEL_REDIRECT", "")
+MEDIA_X_SENDFILE = os.environ.get("MEDIA_X_SENDFILE", "") in ("1", "true", "True")
+MEDIA_CACHE_MAX_AGE = int(os.environ.get("MEDIA_CACHE_MAX_AGE", 3600))  # ไฟล์เก่าที่ชื่อไม่มี hash
+# ความกว้างของรูปย่อ (courses/services/images.py) เช่น IMAGE_VARIANT_WIDTHS=320,640,1024
+IMAGE_VARIANT_WIDTHS = tuple(
+    int(w) for w in os.environ.get("IMAGE_VARIANT_WIDTHS", "320,640,1024").split(",") if w.strip()
+)
 
 # --- Keys/defaults ---
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
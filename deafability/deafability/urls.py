@@ -16,15 +16,13 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.urls import path, include, re_path
-from django.conf import settings
-from django.conf.urls.static import static
-from django.views.static import serve as static_serve
 
 from rest_framework.routers import DefaultRouter
 from courses.views import (
-    CourseViewSet, csrf_bootstrap, course_list, course_detail, lesson_detail,
-    enroll_course, lesson_complete, course_progress, reset_course_progress,
-    JobListAPIView, JobDetailAPIView, quiz_list, quiz_detail, quiz_check
+    CourseViewSet, csrf_bootstrap, course_list, lesson_detail, CourseSummaryListAPIView, course_filters,
+    enroll_course, lesson_complete, course_progress, reset_course_progress, progress_list,
+    JobListAPIView, JobDetailAPIView, quiz_list, quiz_detail, quiz_check, quiz_check_batch,
+    media_variant, serve_media, spa_index, perf_summary, prometheus_metrics,
 )
 router = DefaultRouter()
 router.register(r'courses', CourseViewSet)
@@ -34,11 +32,13 @@ urlpatterns = [
     path('api/', include(router.urls)),
     path('api/csrf/', csrf_bootstrap),
     path('api/courses-list/', course_list, name='course-list'),
-    path('api/courses/<int:course_id>/', course_detail, name='course-detail'),
+    path('api/courses-summary/', CourseSummaryListAPIView.as_view(), name='course-summary'),
+    path('api/courses-summary/filters/', course_filters, name='course-filters'),
     path('api/courses/<int:course_id>/enroll/', enroll_course, name='enroll-course'),
     path('api/courses/<int:course_id>/lessons/<int:lesson_id>/', lesson_detail, name='lesson-detail'),
     path('api/courses/<int:course_id>/progress/', course_progress, name='course_progress'),
     path('api/courses/<int:course_id>/lessons/<int:lesson_id>/complete/', lesson_complete, name='lesson_complete'),
+    path('api/progress/', progress_list, name='progress_list'),
     
     path("api/jobs/", JobListAPIView.as_view(), name="job_list"),
     path("api/jobs/<int:job_id>/", JobDetailAPIView.as_view(), name="job_detail"),
@@ -48,19 +48,23 @@ urlpatterns = [
     path("api/quiz/questions/", quiz_list),
     path("api/quiz/questions/<int:pk>/", quiz_detail),
     path("api/quiz/questions/<int:pk>/check/", quiz_check),
+    path("api/quiz/check/", quiz_check_batch, name="quiz_check_batch"),
+
+    path("api/_perf/", perf_summary, name="perf_summary"),
+    path("metrics", prometheus_metrics, name="metrics"),
 ]
 # ---- เสิร์ฟ media "ก่อน" catch-all เสมอ ----
-# ใช้ static() แค่ dev; ถ้า DEBUG อาจมาจาก env ให้ fallback เสมอ
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
-else:
-    # เผื่อกรณี DEBUG=False แต่ยังรัน dev server
-    urlpatterns += [
-        re_path(r'^media/(?P<path>.*)$', static_serve, {'document_root': settings.MEDIA_ROOT}),
-    ]
+# รูปย่อ: ไฟล์ยังไม่มีก็สร้างให้ตอนขอครั้งแรก (ต้องมาก่อน media ปกติ)
+urlpatterns += [
+    re_path(r'^media/variants/(?P<path>.+)$', media_variant, name='media_variant'),
+]
+# ETag / Range / cache ยาวสำหรับชื่อที่มี hash / X-Accel-Redirect — ใช้ทั้ง dev และ production
+urlpatterns += [
+    re_path(r'^media/(?P<path>.+)$', serve_media, name='media'),
+]
 
 # ---- React catch-all: ยกเว้น api/admin/media ----
+# index.html อยู่ในหน่วยความจำ (identity/gzip/br) + ETag — ไม่อ่านดิสก์ทุก request
 urlpatterns += [
-    re_path(r'^(?!api/|admin/|media/).*$',
-            static_serve, {'document_root': settings.STATIC_ROOT, 'path': 'index.html'}),
+    re_path(r'^(?!api/|admin/|media/).*$', spa_index, name='spa_index'),
 ]
\ No newline at end of file
@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'deafability.settings')
 
 application = get_wsgi_application()
+
+# โหลด + บีบอัด index.html ของ React ไว้ตั้งแต่ start worker
+from courses.services.spa_shell import get_shell  # noqa: E402
+
+get_shell().warm()
@@ -0,0 +1,22 @@
+# gunicorn.conf.py — gunicorn อ่านไฟล์นี้เองเมื่อรันจากโฟลเดอร์ deafability/
+"""
+ให้ทุก worker เขียน metrics ของ Prometheus ลงไดเรกทอรีเดียวกัน แล้ว /metrics รวมให้
+(ดู courses/services/metrics.py)
+"""
+import os
+import shutil
+
+# ต้องตั้งก่อน worker import prometheus_client (worker fork จาก master จึงได้ env นี้ไปด้วย)
+PROMETHEUS_MULTIPROC_DIR = os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", "/tmp/deafability-metrics")
+
+
+def on_starting(server):
+    # ค่าจากรอบก่อน (pid เก่า) ไม่ควรถูกรวมเข้ามา
+    shutil.rmtree(PROMETHEUS_MULTIPROC_DIR, ignore_errors=True)
+    os.makedirs(PROMETHEUS_MULTIPROC_DIR, exist_ok=True)
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)